@@ -47,10 +47,18 @@ def run_migrate():
     subprocess.run(command)
 
 
+# Define the bulk load command: load <export file> [--replace]
+def run_load(args):
+    command = ["uv", "run", "--no-dev", "-m", "app.util.bulk_load", *args]
+    subprocess.run(command)
+
+
 # Entry point
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "migrate":
         run_migrate()
+    elif len(sys.argv) > 1 and sys.argv[1] == "load":
+        run_load(sys.argv[2:])
     elif len(sys.argv) > 1 and sys.argv[1] == "dev":
         run_dev()
     else:
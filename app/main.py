@@ -7,14 +7,15 @@ from typing import Optional
 
 import sentry_sdk
 from fastapi import BackgroundTasks, Cookie, Depends, FastAPI, Request, Response, status
+from fastapi.datastructures import Default
 from fastapi.openapi.utils import get_openapi
 from fastapi.responses import FileResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from joserfc import jwt
 from requests_oauthlib import OAuth2Session
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # Import data types
 from app.models.user import (
@@ -30,16 +31,17 @@ from app.util.approve import Approve
 
 # Import middleware
 from app.util.auth_dependencies import Authentication, CurrentMember, sign_redirect_url, verify_redirect_url
+from app.util.compression import CompressionMiddleware, PrecompressedStaticFiles, precompress_static
 from app.util.csrf import CSRFMiddleware
-from app.util.database import engine, get_session, init_db
+from app.util.database import async_read_engine, engine, get_async_session, get_session, init_db
+from app.util.dataversion import DataVersion
 from app.util.discord import Discord
 
 # Import error handling
 from app.util.errors import Errors
+from app.util.etag import PRIVATE_CACHE_CONTROL, make_etag, not_modified, template_version
 from app.util.forms import Forms
-
-# Import the page rendering library
-from app.util.kennelish import Kennelish
+from app.util.responses import ORJSONResponse
 
 # Import options
 from app.util.settings import Settings
@@ -99,9 +101,11 @@ def update_discord_model_for_existing_user(user_id: str, discord_data: dict):
         logger.error(f"Failed to update Discord model for user {user_id}: {e}")
 
 
-# Initiate FastAPI.
-app = FastAPI()
+# Initiate FastAPI. Wrapped in Default() so routes with a response model keep
+# FastAPI's direct pydantic-core serialization; the rest render with orjson.
+app = FastAPI(default_response_class=Default(ORJSONResponse))
 app.add_middleware(CSRFMiddleware)
+app.add_middleware(CompressionMiddleware)
 templates = Jinja2Templates(directory="app/templates")
 
 
@@ -166,7 +170,7 @@ def global_context(request: Request):
 # Register the context processor with Jinja2
 templates.env.globals.update(global_context=global_context)  # type: ignore[bad-argument-type]
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="app/static"), name="static")
 
 if Settings().telemetry.enable:
     sentry_sdk.init(
@@ -221,6 +225,12 @@ Render the Onboard home page.
 @app.on_event("startup")
 def on_startup():
     init_db()
+    logger.info(f"Preloaded {Forms.preload()} forms")
+    # The image build precompresses already; this catches anything edited since.
+    try:
+        precompress_static("app/static")
+    except OSError as e:
+        logger.warning(f"Could not precompress static files, serving them uncompressed: {e}")
 
 
 @app.get("/")
@@ -447,15 +457,61 @@ async def profile(
     request: Request,
     background_tasks: BackgroundTasks,
     current_user: CurrentMember,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    statement = select(UserModel).where(UserModel.id == uuid.UUID(current_user["id"])).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
-    user_data = user_to_dict(session.exec(statement).one_or_none())
-
-    # Re-run approval workflow in background.
+    # Re-run approval workflow in background, whether or not the page is sent.
     background_tasks.add_task(Approve.approve_member, uuid.UUID(current_user.get("id")))
 
-    return templates.TemplateResponse(request, "profile.html", {"user_data": user_data})
+    user_id = uuid.UUID(current_user["id"])
+    etag = make_etag("profile", user_id, await DataVersion.member_async(session, user_id), *template_version("profile.html", "profile-header.html", "base.html"))
+    headers = {"Cache-Control": PRIVATE_CACHE_CONTROL}
+    if cached := not_modified(request, etag, headers):
+        return cached
+
+    statement = select(UserModel).where(UserModel.id == user_id).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
+    user_data = user_to_dict((await session.exec(statement)).one_or_none())
+
+    return templates.TemplateResponse(request, "profile.html", {"user_data": user_data}, headers={"ETag": etag, **headers})
+
+
+# The client-rendered form page is the same for every member, so browsers may
+# keep it. Private all the same: a shared cache would skip the login redirect.
+FORM_SHELL_CACHE_CONTROL = "private, max-age=86400"
+
+
+def form_shell(request: Request, num: str):
+    """
+    The page form.js renders form num into, from /api/form/{num} and
+    /api/form/{num}/prefill. It holds nothing about the member; its ETag
+    follows only the shell template.
+    """
+    try:
+        Forms.get_form(num)
+    except Exception:
+        return Errors.generate(
+            request,
+            404,
+            "Form not found",
+            essay="This form does not exist.",
+        )
+
+    etag = make_etag("form_shell", num, *template_version("form_shell.html", "base.html"))
+    headers = {"Cache-Control": FORM_SHELL_CACHE_CONTROL}
+    if cached := not_modified(request, etag, headers):
+        return cached
+    return templates.TemplateResponse(request, "form_shell.html", {"num": num}, headers={"ETag": etag, **headers})
+
+
+async def get_form_page_session():
+    """
+    Read session for /join/{num}/ when it renders forms server-side. The
+    client-mode shell never queries, so it gets None and no session at all.
+    """
+    if Settings().forms.render == "client":
+        yield None
+        return
+    async with AsyncSession(async_read_engine) as session:
+        yield session
 
 
 """
@@ -468,12 +524,16 @@ async def forms(
     request: Request,
     current_user: CurrentMember,
     num: str,
-    session: Session = Depends(get_session),
+    session: Optional[AsyncSession] = Depends(get_form_page_session),
 ):
     if num == "1":
         return RedirectResponse("/join/", status_code=status.HTTP_302_FOUND)
+    if Settings().forms.render == "client":
+        return form_shell(request, num)
     try:
-        data = Forms.get_form_body(num)
+        # Version first: should the file change in between, the ETag is the stale one.
+        form_version = Forms.get_form_version(num)
+        plan = Forms.get_form_plan(num)
     except Exception:
         return Errors.generate(
             request,
@@ -482,13 +542,19 @@ async def forms(
             essay="This form does not exist.",
         )
 
+    user_id = uuid.UUID(current_user.get("id"))
+    etag = make_etag("join", num, user_id, await DataVersion.member_async(session, user_id), *form_version, *template_version("form.html", "profile-header.html", "base.html"))
+    headers = {"Cache-Control": PRIVATE_CACHE_CONTROL}
+    if cached := not_modified(request, etag, headers):
+        return cached
+
     # Get data from SqlModel
 
-    statement = select(UserModel).where(UserModel.id == uuid.UUID(current_user.get("id"))).options(selectinload(UserModel.discord))  # type: ignore[bad-argument-type]
-    user_data = session.exec(statement).one_or_none()
-    # Have Kennelish parse the data.
+    statement = select(UserModel).where(UserModel.id == user_id).options(selectinload(UserModel.discord))  # type: ignore[bad-argument-type]
+    user_data = (await session.exec(statement)).one_or_none()
+    # Have Kennelish render the form with the user's data.
     user_data = user_to_dict(user_data)
-    body = Kennelish.parse(data, user_data)
+    body = plan.render(user_data)
 
     # return num
     return templates.TemplateResponse(
@@ -500,6 +566,7 @@ async def forms(
             "id": current_user["id"],
             "body": body,
         },
+        headers={"ETag": etag, **headers},
     )
 
 
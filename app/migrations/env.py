@@ -5,6 +5,9 @@ from sqlalchemy import engine_from_config, pool
 from sqlalchemy.engine import Connection
 from sqlmodel import SQLModel  # noqa: F401
 
+from app.models.dataversion import DataVersionModel  # noqa: F401
+from app.models.events import AdminEventModel  # noqa: F401
+from app.models.tombstone import TombstoneModel  # noqa: F401
 from app.models.user import DiscordModel, EthicsFormModel, MembershipHistoryModel, PaymentModel, UserModel  # noqa: F401
 from app.util.settings import Settings
 
@@ -25,6 +28,15 @@ config.set_main_option("sqlalchemy.url", Settings().database.url)
 # target_metadata = mymodel.Base.metadata
 target_metadata = SQLModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The FTS5 search index, its shadow tables and its rowid map are managed
+    # by hand in d4c1e7a3f2b6; autogenerate would otherwise try to drop them.
+    if type_ == "table" and name.startswith("membersearch"):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +59,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         render_as_batch=True,
@@ -57,7 +70,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
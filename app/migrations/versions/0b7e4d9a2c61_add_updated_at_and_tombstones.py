@@ -0,0 +1,62 @@
+"""Add updated_at to roster and payment rows, and a tombstone table
+
+Revision ID: 0b7e4d9a2c61
+Revises: f3a8d2c7b9e1
+Create Date: 2026-10-17 00:00:00.000000
+
+Backs the /admin/changes feed. SQLite can only ADD COLUMN ... NOT NULL with a
+constant default, so the columns are added with the epoch as server default
+and then backfilled: payments with their created_at, everything else with the
+time of the migration. Batch mode is avoided on purpose, since recreating
+usermodel or discordmodel would drop the membersearch triggers on them. The
+server default stays behind but is never used; SQLAlchemy always supplies
+updated_at itself.
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b7e4d9a2c61"
+down_revision: Union[str, None] = "f3a8d2c7b9e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("usermodel", "discordmodel", "ethicsformmodel", "paymentmodel")
+
+
+def upgrade() -> None:
+    now = sa.bindparam("now", datetime.now(timezone.utc), type_=sa.DateTime())
+    for table in TABLES:
+        op.add_column(table, sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("'1970-01-01 00:00:00'")))
+        if table == "paymentmodel":
+            op.execute("UPDATE paymentmodel SET updated_at = created_at")
+        else:
+            op.execute(sa.text(f"UPDATE {table} SET updated_at = :now").bindparams(now))
+        op.create_index(f"ix_{table}_updated_at", table, ["updated_at"], unique=False)
+
+    op.create_table(
+        "tombstonemodel",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("row_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name="pk_tombstonemodel"),
+    )
+    op.create_index("ix_tombstonemodel_deleted_at", "tombstonemodel", ["deleted_at"], unique=False)
+
+    # Every user read now carries updated_at, so cached copies are stale.
+    op.execute("UPDATE dataversionmodel SET version = version + 1 WHERE scope = 'roster'")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tombstonemodel_deleted_at", table_name="tombstonemodel")
+    op.drop_table("tombstonemodel")
+    for table in reversed(TABLES):
+        op.drop_index(f"ix_{table}_updated_at", table_name=table)
+        op.drop_column(table, "updated_at")
+    op.execute("UPDATE dataversionmodel SET version = version + 1 WHERE scope = 'roster'")
@@ -0,0 +1,56 @@
+"""Key the changes feed on a commit-ordered sequence
+
+Revision ID: 5a8c1f3e7d92
+Revises: 9d2e6b4f1a37
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds the "changes" data version and a change_seq column, stamped from it, to
+every table in the /admin/changes feed. The feed was keyed on updated_at,
+which is taken at flush time and so can land behind a cursor handed out
+before its transaction commits. Existing rows start at 0, ahead of every
+later write. As with updated_at, the columns are added with a constant
+server default and without batch mode, which would drop the membersearch
+triggers; the indexes on updated_at and deleted_at existed only for the feed
+and are replaced.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a8c1f3e7d92"
+down_revision: Union[str, None] = "9d2e6b4f1a37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("usermodel", "discordmodel", "ethicsformmodel", "paymentmodel")
+
+
+def upgrade() -> None:
+    data_version = sa.table("dataversionmodel", sa.column("scope", sa.String()), sa.column("version", sa.Integer()))
+    op.bulk_insert(data_version, [{"scope": "changes", "version": 0}])
+
+    for table in TABLES + ("tombstonemodel",):
+        op.add_column(table, sa.Column("change_seq", sa.Integer(), nullable=False, server_default=sa.text("0")))
+        op.create_index(f"ix_{table}_change_seq", table, ["change_seq"], unique=False)
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_updated_at", table_name=table)
+    op.drop_index("ix_tombstonemodel_deleted_at", table_name="tombstonemodel")
+
+    # Every user read now carries change_seq, so cached copies are stale.
+    op.execute("UPDATE dataversionmodel SET version = version + 1 WHERE scope = 'roster'")
+
+
+def downgrade() -> None:
+    op.create_index("ix_tombstonemodel_deleted_at", "tombstonemodel", ["deleted_at"], unique=False)
+    for table in reversed(TABLES):
+        op.create_index(f"ix_{table}_updated_at", table, ["updated_at"], unique=False)
+    for table in reversed(TABLES + ("tombstonemodel",)):
+        op.drop_index(f"ix_{table}_change_seq", table_name=table)
+        op.drop_column(table, "change_seq")
+
+    op.execute("DELETE FROM dataversionmodel WHERE scope = 'changes'")
+    op.execute("UPDATE dataversionmodel SET version = version + 1 WHERE scope = 'roster'")
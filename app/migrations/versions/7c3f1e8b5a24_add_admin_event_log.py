@@ -0,0 +1,40 @@
+"""Add the admin event log behind /admin/events
+
+Revision ID: 7c3f1e8b5a24
+Revises: 0b7e4d9a2c61
+Create Date: 2026-10-17 00:00:00.000000
+
+admineventmodel holds a day of payments, promotions and admin edits for the
+dashboard's event stream, which reads it by id so that every worker sees
+every event.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3f1e8b5a24"
+down_revision: Union[str, None] = "0b7e4d9a2c61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "admineventmodel",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("type", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=True),
+        sa.Column("payload", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name="pk_admineventmodel"),
+    )
+    op.create_index("ix_admineventmodel_created_at", "admineventmodel", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_admineventmodel_created_at", table_name="admineventmodel")
+    op.drop_table("admineventmodel")
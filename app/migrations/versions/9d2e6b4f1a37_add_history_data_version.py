@@ -0,0 +1,31 @@
+"""Add the history data version scope
+
+Revision ID: 9d2e6b4f1a37
+Revises: 7c3f1e8b5a24
+Create Date: 2026-10-17 00:00:00.000000
+
+The "history" counter in dataversionmodel is bumped by the same session hooks
+as "roster", on every write to membershiphistorymodel, and keys the cached
+reset summary so that deletes and reassignments from any worker invalidate it.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d2e6b4f1a37"
+down_revision: Union[str, None] = "7c3f1e8b5a24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    data_version = sa.table("dataversionmodel", sa.column("scope", sa.String()), sa.column("version", sa.Integer()))
+    op.bulk_insert(data_version, [{"scope": "history", "version": 0}])
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM dataversionmodel WHERE scope = 'history'")
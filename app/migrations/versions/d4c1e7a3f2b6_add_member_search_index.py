@@ -0,0 +1,143 @@
+"""Add FTS5 member search index
+
+Revision ID: d4c1e7a3f2b6
+Revises: a7f2c9d41b83
+Create Date: 2026-10-17 00:00:00.000000
+
+membersearch is an FTS5 virtual table with one row per user (name, nid, Discord
+username, email, major), kept in sync by triggers on usermodel and
+discordmodel. It backs /admin/search. membersearch_key maps each user id to
+the rowid of its membersearch row, so the triggers find it by rowid instead of
+scanning the index.
+
+SQLite only. On other backends this revision is a no-op and /admin/search
+answers 501.
+
+The DDL is copied here rather than imported from app.models.search so this
+revision keeps building the same schema if that module changes later. env.py
+excludes membersearch and its shadow tables from autogenerate, which would
+otherwise offer to drop them.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4c1e7a3f2b6"
+down_revision: Union[str, None] = "a7f2c9d41b83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = {
+    "membersearch_user_insert": """
+CREATE TRIGGER membersearch_user_insert AFTER INSERT ON usermodel BEGIN
+    INSERT INTO membersearch_key (user_id) VALUES (new.id);
+    INSERT INTO membersearch (rowid, user_id, name, nid, discord, email, major)
+    VALUES (
+        (SELECT id FROM membersearch_key WHERE user_id = new.id),
+        new.id,
+        trim(coalesce(new.first_name, '') || ' ' || coalesce(new.surname, '')),
+        new.nid,
+        (SELECT username FROM discordmodel WHERE user_id = new.id),
+        new.email,
+        new.major
+    );
+END
+""",
+    "membersearch_user_update": """
+CREATE TRIGGER membersearch_user_update AFTER UPDATE OF first_name, surname, nid, email, major ON usermodel BEGIN
+    UPDATE membersearch
+    SET name = trim(coalesce(new.first_name, '') || ' ' || coalesce(new.surname, '')),
+        nid = new.nid,
+        email = new.email,
+        major = new.major
+    WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = new.id);
+END
+""",
+    "membersearch_user_delete": """
+CREATE TRIGGER membersearch_user_delete AFTER DELETE ON usermodel BEGIN
+    DELETE FROM membersearch WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = old.id);
+    DELETE FROM membersearch_key WHERE user_id = old.id;
+END
+""",
+    "membersearch_discord_insert": """
+CREATE TRIGGER membersearch_discord_insert AFTER INSERT ON discordmodel BEGIN
+    UPDATE membersearch SET discord = new.username WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = new.user_id);
+END
+""",
+    "membersearch_discord_update": """
+CREATE TRIGGER membersearch_discord_update AFTER UPDATE OF username, user_id ON discordmodel BEGIN
+    UPDATE membersearch SET discord = NULL WHERE old.user_id IS NOT new.user_id AND rowid = (SELECT id FROM membersearch_key WHERE user_id = old.user_id);
+    UPDATE membersearch SET discord = new.username WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = new.user_id);
+END
+""",
+    "membersearch_discord_delete": """
+CREATE TRIGGER membersearch_discord_delete AFTER DELETE ON discordmodel BEGIN
+    UPDATE membersearch SET discord = NULL WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = old.user_id);
+END
+""",
+}
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "sqlite":
+        return
+
+    op.execute(
+        """
+CREATE VIRTUAL TABLE membersearch USING fts5(
+    user_id UNINDEXED,
+    name,
+    nid,
+    discord,
+    email,
+    major,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+    )
+    op.execute(
+        """
+CREATE TABLE membersearch_key (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL UNIQUE
+)
+"""
+    )
+    for ddl in TRIGGERS.values():
+        op.execute(ddl)
+
+    # Index everyone who signed up before this revision.
+    op.execute("INSERT INTO membersearch_key (user_id) SELECT id FROM usermodel")
+    op.execute(
+        """
+INSERT INTO membersearch (rowid, user_id, name, nid, discord, email, major)
+SELECT
+    membersearch_key.id,
+    usermodel.id,
+    trim(coalesce(usermodel.first_name, '') || ' ' || coalesce(usermodel.surname, '')),
+    usermodel.nid,
+    discordmodel.username,
+    usermodel.email,
+    usermodel.major
+FROM usermodel
+JOIN membersearch_key ON membersearch_key.user_id = usermodel.id
+LEFT JOIN discordmodel ON discordmodel.user_id = usermodel.id
+"""
+    )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "sqlite":
+        return
+
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS membersearch")
+    op.execute("DROP TABLE IF EXISTS membersearch_key")
@@ -0,0 +1,57 @@
+"""Add indexes for hot lookups and membership flag filters
+
+Revision ID: e5b2a8c4d1f7
+Revises: d4c1e7a3f2b6
+Create Date: 2026-10-17 00:00:00.000000
+
+Plain indexes on membershiphistorymodel.user_id and reset_date (history per
+member, last reset date) and ethicsformmodel.user_id (every profile load and
+the roster's signtime subquery), plus usermodel.email for the Stripe webhook's
+email fallback, which the partial unique index from a7f2c9d41b83 cannot serve.
+
+is_full_member and did_pay_dues get PARTIAL indexes over only the rows where
+the flag is set. Those rows are a small slice of the roster and the only side
+anything filters on cheaply; the unset side is most of the table, where a scan
+is the right plan anyway. The predicates match how SQLAlchemy renders
+.is_(True) on each backend, since SQLite only uses a partial index when the
+query's WHERE contains the index's WHERE term verbatim.
+
+tests/test_query_plans.py runs EXPLAIN QUERY PLAN over the hot queries and
+fails if one of them goes back to a full table scan.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b2a8c4d1f7"
+down_revision: Union[str, None] = "d4c1e7a3f2b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_membershiphistorymodel_user_id", "membershiphistorymodel", ["user_id"], unique=False)
+    op.create_index("ix_membershiphistorymodel_reset_date", "membershiphistorymodel", ["reset_date"], unique=False)
+    op.create_index("ix_ethicsformmodel_user_id", "ethicsformmodel", ["user_id"], unique=False)
+    op.create_index("ix_usermodel_email", "usermodel", ["email"], unique=False)
+
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        op.create_index("ix_usermodel_is_full_member", "usermodel", ["is_full_member"], unique=False, sqlite_where=sa.text("is_full_member IS 1"))
+        op.create_index("ix_usermodel_did_pay_dues", "usermodel", ["did_pay_dues"], unique=False, sqlite_where=sa.text("did_pay_dues IS 1"))
+    else:
+        op.create_index("ix_usermodel_is_full_member", "usermodel", ["is_full_member"], unique=False, postgresql_where=sa.text("is_full_member IS true"))
+        op.create_index("ix_usermodel_did_pay_dues", "usermodel", ["did_pay_dues"], unique=False, postgresql_where=sa.text("did_pay_dues IS true"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_usermodel_did_pay_dues", table_name="usermodel")
+    op.drop_index("ix_usermodel_is_full_member", table_name="usermodel")
+    op.drop_index("ix_usermodel_email", table_name="usermodel")
+    op.drop_index("ix_ethicsformmodel_user_id", table_name="ethicsformmodel")
+    op.drop_index("ix_membershiphistorymodel_reset_date", table_name="membershiphistorymodel")
+    op.drop_index("ix_membershiphistorymodel_user_id", table_name="membershiphistorymodel")
@@ -0,0 +1,37 @@
+"""Add data version counters
+
+Revision ID: f3a8d2c7b9e1
+Revises: e5b2a8c4d1f7
+Create Date: 2026-10-17 00:00:00.000000
+
+dataversionmodel holds one counter per scope. The "roster" counter is bumped
+by session hooks (app.util.dataversion) in the same transaction as every write
+to usermodel, discordmodel or ethicsformmodel, and backs the ETags on the
+admin user reads.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa  # noqa: F401
+import sqlmodel  # noqa: F401
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8d2c7b9e1"
+down_revision: Union[str, None] = "e5b2a8c4d1f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    data_version = op.create_table(
+        "dataversionmodel",
+        sa.Column("scope", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("scope", name="pk_dataversionmodel"),
+    )
+    op.bulk_insert(data_version, [{"scope": "roster", "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("dataversionmodel")
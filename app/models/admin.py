@@ -0,0 +1,95 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Response models for the admin JSON endpoints.
+
+With a response model FastAPI validates the handler's dict and writes JSON
+straight from pydantic-core, skipping jsonable_encoder. Routes using these
+set response_model_exclude_unset so fields the handler left out (unloaded
+relationships, a summary only on the first page) stay out of the JSON rather
+than turning into nulls.
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, create_model
+
+from app.models.user import DiscordModel, EthicsFormModel, UserModel
+
+
+def _response_model(name: str, table: type, **extra):
+    """Every column of table, all optional, so the model never rejects a partial row."""
+    fields = {field_name: (Optional[field.annotation], None) for field_name, field in table.model_fields.items()}  # type: ignore[missing-attribute]
+    return create_model(name, **fields, **extra)
+
+
+DiscordOut = _response_model("DiscordOut", DiscordModel)
+EthicsFormOut = _response_model("EthicsFormOut", EthicsFormModel)
+UserOut = _response_model("UserOut", UserModel, discord=(Optional[DiscordOut], None), ethics_form=(Optional[EthicsFormOut], None))
+
+
+class UserResponse(BaseModel):
+    data: UserOut  # type: ignore[valid-type]
+
+
+class UserListResponse(BaseModel):
+    data: list[UserOut]  # type: ignore[valid-type]
+
+
+class PaymentOut(BaseModel):
+    id: int
+    user_id: str
+    member_name: str
+    source: str
+    checkout_session_id: Optional[str] = None
+    amount_cents: Optional[int] = None
+    currency: Optional[str] = None
+    customer_email: Optional[str] = None
+    recorded_by_admin_id: Optional[str] = None
+    note: Optional[str] = None
+    created_at: str
+
+
+class PaymentSummary(BaseModel):
+    count: int
+    total_cents: int
+
+
+class PaymentPage(BaseModel):
+    data: list[PaymentOut]
+    next_cursor: Optional[str] = None
+    summary: Optional[PaymentSummary] = None
+
+
+class MembershipHistoryOut(BaseModel):
+    id: int
+    user_id: str
+    reset_date: str
+    was_full_member: Optional[bool] = None
+    had_paid_dues: Optional[bool] = None
+    original_join_date: Optional[int] = None
+    could_vote: Optional[bool] = None
+    reset_reason: Optional[str] = None
+    first_name_snapshot: Optional[str] = None
+    surname_snapshot: Optional[str] = None
+    email_snapshot: Optional[str] = None
+    discord_username_snapshot: Optional[str] = None
+
+
+class MembershipHistoryResponse(BaseModel):
+    data: list[MembershipHistoryOut]
+
+
+class ChangeOut(BaseModel):
+    kind: str
+    id: str
+    deleted: bool
+    changed_at: datetime
+    data: Optional[dict[str, Any]] = None
+
+
+class ChangePage(BaseModel):
+    data: list[ChangeOut]
+    next_cursor: Optional[str] = None
+    has_more: bool
@@ -0,0 +1,26 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+from sqlalchemy import DDL, event
+from sqlmodel import Field, SQLModel
+
+# Every scope gets its row up front, so bumping is a plain UPDATE.
+SCOPES = ("roster", "history", "changes")
+
+
+class DataVersionModel(SQLModel, table=True):
+    """
+    A counter per scope, bumped in the same transaction as every write to the
+    tables in that scope (see app.util.dataversion). Readers compare it with
+    what they saw last to tell whether anything changed, without looking at
+    the data itself.
+    """
+
+    scope: str = Field(primary_key=True)
+    version: int = 0
+
+
+event.listen(
+    DataVersionModel.__table__,  # type: ignore[attr-defined]
+    "after_create",
+    DDL("INSERT INTO dataversionmodel (scope, version) VALUES " + ", ".join(f"('{scope}', 0)" for scope in SCOPES)),
+)
@@ -0,0 +1,26 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+from app.models.user import utcnow
+
+
+class AdminEventModel(SQLModel, table=True):
+    """
+    Short-lived log behind the /admin/events stream: payments, promotions and
+    admin edits, recorded in the same transaction as the change itself.
+
+    Prod runs several workers, so a stream cannot rely on hearing about an
+    event in-process; each one reads this table by id instead. Rows are pruned
+    after EVENT_RETENTION (app.util.events).
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    type: str  # "payment" | "promotion" | "edit"
+    user_id: Optional[uuid.UUID] = None
+    payload: str = "{}"  # JSON
+    created_at: datetime = Field(default_factory=utcnow, index=True)
@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+SQLite FTS5 index behind /admin/search.
+
+membersearch holds one row per user with the searchable fields, kept current by
+triggers on usermodel and discordmodel, so writers never have to know it exists.
+Each trigger finds its row by rowid through membersearch_key, so a write costs
+an index lookup rather than a pass over the whole index.
+The migration that introduced it carries its own copy of this DDL; this one is
+what SQLModel.metadata.create_all builds for in-memory databases and tests.
+"""
+
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+MEMBER_SEARCH_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS membersearch USING fts5(
+    user_id UNINDEXED,
+    name,
+    nid,
+    discord,
+    email,
+    major,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# FTS5 can only look a row up by rowid; filtering on an UNINDEXED column scans
+# the whole index. User ids are UUIDs, so this maps each one to the integer
+# rowid of its membersearch row, and the triggers go through it.
+MEMBER_SEARCH_KEY_TABLE = """
+CREATE TABLE IF NOT EXISTS membersearch_key (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL UNIQUE
+)
+"""
+
+MEMBER_SEARCH_TRIGGERS = {
+    "membersearch_user_insert": """
+CREATE TRIGGER IF NOT EXISTS membersearch_user_insert AFTER INSERT ON usermodel BEGIN
+    INSERT INTO membersearch_key (user_id) VALUES (new.id);
+    INSERT INTO membersearch (rowid, user_id, name, nid, discord, email, major)
+    VALUES (
+        (SELECT id FROM membersearch_key WHERE user_id = new.id),
+        new.id,
+        trim(coalesce(new.first_name, '') || ' ' || coalesce(new.surname, '')),
+        new.nid,
+        (SELECT username FROM discordmodel WHERE user_id = new.id),
+        new.email,
+        new.major
+    );
+END
+""",
+    "membersearch_user_update": """
+CREATE TRIGGER IF NOT EXISTS membersearch_user_update AFTER UPDATE OF first_name, surname, nid, email, major ON usermodel BEGIN
+    UPDATE membersearch
+    SET name = trim(coalesce(new.first_name, '') || ' ' || coalesce(new.surname, '')),
+        nid = new.nid,
+        email = new.email,
+        major = new.major
+    WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = new.id);
+END
+""",
+    "membersearch_user_delete": """
+CREATE TRIGGER IF NOT EXISTS membersearch_user_delete AFTER DELETE ON usermodel BEGIN
+    DELETE FROM membersearch WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = old.id);
+    DELETE FROM membersearch_key WHERE user_id = old.id;
+END
+""",
+    "membersearch_discord_insert": """
+CREATE TRIGGER IF NOT EXISTS membersearch_discord_insert AFTER INSERT ON discordmodel BEGIN
+    UPDATE membersearch SET discord = new.username WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = new.user_id);
+END
+""",
+    "membersearch_discord_update": """
+CREATE TRIGGER IF NOT EXISTS membersearch_discord_update AFTER UPDATE OF username, user_id ON discordmodel BEGIN
+    UPDATE membersearch SET discord = NULL WHERE old.user_id IS NOT new.user_id AND rowid = (SELECT id FROM membersearch_key WHERE user_id = old.user_id);
+    UPDATE membersearch SET discord = new.username WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = new.user_id);
+END
+""",
+    "membersearch_discord_delete": """
+CREATE TRIGGER IF NOT EXISTS membersearch_discord_delete AFTER DELETE ON discordmodel BEGIN
+    UPDATE membersearch SET discord = NULL WHERE rowid = (SELECT id FROM membersearch_key WHERE user_id = old.user_id);
+END
+""",
+}
+
+# Rebuilds the index from scratch, for a new table or after loading with the
+# triggers off. One statement each, in order.
+MEMBER_SEARCH_REBUILD = (
+    "DELETE FROM membersearch",
+    "DELETE FROM membersearch_key",
+    "INSERT INTO membersearch_key (user_id) SELECT id FROM usermodel",
+    """
+INSERT INTO membersearch (rowid, user_id, name, nid, discord, email, major)
+SELECT
+    membersearch_key.id,
+    usermodel.id,
+    trim(coalesce(usermodel.first_name, '') || ' ' || coalesce(usermodel.surname, '')),
+    usermodel.nid,
+    discordmodel.username,
+    usermodel.email,
+    usermodel.major
+FROM usermodel
+JOIN membersearch_key ON membersearch_key.user_id = usermodel.id
+LEFT JOIN discordmodel ON discordmodel.user_id = usermodel.id
+""",
+)
+
+
+def create_member_search(connection) -> None:
+    """Create the index and its triggers. SQLite only; other backends have no FTS5."""
+    if connection.dialect.name != "sqlite":
+        return
+    connection.exec_driver_sql(MEMBER_SEARCH_TABLE)
+    connection.exec_driver_sql(MEMBER_SEARCH_KEY_TABLE)
+    for ddl in MEMBER_SEARCH_TRIGGERS.values():
+        connection.exec_driver_sql(ddl)
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    create_member_search(connection)
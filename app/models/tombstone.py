@@ -0,0 +1,22 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+from app.models.user import change_seq_field, utcnow
+
+
+class TombstoneModel(SQLModel, table=True):
+    """
+    One row per deleted user, Discord, ethics form or payment row, recorded by
+    a session hook (app.util.changes) in the deleting transaction. Lets the
+    /admin/changes feed report deletions, which leave nothing else behind.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # "user" | "discord" | "ethics_form" | "payment"
+    row_id: str
+    deleted_at: datetime = Field(default_factory=utcnow)
+    change_seq: Optional[int] = change_seq_field()
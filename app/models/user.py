@@ -3,12 +3,40 @@
 import re
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Optional
+from functools import cache
+from typing import Any, Optional, get_args
 
 from email_validator import EmailNotValidError, validate_email
 from pydantic import BaseModel, validator
 from sqlalchemy import Index, text
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Relationship, SQLModel, select
+
+from app.models.dataversion import DataVersionModel
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def updated_at_field() -> Any:
+    """
+    Stamped by SQLAlchemy itself on every INSERT and UPDATE of the row,
+    bulk UPDATE statements included, unless the statement sets it. The
+    changed_at of /admin/changes entries and the member page ETags.
+    """
+    return Field(default=None, nullable=False, sa_column_kwargs={"default": utcnow, "onupdate": utcnow})
+
+
+def change_seq_field() -> Any:
+    """
+    The "changes" data version of the transaction that last wrote the row,
+    set the same way as updated_at but read from dataversionmodel by the
+    INSERT or UPDATE itself. The writer bumped and locked that counter first
+    (app.util.dataversion), so unlike a clock it follows commit order. Backs
+    the /admin/changes feed.
+    """
+    version = select(DataVersionModel.version).where(DataVersionModel.scope == "changes").scalar_subquery()
+    return Field(default=None, nullable=False, index=True, sa_column_kwargs={"default": version, "onupdate": version})
 
 
 class DiscordModel(SQLModel, table=True):
@@ -21,6 +49,8 @@ class DiscordModel(SQLModel, table=True):
     nitro: Optional[int] = None
     locale: Optional[str] = None
     username: str
+    updated_at: Optional[datetime] = updated_at_field()
+    change_seq: Optional[int] = change_seq_field()
 
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="usermodel.id", unique=True)
     user: "UserModel" = Relationship(back_populates="discord")
@@ -37,15 +67,17 @@ class EthicsFormModel(SQLModel, table=True):
     host_at_ucf: Optional[bool] = False
     cloud_aup: Optional[bool] = False
     signtime: Optional[int] = 0
+    updated_at: Optional[datetime] = updated_at_field()
+    change_seq: Optional[int] = change_seq_field()
 
-    user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="usermodel.id")
+    user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="usermodel.id", index=True)
     user: "UserModel" = Relationship(back_populates="ethics_form")
 
 
 class MembershipHistoryModel(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: uuid.UUID = Field(foreign_key="usermodel.id")
-    reset_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    user_id: uuid.UUID = Field(foreign_key="usermodel.id", index=True)
+    reset_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
 
     # Historical membership data at time of reset
     was_full_member: Optional[bool] = False
@@ -83,13 +115,26 @@ class PaymentModel(SQLModel, table=True):
     recorded_by_admin_id: Optional[uuid.UUID] = Field(default=None, foreign_key="usermodel.id")
     note: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+    updated_at: Optional[datetime] = updated_at_field()
+    change_seq: Optional[int] = change_seq_field()
 
 
 class UserModel(SQLModel, table=True):
     # Partial index: email defaults to "" and most rows are blank, so a plain
     # unique index would collide. Declared here (not only in the migration) so
     # SQLModel.metadata.create_all builds it for tests too.
-    __table_args__ = (Index("uq_usermodel_email", "email", unique=True, sqlite_where=text("email IS NOT NULL AND email != ''")),)
+    #
+    # That partial index cannot answer a plain "email = ?" lookup (the query
+    # does not imply the index's WHERE), so ix_usermodel_email covers those.
+    # The membership flags get partial indexes over just the rows where they
+    # are set, which are few next to the whole roster; the predicates are
+    # written the way SQLAlchemy renders .is_(True) so the planner matches them.
+    __table_args__ = (
+        Index("uq_usermodel_email", "email", unique=True, sqlite_where=text("email IS NOT NULL AND email != ''")),
+        Index("ix_usermodel_email", "email"),
+        Index("ix_usermodel_is_full_member", "is_full_member", sqlite_where=text("is_full_member IS 1"), postgresql_where=text("is_full_member IS true")),
+        Index("ix_usermodel_did_pay_dues", "did_pay_dues", sqlite_where=text("did_pay_dues IS 1"), postgresql_where=text("did_pay_dues IS true")),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     discord_id: str = Field(unique=True)
@@ -123,6 +168,8 @@ class UserModel(SQLModel, table=True):
     attending: Optional[str] = ""
     comments: Optional[str] = ""
     non_ucf_terms_agreement: Optional[bool] = False
+    updated_at: Optional[datetime] = updated_at_field()
+    change_seq: Optional[int] = change_seq_field()
 
     discord: DiscordModel = Relationship(back_populates="user")
     ethics_form: EthicsFormModel = Relationship(back_populates="user")
@@ -214,18 +261,45 @@ class PublicContact(BaseModel):
     ops_email: str
 
 
+def _holds_models(annotation) -> bool:
+    if isinstance(annotation, type):
+        return issubclass(annotation, BaseModel)
+    return any(_holds_models(arg) for arg in get_args(annotation))
+
+
+@cache
+def _serializer_plan(cls: type) -> tuple[frozenset[str], frozenset[str]]:
+    """
+    What user_to_dict copies from instances of cls, worked out once per class:
+    the field names, and the subset of attributes that can hold nested models
+    (relationships, plus fields annotated with a model type).
+    """
+    fields = frozenset(cls.model_fields)  # type: ignore[missing-attribute]
+    nested = frozenset(getattr(cls, "__sqlmodel_relationships__", ())) | {name for name, field in cls.model_fields.items() if _holds_models(field.annotation)}  # type: ignore[missing-attribute]
+    return fields, nested
+
+
 def user_to_dict(model):
+    """
+    Plain dict of a model and whatever relationships are loaded on it.
+
+    Same output as model_dump() with loaded relationships (and model-typed
+    fields) converted recursively, built in a single pass over the instance
+    __dict__. Fields that were never loaded are left out, as are relationships
+    that are unloaded or empty.
+    """
     if model is None:
         return None
     if isinstance(model, list):
         return [user_to_dict(item) for item in model]
-    if isinstance(model, (SQLModel, BaseModel)):
-        data = model.model_dump()
+    if isinstance(model, BaseModel):
+        fields, nested = _serializer_plan(type(model))
+        data = {}
         for key, value in model.__dict__.items():
-            if isinstance(value, (SQLModel, BaseModel)):
-                data[key] = user_to_dict(value)
-            elif isinstance(value, list) and value and isinstance(value[0], (SQLModel, BaseModel)):
+            if key in nested and (isinstance(value, BaseModel) or (isinstance(value, list) and value and isinstance(value[0], BaseModel))):
                 data[key] = user_to_dict(value)
+            elif key in fields:
+                data[key] = value
         return data
 
 
@@ -3,16 +3,22 @@
 import csv
 import logging
 import uuid
+from datetime import datetime, timezone
 from io import StringIO
-from typing import Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Request, Response, status
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.models.admin import ChangePage, MembershipHistoryResponse, PaymentPage, UserListResponse, UserResponse
 from app.models.user import (
+    DiscordModel,
+    EthicsFormModel,
     PaymentModel,
     UserModel,
     UserModelMutable,
@@ -21,11 +27,30 @@ from app.models.user import (
 )
 from app.util.approve import Approve
 from app.util.auth_dependencies import CurrentAdmin
-from app.util.database import get_session
+from app.util.changes import Changes
+from app.util.database import (
+    IS_SQLITE,
+    async_engine,
+    async_read_engine,
+    engine,
+    get_async_read_session,
+    get_pool_status,
+    get_read_session,
+    get_session,
+    read_engine,
+)
+from app.util.dataversion import DataVersion
 from app.util.discord import Discord
 from app.util.email import Email
+from app.util.etag import make_etag, not_modified
+from app.util.events import AdminEvents
+from app.util.export import export_ndjson_gz
+from app.util.forms import Forms
 from app.util.membership_reset import MembershipReset
 from app.util.messages import load_and_render_template
+from app.util.payments import Payments
+from app.util.projection import user_load_options
+from app.util.roster import Roster, RosterSort, RosterStatus
 from app.util.settings import Settings
 
 logger = logging.getLogger(__name__)
@@ -35,6 +60,14 @@ templates = Jinja2Templates(directory="app/templates")
 router = APIRouter(prefix="/admin", tags=["Admin"], redirect_slashes=False)
 
 
+def projection(fields: Optional[str]) -> list:
+    """user_load_options for a fields= query parameter, with unknown fields as a 400."""
+    try:
+        return user_load_options(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/")
 async def admin(request: Request, current_admin: CurrentAdmin):
     """
@@ -115,21 +148,33 @@ async def get_refresh(
     return {"data": user_data}
 
 
-@router.get("/get/")
+@router.get("/get/", response_model=UserResponse, response_model_exclude_unset=True)
 async def admin_get_single(
     request: Request,
+    response: Response,
     current_admin: CurrentAdmin,
     member_id: Optional[uuid.UUID] = None,
-    session: Session = Depends(get_session),
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
     API endpoint that gets a specific user's data as JSON
+
+    fields optionally limits the columns returned, e.g.
+    fields=first_name,surname,discord.username (see user_load_options).
+    Answers 304 when If-None-Match still matches the roster version.
     """
     if member_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing member_id parameter")
 
-    statement = select(UserModel).where(UserModel.id == member_id).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
-    user_data = user_to_dict(session.exec(statement).one_or_none())
+    options = projection(fields)
+    etag = make_etag("get", await DataVersion.current_async(session), member_id, fields)
+    if cached := not_modified(request, etag):
+        return cached
+    response.headers["ETag"] = etag
+
+    statement = select(UserModel).where(UserModel.id == member_id).options(*options)
+    user_data = user_to_dict((await session.exec(statement)).one_or_none())
 
     if not user_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -140,17 +185,24 @@ async def admin_get_single(
 @router.get("/get_by_snowflake/")
 async def admin_get_snowflake(
     request: Request,
+    response: Response,
     current_admin: CurrentAdmin,
     discord_id: Optional[str] = "FAIL",
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     """
     API endpoint that gets a specific user's data as JSON, given a Discord snowflake.
-    Designed for trusted federated systems to exchange data.
+    Designed for trusted federated systems to exchange data; pollers should
+    send If-None-Match and will get a 304 until the roster changes.
     """
     if discord_id == "FAIL":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing discord_id parameter")
 
+    etag = make_etag("get_by_snowflake", DataVersion.current(session), discord_id)
+    if cached := not_modified(request, etag):
+        return cached
+    response.headers["ETag"] = etag
+
     statement = select(UserModel).where(UserModel.discord_id == discord_id).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
     data = user_to_dict(session.exec(statement).one_or_none())
     # if not data:
@@ -220,6 +272,9 @@ async def admin_edit(
     user_update_instance(member_data, input_dict)  # type: ignore[bad-argument-type]
 
     session.add(member_data)
+    # Names of the fields the admin sent; the stream sends the member's current row alongside.
+    edited = sorted(input_data.model_fields_set - {"id"})
+    AdminEvents.record(session, "edit", member_id, fields=edited, admin_id=current_admin["id"])
     session.commit()
     return {"data": user_to_dict(member_data), "msg": "Updated successfully!"}
 
@@ -255,6 +310,7 @@ async def admin_mark_paid(
     member_data.did_pay_dues = True
     session.add(payment)
     session.add(member_data)
+    AdminEvents.record(session, "payment", user_id, source="manual", amount_cents=amount_cents, admin_id=current_admin["id"])
     session.commit()
     session.refresh(member_data)
 
@@ -265,17 +321,28 @@ async def admin_mark_paid(
     return {"data": user_to_dict(member_data), "msg": "Payment recorded."}
 
 
-@router.get("/list")
+@router.get("/list", response_model=UserListResponse, response_model_exclude_unset=True)
 async def admin_list(
     request: Request,
+    response: Response,
     current_admin: CurrentAdmin,
-    session: Session = Depends(get_session),
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
     API endpoint that dumps all users as JSON.
+
+    fields optionally limits the columns returned, as for /admin/get/.
+    Answers 304 when If-None-Match still matches the roster version.
     """
-    statement = select(UserModel).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
-    users = session.exec(statement)
+    options = projection(fields)
+    etag = make_etag("list", await DataVersion.current_async(session), fields)
+    if cached := not_modified(request, etag):
+        return cached
+    response.headers["ETag"] = etag
+
+    statement = select(UserModel).options(*options)
+    users = await session.exec(statement)
     data = []
     for user in users:
         user = user_to_dict(user)
@@ -284,82 +351,139 @@ async def admin_list(
     return {"data": data}
 
 
+@router.get("/roster/")
+async def admin_roster(
+    request: Request,
+    current_admin: CurrentAdmin,
+    status_filter: Optional[RosterStatus] = Query(None, alias="status"),
+    is_full_member: Optional[bool] = None,
+    did_pay_dues: Optional[bool] = None,
+    major: Optional[str] = None,
+    class_standing: Optional[str] = None,
+    sort: RosterSort = "name",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    API endpoint for one page of the member roster.
+
+    Pass next_cursor back as cursor for the following page. The first page
+    (no cursor) also carries the filtered total and full-member count.
+    """
+    clauses = Roster.filters(status_filter, is_full_member, did_pay_dues, major, class_standing)
+    try:
+        data, next_cursor = await Roster.page(session, clauses, sort=sort, descending=order == "desc", cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    response = {"data": data, "next_cursor": next_cursor}
+    if cursor is None:
+        response.update(await Roster.counts(session, clauses))
+    return response
+
+
+@router.get("/search")
+async def admin_search(
+    request: Request,
+    current_admin: CurrentAdmin,
+    q: str = "",
+    is_full_member: Optional[bool] = None,
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    API endpoint for ranked prefix search over name, NID, Discord username, email and major.
+    is_full_member filters as it does for /admin/roster/.
+    """
+    if not IS_SQLITE:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Search needs the SQLite FTS5 index")
+
+    return {"data": await Roster.search(session, q, limit=limit, clauses=Roster.filters(is_full_member=is_full_member))}
+
+
+# Rows fetched from the database per round trip while streaming the CSV.
+CSV_BATCH_SIZE = 500
+
+# (header, column) for each CSV field, in output order.
+CSV_COLUMNS = [
+    ("Membership ID", UserModel.id),
+    ("First Name", UserModel.first_name),
+    ("Last Name", UserModel.surname),
+    ("NID", UserModel.nid),
+    ("Email", UserModel.email),
+    ("Is Returning", UserModel.is_returning),
+    ("Is Member", UserModel.is_full_member),
+    ("Gender", UserModel.gender),
+    ("Major", UserModel.major),
+    ("Class Standing", UserModel.class_standing),
+    ("Shirt Size", UserModel.shirt_size),
+    ("Discord Username", DiscordModel.username),
+    ("Discord ID", UserModel.discord_id),
+    ("Experience", UserModel.experience),
+    ("Cyber Interests", UserModel.curiosity),
+    ("Event Interest", UserModel.attending),
+    ("Is C3 Interest", UserModel.c3_interest),
+    ("Comments", UserModel.comments),
+    # Nothing keeps a user to one ethics form row, so a join could repeat
+    # the user; take one signtime the way the scalar relationship did.
+    ("Ethics Form Timestamp", select(EthicsFormModel.signtime).where(EthicsFormModel.user_id == UserModel.id).limit(1).scalar_subquery()),
+    ("Minecraft", UserModel.minecraft),
+]
+
+
 @router.get("/csv")
 async def admin_list_csv(
     request: Request,
     current_admin: CurrentAdmin,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
     API endpoint that dumps all users as CSV.
+
+    Streams straight off a server-side cursor, one batch of rows at a time, so
+    memory stays flat however large the roster gets.
     """
-    statement = select(UserModel).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
-    data = session.exec(statement)
-
-    # Initialize a StringIO object to write CSV data into memory
-    output = StringIO()
-    csv_writer = csv.writer(output)
-
-    # Write the header row
-    headers = [
-        "Membership ID",
-        "First Name",
-        "Last Name",
-        "NID",
-        "Email",
-        "Is Returning",
-        "Is Member",
-        "Gender",
-        "Major",
-        "Class Standing",
-        "Shirt Size",
-        "Discord Username",
-        "Discord ID",
-        "Experience",
-        "Cyber Interests",
-        "Event Interest",
-        "Is C3 Interest",
-        "Comments",
-        "Ethics Form Timestamp",
-        "Minecraft",
-    ]
-    csv_writer.writerow(headers)
-
-    # Write user data rows
-    for user in data:
-        user_dict = user_to_dict(user)
-        if not isinstance(user_dict, dict):
-            logger.warning(f"Skipping user {getattr(user, 'id', '?')} — could not serialize")
-            continue
-        row = [
-            user_dict.get("id"),
-            user_dict.get("first_name"),
-            user_dict.get("surname"),
-            user_dict.get("nid"),
-            user_dict.get("email"),
-            user_dict.get("is_returning"),
-            user_dict.get("is_full_member"),
-            user_dict.get("gender"),
-            user_dict.get("major"),
-            user_dict.get("class_standing"),
-            user_dict.get("shirt_size"),
-            user_dict.get("discord", {}).get("username"),
-            user_dict.get("discord_id"),
-            user_dict.get("experience"),
-            user_dict.get("curiosity"),
-            user_dict.get("attending"),
-            user_dict.get("c3_interest"),
-            user_dict.get("comments"),
-            user_dict.get("ethics_form", {}).get("signtime"),
-            user_dict.get("minecraft"),
-        ]
-        csv_writer.writerow(row)
-
-    # Retrieve CSV content from StringIO and return as response
-    csv_content = output.getvalue()
-    output.close()
-
-    return Response(content=csv_content, headers={"Content-Type": "text/csv"})
+    statement = (
+        select(*(column for _, column in CSV_COLUMNS))
+        .outerjoin(DiscordModel, DiscordModel.user_id == UserModel.id)  # type: ignore[bad-argument-type]
+        .execution_options(yield_per=CSV_BATCH_SIZE)
+    )
+    result = await session.stream(statement)
+
+    async def rows():
+        buffer = StringIO()
+        csv_writer = csv.writer(buffer)
+        csv_writer.writerow(header for header, _ in CSV_COLUMNS)
+        async for batch in result.partitions():
+            csv_writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return StreamingResponse(rows(), media_type="text/csv")
+
+
+@router.get("/export")
+async def admin_export(
+    request: Request,
+    current_admin: CurrentAdmin,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Full export of users, Discord profiles, ethics forms, membership history
+    and payments as gzip-compressed NDJSON, one section per table, for
+    analytics and backups. Streamed at constant memory; see export_ndjson_gz.
+    """
+    logger.info("Admin %s started a full export", current_admin["id"])
+    filename = f"onboard-export-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.ndjson.gz"
+    return StreamingResponse(
+        export_ndjson_gz(session),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.post("/reset_memberships/")
@@ -387,13 +511,13 @@ async def reset_all_memberships(
     return result
 
 
-@router.get("/membership_history/")
+@router.get("/membership_history/", response_model=MembershipHistoryResponse, response_model_exclude_unset=True)
 async def get_membership_history(
     request: Request,
     current_admin: CurrentAdmin,
     user_id: Optional[uuid.UUID] = None,
     limit: int = 100,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     """
     API endpoint to get membership history records.
@@ -411,7 +535,7 @@ async def get_membership_history(
 async def get_reset_summary(
     request: Request,
     current_admin: CurrentAdmin,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     """
     API endpoint to get summary statistics about membership resets.
@@ -444,39 +568,114 @@ async def admin_settings(
     )
 
 
-@router.get("/payments/")
+@router.get("/payments/", response_model=PaymentPage, response_model_exclude_unset=True)
 async def list_payments(
     request: Request,
     current_admin: CurrentAdmin,
-    limit: int = 50,
-    session: Session = Depends(get_session),
+    source: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    user_id: Optional[uuid.UUID] = None,
+    currency: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    session: Session = Depends(get_read_session),
 ):
     """
-    Recent dues payments, Stripe and manual alike, newest first.
+    Dues payments, Stripe and manual alike, newest first.
+
+    Pass next_cursor back as cursor for the following page. The first page
+    (no cursor) also carries a summary: how many payments match and their
+    total in cents.
     """
-    statement = select(PaymentModel).order_by(PaymentModel.created_at.desc()).limit(limit)  # type: ignore[bad-argument-type]
-    payments = session.exec(statement).all()
+    clauses = Payments.filters(source, since, until, user_id, currency)
+    try:
+        data, next_cursor = Payments.page(session, clauses, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
-    data = []
-    for payment in payments:
-        member = session.get(UserModel, payment.user_id)
-        data.append(
-            {
-                "id": payment.id,
-                "user_id": str(payment.user_id),
-                "member_name": f"{member.first_name} {member.surname}".strip() if member else "",
-                "source": payment.source,
-                "checkout_session_id": payment.checkout_session_id,
-                "amount_cents": payment.amount_cents,
-                "currency": payment.currency,
-                "customer_email": payment.customer_email,
-                "recorded_by_admin_id": str(payment.recorded_by_admin_id) if payment.recorded_by_admin_id else None,
-                "note": payment.note,
-                "created_at": payment.created_at.isoformat(),
-            }
-        )
+    response = {"data": data, "next_cursor": next_cursor}
+    if cursor is None:
+        response["summary"] = Payments.summary(session, clauses)
+    return response
 
-    return {"data": data}
+
+@router.get("/changes", response_model=ChangePage)
+async def list_changes(
+    request: Request,
+    current_admin: CurrentAdmin,
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    session: Session = Depends(get_read_session),
+):
+    """
+    Users, Discord accounts, ethics forms and payments written since a cursor,
+    oldest first, with deletions as entries marked deleted and without data.
+
+    Start with no since for everything, then pass next_cursor back as since.
+    Keep following it while has_more is true; once it is false the mirror is
+    current, and polling with the last next_cursor returns only new changes.
+    """
+    try:
+        data, next_cursor, has_more = Changes.page(session, cursor=since, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    return {"data": data, "next_cursor": next_cursor, "has_more": has_more}
+
+
+@router.get("/events")
+async def admin_events(
+    request: Request,
+    current_admin: CurrentAdmin,
+    after: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    Server-Sent Events stream of payments, promotions and admin edits as they
+    happen, each with the member's current roster row.
+
+    Streams start from now, or after the given event id. A reconnecting
+    EventSource sends Last-Event-ID, which takes precedence, so nothing is
+    missed across a dropped connection.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = int(last_event_id)
+    return StreamingResponse(
+        AdminEvents.stream(session, request.is_disconnected, after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/db_pool/")
+async def get_db_pool(
+    request: Request,
+    current_admin: CurrentAdmin,
+):
+    """
+    Connection pool checkout and wait counters for this worker, for sizing database.pool_size.
+    """
+    return {
+        "data": {
+            "sync": get_pool_status(engine),
+            "async": get_pool_status(async_engine),
+            "read": get_pool_status(read_engine),
+            "async_read": get_pool_status(async_read_engine),
+        }
+    }
+
+
+@router.get("/form_cache/")
+async def get_form_cache(
+    request: Request,
+    current_admin: CurrentAdmin,
+):
+    """
+    Form plan and validator cache counters for this worker. Builds beyond one per form mean form files changed (or preloading failed).
+    """
+    return {"data": Forms.cache_stats()}
 
 
 @router.post("/restore_membership/")
@@ -4,17 +4,19 @@ import json
 import logging
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.info import InfoModel
-from app.models.user import PublicContact, UserModel, user_update_instance
+from app.models.user import PublicContact, UserModel, user_to_dict, user_update_instance
 from app.util.auth_dependencies import CurrentMember
-from app.util.database import get_session
+from app.util.database import get_async_read_session, get_async_session
+from app.util.etag import make_etag, not_modified
 from app.util.forms import Forms, apply_fuzzy_parsing, transform_dict
-from app.util.kennelish import Transformer
+from app.util.responses import ORJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -40,15 +42,50 @@ async def get_root():
 
 
 @router.get("/form/{num}")
-async def get_form(num: str):
+async def get_form(num: str, request: Request):
     """
-    Gets the JSON markup for a Kennelish file. For client-side rendering (if that ever becomes a thing).
+    Gets the JSON markup for a Kennelish file, which form.js renders when forms.render is "client".
     Note that Kennelish form files are NOT considered sensitive.
+    Served from the form registry as JSON serialized at load time. The ETag
+    follows the file's mtime and size.
     """
     try:
-        return Forms.get_form_body(num)
+        form = Forms.get_form(num)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Form not found")
+    etag = make_etag("form", num, *form.version)
+    if cached := not_modified(request, etag):
+        return cached
+    return Response(form.json, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("/form/{num}/prefill")
+async def get_form_prefill(
+    num: str,
+    current_user: CurrentMember,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """
+    The member's data a form is prefilled with, for rendering it client-side:
+    only the fields the form reads, plus the id and Discord profile the page
+    header shows.
+    """
+    try:
+        keys = Forms.get_form_prefill_keys(num)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Form not found")
+
+    statement = select(UserModel).where(UserModel.id == uuid.UUID(current_user["id"])).options(selectinload(UserModel.discord))  # type: ignore[bad-argument-type]
+    user = (await session.exec(statement)).one_or_none()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="User not found")
+
+    user_data = user_to_dict(user)
+    prefill = {key: user_data[key] for key in keys if key in user_data}
+    discord = user_data.get("discord")
+    prefill["id"] = user_data["id"]
+    prefill["discord"] = discord and {key: discord.get(key) for key in ("avatar", "username", "email")}
+    return ORJSONResponse(prefill, headers={"Cache-Control": "private, no-cache"})
 
 
 """
@@ -130,16 +167,14 @@ async def post_form(
     request: Request,
     current_user: CurrentMember,
     num: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    # Get Kennelish data
+    # Get the validator generated from the Kennelish file
     try:
-        kennelish_data = Forms.get_form_body(num)
+        model = Forms.get_form_validator(num)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Form not found")
 
-    model = Transformer.kennelish_to_pydantic(kennelish_data)
-
     # Parse and Validate inputs
     try:
         inp = await request.json()
@@ -154,7 +189,7 @@ async def post_form(
     validated_data = transform_dict(validated_data)
 
     statement = select(UserModel).where(UserModel.id == uuid.UUID(current_user["id"])).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
-    result = session.exec(statement)
+    result = await session.exec(statement)
     user = result.one_or_none()
 
     if not user:
@@ -165,12 +200,12 @@ async def post_form(
     # Save the updated model back to the database
     session.add(user)
     try:
-        session.commit()
+        await session.commit()
     except IntegrityError as e:
         logger.error(e)
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=("Integrity Error. " + str(e).split("")[0]))
-    session.refresh(user)
+    await session.refresh(user)
 
     return user.model_dump()
 
@@ -179,7 +214,7 @@ async def post_form(
 async def get_member_dues_status(
     member_id: str,
     current_user: CurrentMember,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """
     Get dues payment status for a member by their ID.
@@ -189,7 +224,7 @@ async def get_member_dues_status(
         # Try to parse member_id as UUID
         member_uuid = uuid.UUID(member_id)
         statement = select(UserModel).where(UserModel.id == member_uuid)
-        user = session.exec(statement).one_or_none()
+        user = (await session.exec(statement)).one_or_none()
 
         if not user:
             return {"dues": False}
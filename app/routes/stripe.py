@@ -17,6 +17,9 @@ from app.models.user import PaymentModel, UserModel, user_to_dict
 from app.util.approve import Approve
 from app.util.auth_dependencies import CurrentMember
 from app.util.database import get_session
+from app.util.dataversion import DataVersion
+from app.util.etag import PRIVATE_CACHE_CONTROL, make_etag, not_modified, template_version
+from app.util.events import AdminEvents
 from app.util.membership_reset import MembershipReset
 from app.util.settings import Settings
 
@@ -41,7 +44,20 @@ async def get_root(
     """
     Get API information.
     """
-    statement = select(UserModel).where(UserModel.id == uuid.UUID(current_user["id"])).options(selectinload(UserModel.discord))  # type: ignore[bad-argument-type]
+    user_id = uuid.UUID(current_user["id"])
+    version = DataVersion.member(session, user_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    paused_payments = Settings().stripe.pause_payments
+    dues_restart_soon = MembershipReset.dues_restart_soon(session)
+
+    etag = make_etag("pay", user_id, version, paused_payments, dues_restart_soon, *template_version("pay.html", "profile-header.html", "base.html"))
+    headers = {"Cache-Control": PRIVATE_CACHE_CONTROL}
+    if cached := not_modified(request, etag, headers):
+        return cached
+
+    statement = select(UserModel).where(UserModel.id == user_id).options(selectinload(UserModel.discord))  # type: ignore[bad-argument-type]
     user_data = session.exec(statement).one_or_none()
     if user_data is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -49,9 +65,6 @@ async def get_root(
 
     user_data = user_to_dict(user_data)
 
-    paused_payments = Settings().stripe.pause_payments
-    dues_restart_soon = MembershipReset.dues_restart_soon(session)
-
     return templates.TemplateResponse(
         request,
         "pay.html",
@@ -61,6 +74,7 @@ async def get_root(
             "paused_payments": paused_payments,
             "dues_restart_soon": dues_restart_soon,
         },
+        headers={"ETag": etag, **headers},
     )
 
 
@@ -236,6 +250,7 @@ def pay_dues(checkout_session, db_session, background_tasks):
     user_data.did_pay_dues = True
     db_session.add(payment)
     db_session.add(user_data)
+    AdminEvents.record(db_session, "payment", member_id, source="stripe", amount_cents=payment.amount_cents, currency=payment.currency)
     try:
         db_session.commit()
     except IntegrityError:
@@ -5,6 +5,28 @@ let userDict = {};
 let userList;
 let qrScanner;
 
+const ROSTER_PAGE_SIZE = 100;
+
+const STATUS_LABELS = {
+  admin: "Administrator",
+  ops: "Operations Member",
+  member: "Dues-Paying Member",
+  needs_dues: "Needs Dues Payment",
+  needs_ethics: "Needs Ethics Form",
+  attendee: "Attendee",
+};
+
+// Sorting and filtering happen on the server; the table holds the pages
+// fetched so far and rosterCursor points at the next one.
+let rosterQuery = { sort: "name", order: "asc" };
+let rosterCursor = null;
+// Bumped whenever the table starts over (sort, filter, search), so responses
+// to requests made for an earlier table are dropped instead of mixed in.
+let rosterGeneration = 0;
+
+// Whose details are open, so live events for them can refresh the view.
+let shownUserId = null;
+
 function load() {
   let valueNames = [
     "Name",
@@ -20,64 +42,180 @@ function load() {
   let valueHeader = "<tr>";
   for (let i = 0; i < valueNames.length; i++) {
     valueItems += `<td class="${valueNames[i].toLowerCase()}"></td>`;
-    valueHeader += `<td><button class="sort totally_text" data-sort="${valueNames[i].toLowerCase()}">${valueNames[i]}</button></td>`;
+    if (valueNames[i] === "Details") {
+      valueHeader += `<td>${valueNames[i]}</td>`;
+    } else {
+      valueHeader += `<td><button class="roster-sort totally_text" data-sort="${valueNames[i].toLowerCase()}">${valueNames[i]}</button></td>`;
+    }
     valueNames[i] = valueNames[i].toLowerCase();
   }
   valueItems += "</tr>";
   valueHeader += "</tr>";
 
   document.querySelector("thead").innerHTML = valueHeader;
+  document.querySelectorAll(".roster-sort").forEach((btn) => {
+    btn.onclick = (evt) => {
+      sortRoster(btn.dataset.sort);
+    };
+  });
 
+  // The search box queries the server (searchRoster), so keep List.js from
+  // also filtering the rows it returns.
   const options = {
     valueNames: valueNames,
     item: valueItems,
-    searchColumns: ["name", "nid", "discord", "email", "major", "status"],
+    searchClass: "list-search-disabled",
   };
 
-  let members = [];
-  let count_full_member = 0;
-  let count_all = 0;
+  userList = new List("users", options, []);
+  loadRoster();
+
+  let searchTimer;
+  document.querySelector("#users input.search").oninput = (evt) => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => {
+      searchRoster(evt.target.value.trim());
+    }, 200);
+  };
+}
+
+// Top matches from /admin/search in place of the paged roster. An empty
+// query goes back to the roster.
+// Search results honour the Active/Inactive filter, like the roster.
+function searchRoster(query) {
+  if (!query) {
+    loadRoster();
+    return;
+  }
 
-  fetch("/admin/list")
+  const generation = ++rosterGeneration;
+  rosterCursor = null;
+  userList.clear();
+  document.getElementById("loadMore").style.display = "none";
+
+  const params = new URLSearchParams({ q: query, limit: 50 });
+  if (rosterQuery.is_full_member !== undefined) {
+    params.set("is_full_member", rosterQuery.is_full_member);
+  }
+
+  fetch("/admin/search?" + params.toString())
     .then((data) => {
       return data.json();
     })
-    .then((data2) => {
-      data2 = data2.data;
-      for (let i = 0; i < data2.length; i++) {
-        member = data2[i];
-
-        let userStatus = userStatusString(member);
-        let userEntry = {
-          id: sanitizeHTML(member.id).replaceAll("&#45;", "-"),
-          name: sanitizeHTML(member.first_name + " " + member.surname),
-          status: userStatus,
-          discord: "@" + sanitizeHTML(member.discord.username),
-          email: sanitizeHTML(member.email),
-          nid: sanitizeHTML(member.nid),
-          experience: sanitizeHTML(member.experience),
-          major: sanitizeHTML(member.major),
-          details: `<button class="searchbtn btn view-user-details" data-userid="${sickoModeSanitize(member.id)}">Details</button>`,
-          is_full_member: Boolean(member.is_full_member),
-        };
-
-        count_all++;
-        if (member.is_full_member) count_full_member++;
-
-        members.push(userEntry);
-
-        member.name = member.first_name + " " + member.surname;
-        member.username = "@" + member.discord.username;
-        member.pfp = member.discord.avatar;
-        member.status = userStatus;
-        userDict[sickoModeSanitize(member.id)] = member;
+    .then((results) => {
+      if (generation !== rosterGeneration) return;
+      userList.add(results.data.map(rosterEntry));
+    });
+}
+
+// Starts the table over after a sort or filter change: the search results
+// if a search is showing, otherwise the roster from its first page.
+function loadRoster() {
+  const query = document.querySelector("#users input.search").value.trim();
+  if (query) {
+    searchRoster(query);
+    return;
+  }
+
+  rosterGeneration++;
+  rosterCursor = null;
+  userList.clear();
+  loadRosterPage();
+}
+
+// The generation a page is being fetched for, if any.
+let rosterPageLoading = null;
+
+function loadRosterPage() {
+  // One page at a time, or "Load more" would fetch the same cursor twice.
+  if (rosterPageLoading === rosterGeneration) return;
+  const generation = rosterGeneration;
+  rosterPageLoading = generation;
+  const params = new URLSearchParams(rosterQuery);
+  params.set("limit", ROSTER_PAGE_SIZE);
+  if (rosterCursor) params.set("cursor", rosterCursor);
+
+  fetch("/admin/roster/?" + params.toString())
+    .then((data) => {
+      return data.json();
+    })
+    .then((page) => {
+      if (generation !== rosterGeneration) return;
+      userList.add(page.data.map(rosterEntry));
+
+      rosterCursor = page.next_cursor;
+      document.getElementById("loadMore").style.display = rosterCursor
+        ? "inline-block"
+        : "none";
+
+      // Only the first page carries the counts.
+      if (page.total !== undefined) {
+        document.getElementById("rosterCount").innerText =
+          `${page.full_members} dues-paying, ${page.total} total`;
       }
+    })
+    .finally(() => {
+      if (rosterPageLoading === generation) rosterPageLoading = null;
+    });
+}
 
-      userList = new List("users", options, members);
+function rosterEntry(member) {
+  return {
+    id: sanitizeHTML(member.id).replaceAll("&#45;", "-"),
+    name: sanitizeHTML(member.first_name + " " + member.surname),
+    status: STATUS_LABELS[member.status],
+    discord: "@" + sanitizeHTML(member.discord_username),
+    email: sanitizeHTML(member.email),
+    nid: sanitizeHTML(member.nid),
+    experience: sanitizeHTML(member.experience),
+    major: sanitizeHTML(member.major),
+    details: `<button class="searchbtn btn view-user-details" data-userid="${sickoModeSanitize(member.id)}">Details</button>`,
+    is_full_member: Boolean(member.is_full_member),
+  };
+}
+
+// Live updates from /admin/events. Payments, promotions and edits patch the
+// affected row in place, and the open member if it is theirs, instead of
+// reloading the roster. EventSource reconnects by itself and resumes after
+// the last event it saw.
+function listenForEvents() {
+  if (!window.EventSource) return;
+
+  const events = new EventSource("/admin/events");
+  ["payment", "promotion", "edit"].forEach((type) => {
+    events.addEventListener(type, (evt) => {
+      applyMemberEvent(JSON.parse(evt.data));
+    });
+  });
+  // Too much happened to replay one by one; start the table over.
+  events.addEventListener("resync", () => {
+    loadRoster();
+  });
+}
 
-      document.querySelector(".right").innerHTML +=
-        `<br>${count_full_member} dues-paying, ${count_all} total`;
+function applyMemberEvent(event) {
+  if (event.row) {
+    const entry = rosterEntry(event.row);
+    userList.get("id", entry.id).forEach((item) => {
+      item.values(entry);
     });
+  }
+  if (
+    event.user_id === shownUserId &&
+    document.getElementById("user").style.display === "block"
+  ) {
+    refreshUserDisplay(shownUserId);
+  }
+}
+
+function sortRoster(key) {
+  if (rosterQuery.sort === key) {
+    rosterQuery.order = rosterQuery.order === "asc" ? "desc" : "asc";
+  } else {
+    rosterQuery.sort = key;
+    rosterQuery.order = "asc";
+  }
+  loadRoster();
 }
 
 function userStatusString(member) {
@@ -92,7 +230,8 @@ function userStatusString(member) {
 
   if (!member.did_pay_dues) return "Needs Dues Payment";
 
-  if (!member.ethics_form.signtime !== 0) return "Needs Ethics Form";
+  if (!member.ethics_form || !Number.parseInt(member.ethics_form.signtime))
+    return "Needs Ethics Form";
 
   return "Attendee"; // Unactivated account
 }
@@ -146,8 +285,14 @@ function showQR() {
   document.getElementById("scanner").style.display = "block";
 }
 
+// The roster only carries what the table shows, so fetch the full record.
 function showUser(userId) {
+  refreshUserDisplay(sickoModeSanitize(userId));
+}
+
+function renderUser(userId) {
   const user = userDict[userId];
+  shownUserId = userId;
 
   // Header details
   document.getElementById("pfp").src = user.pfp;
@@ -320,7 +465,7 @@ function editUser(payload) {
       member.status = userStatusString(member);
 
       userDict[user_id] = member;
-      showUser(user_id);
+      renderUser(user_id);
     });
 }
 
@@ -368,7 +513,7 @@ function refreshUserDisplay(user_id) {
       member.status = userStatusString(member);
 
       userDict[user_id] = member;
-      showUser(user_id);
+      renderUser(user_id);
     });
 }
 
@@ -410,7 +555,7 @@ function verifyUser(user_id) {
       member.status = userStatusString(member);
 
       userDict[user_id] = member;
-      showUser(user_id);
+      renderUser(user_id);
     });
 }
 
@@ -441,7 +586,7 @@ function inviteToInfra(user_id, reset_password = false) {
  Password: ${resp.password}`);
 
       userDict[user_id].infra_email = resp.username;
-      showUser(user_id);
+      renderUser(user_id);
     })
     .catch((error) => {
       alert(`Error provisioning infrastructure access: ${error.message}`);
@@ -597,13 +742,8 @@ function scannedCode(result) {
 function filter(showOnlyActiveUsers) {
   // showActiveUsers == true -> only active shown
   // showActiveUsers == false -> only inactive shown
-  userList.filter((item) => {
-    let activeOrInactive = item.values().is_full_member;
-    if (!showOnlyActiveUsers) {
-      activeOrInactive = !activeOrInactive;
-    }
-    return activeOrInactive;
-  });
+  rosterQuery.is_full_member = showOnlyActiveUsers;
+  loadRoster();
 
   document.getElementById("activeFilter").innerText = showOnlyActiveUsers
     ? "Active"
@@ -615,6 +755,7 @@ function filter(showOnlyActiveUsers) {
 
 window.onload = (evt) => {
   load();
+  listenForEvents();
 
   // Prep QR library
   const videoElem = document.querySelector("video");
@@ -654,6 +795,10 @@ window.onload = (evt) => {
   document.getElementById("activeFilter").onclick = (evt) => {
     filter(true);
   };
+
+  document.getElementById("loadMore").onclick = (evt) => {
+    loadRosterPage();
+  };
 };
 
 // Discord Migration Functions
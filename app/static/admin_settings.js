@@ -8,10 +8,29 @@ function formatAmount(cents, currency) {
   return currency ? value + " " + currency.toUpperCase() : value;
 }
 
+// Payments are fetched a page at a time, newest first; paymentsCursor points
+// at the next page, or is null once the oldest payment is on screen.
+const PAYMENTS_PAGE_SIZE = 50;
+let paymentsCursor = null;
+
+function paymentsMessage(text, className) {
+  const row = document.createElement("tr");
+  const cell = document.createElement("td");
+  cell.colSpan = 5;
+  cell.className = className || "";
+  cell.textContent = text;
+  row.appendChild(cell);
+  return row;
+}
+
 function loadPayments() {
   const body = document.getElementById("paymentsBody");
+  const more = document.getElementById("morePayments");
+  const params = new URLSearchParams({ limit: PAYMENTS_PAGE_SIZE });
+  if (paymentsCursor) params.set("cursor", paymentsCursor);
 
-  fetch("/admin/payments/?limit=50", { credentials: "include" })
+  more.disabled = true;
+  fetch("/admin/payments/?" + params.toString(), { credentials: "include" })
     .then((response) => {
       if (!response.ok) {
         throw new Error("Failed to load payments (" + response.status + ")");
@@ -20,17 +39,22 @@ function loadPayments() {
     })
     .then((payload) => {
       const payments = payload.data || [];
-      body.replaceChildren();
+      const firstPage = !paymentsCursor;
+      if (firstPage) {
+        body.replaceChildren();
+      }
 
-      if (payments.length === 0) {
-        const row = document.createElement("tr");
-        const cell = document.createElement("td");
-        cell.colSpan = 5;
-        cell.className = "muted";
-        cell.textContent = "No payments recorded yet.";
-        row.appendChild(cell);
-        body.appendChild(row);
-        return;
+      // Only the first page carries the summary.
+      if (payload.summary) {
+        document.getElementById("paymentsSummary").textContent =
+          payload.summary.count +
+          " payments, " +
+          formatAmount(payload.summary.total_cents) +
+          " total";
+      }
+
+      if (firstPage && payments.length === 0) {
+        body.appendChild(paymentsMessage("No payments recorded yet.", "muted"));
       }
 
       payments.forEach((payment) => {
@@ -49,15 +73,14 @@ function loadPayments() {
         });
         body.appendChild(row);
       });
+
+      paymentsCursor = payload.next_cursor;
+      more.style.display = paymentsCursor ? "inline-block" : "none";
+      more.disabled = false;
     })
     .catch((err) => {
-      body.replaceChildren();
-      const row = document.createElement("tr");
-      const cell = document.createElement("td");
-      cell.colSpan = 5;
-      cell.textContent = err.message;
-      row.appendChild(cell);
-      body.appendChild(row);
+      body.appendChild(paymentsMessage(err.message));
+      more.disabled = false;
     });
 }
 
@@ -115,5 +138,6 @@ function runMembershipReset() {
 
 document.addEventListener("DOMContentLoaded", () => {
   loadPayments();
+  document.getElementById("morePayments").onclick = loadPayments;
   document.getElementById("runReset").onclick = runMembershipReset;
 });
@@ -1,34 +1,57 @@
 // Other dropdown logic
 
-let dropdowns = document.querySelectorAll("select");
-let checkboxes = document.querySelectorAll("fieldset.checkbox");
+function bind_form() {
+  let dropdowns = document.querySelectorAll("select");
+  let checkboxes = document.querySelectorAll("fieldset.checkbox");
+
+  for (let i = 0; i < dropdowns.length; i++) {
+    dropdowns[i].onchange = (evt) => {
+      let el = evt.target;
+      if (el.value == "_other") {
+        el.parentElement.querySelector(".other_dropdown").style.display =
+          "block";
+      } else {
+        el.parentElement.querySelector(".other_dropdown").style.display =
+          "none";
+      }
+    };
+  }
 
-for (let i = 0; i < dropdowns.length; i++) {
-  dropdowns[i].onchange = (evt) => {
-    let el = evt.target;
-    if (el.value == "_other") {
-      el.parentElement.querySelector(".other_dropdown").style.display = "block";
-    } else {
-      el.parentElement.querySelector(".other_dropdown").style.display = "none";
-    }
-  };
-}
+  for (let i = 0; i < checkboxes.length; i++) {
+    checkboxes[i].onchange = (evt) => {
+      let el = evt.target;
+      if (el.value == "_other" && el.checked) {
+        el.parentElement.parentElement.querySelector(
+          ".other_checkbox",
+        ).style.display = "block";
+      } else if (el.value == "_other") {
+        el.parentElement.parentElement.querySelector(
+          ".other_checkbox",
+        ).style.display = "none";
+      }
+    };
+  }
 
-for (let i = 0; i < checkboxes.length; i++) {
-  checkboxes[i].onchange = (evt) => {
-    let el = evt.target;
-    if (el.value == "_other" && el.checked) {
-      el.parentElement.parentElement.querySelector(
-        ".other_checkbox",
-      ).style.display = "block";
-    } else if (el.value == "_other") {
-      el.parentElement.parentElement.querySelector(
-        ".other_checkbox",
-      ).style.display = "none";
-    }
-  };
+  // Navigation buttons (Next/Cancel)
+  const nextBtn = document.getElementById("next-btn");
+  if (nextBtn) {
+    nextBtn.onclick = function () {
+      const targetUrl = this.getAttribute("data-nav-url");
+      submit_and_nav(targetUrl);
+    };
+  }
+
+  const cancelBtn = document.getElementById("cancel-btn");
+  if (cancelBtn) {
+    cancelBtn.onclick = function () {
+      const targetUrl = this.getAttribute("data-nav-url");
+      submit_and_nav(targetUrl);
+    };
+  }
 }
 
+bind_form();
+
 // Custom auto-dismissing banner system.
 function banner(str) {
   let el = document.createElement("div");
@@ -368,21 +391,273 @@ document.addEventListener("DOMContentLoaded", function() {
             logoff();
         });
     }
+});
 
-    // Navigation buttons (Next/Cancel)
-    const nextBtn = document.getElementById("next-btn");
-    if (nextBtn) {
-        nextBtn.addEventListener("click", function() {
-            const targetUrl = this.getAttribute("data-nav-url");
-            submit_and_nav(targetUrl);
-        });
+// Client-side Kennelish. Renders form JSON exactly as Kennelish.parse in
+// app/util/kennelish.py does, so keep the two in step. Used when the page is
+// the shell served with forms.render set to "client".
+
+// Python's html.escape: throws on anything but a string, as escape() does.
+function kennelish_escape(s) {
+  return s
+    .replaceAll("&", "&amp;")
+    .replaceAll("<", "&lt;")
+    .replaceAll(">", "&gt;")
+    .replaceAll('"', "&quot;")
+    .replaceAll("'", "&#x27;");
+}
+
+// Python's str() for JSON values.
+function kennelish_str(value) {
+  if (value === null || value === undefined) return "None";
+  if (value === true) return "True";
+  if (value === false) return "False";
+  return String(value);
+}
+
+// Python's dict.get, which fails on anything but an object.
+function kennelish_get(obj, key, fallback) {
+  if (typeof obj != "object" || obj === null || Array.isArray(obj)) {
+    throw new TypeError("not an object");
+  }
+  return key in obj ? obj[key] : fallback;
+}
+
+function kennelish_key_id(entry) {
+  return kennelish_get(entry, "key", "").replaceAll(".", "_").replaceAll(" ", "_");
+}
+
+function kennelish_required(entry) {
+  return kennelish_get(entry, "required") ? " required" : " ";
+}
+
+function kennelish_label(entry, inner_html) {
+  // Labels and captions are admin-controlled, don't escape (may contain HTML links)
+  let text = `<h3>${kennelish_get(entry, "label", "")}</h3>`;
+  text += `<h4>${kennelish_get(entry, "caption", "")}</h4>`;
+  return `<div class='entry'><div>${text}</div><div>${inner_html}</div></div>`;
+}
+
+function kennelish_header(entry, user_data, tag) {
+  let output = `<${tag}>${kennelish_get(entry, "label", "")}</${tag}>`;
+  output += kennelish_parse(kennelish_get(entry, "elements", []), user_data);
+  return output;
+}
+
+function kennelish_signature(entry, user_data) {
+  const first = kennelish_escape(
+    kennelish_get(
+      user_data,
+      "first_name",
+      "HackUCF Member #" + kennelish_str(kennelish_get(user_data, "id")),
+    ),
+  );
+  const last = kennelish_escape(kennelish_get(user_data, "surname", ""));
+  const key = kennelish_escape(kennelish_get(entry, "key", ""));
+  return `<div name='${key}' class='signature'>By submitting this form, you, ${first} ${last}, agree to the above terms. This form will be time-stamped. By submitting this form, you acknowledge that your submission constitutes a digital signature, which is legally binding and has the same effect as your handwritten signature. This digital signature confirms your consent to the terms and conditions outlined in this document and your agreement to conduct this transaction electronically.</div>`;
+}
+
+function kennelish_text(entry, user_data, inp_type) {
+  let prefill = "";
+  if (kennelish_get(entry, "prefill", true)) {
+    const key = kennelish_get(entry, "key", "");
+    if (key == "email") {
+      prefill = kennelish_get(user_data, "email")
+        ? kennelish_get(user_data, "email")
+        : kennelish_get(kennelish_get(user_data, "discord"), "email");
+    } else {
+      prefill = kennelish_get(user_data, key, "");
     }
+    if (prefill === null || prefill === undefined) prefill = "";
+  }
 
-    const cancelBtn = document.getElementById("cancel-btn");
-    if (cancelBtn) {
-        cancelBtn.addEventListener("click", function() {
-            const targetUrl = this.getAttribute("data-nav-url");
-            submit_and_nav(targetUrl);
-        });
+  let regex_pattern = " ";
+  if (inp_type == "email" && kennelish_get(entry, "domain", false)) {
+    regex_pattern =
+      ' pattern="([A-Za-z0-9.-_+]+)@' +
+      kennelish_escape(kennelish_get(entry, "domain")) +
+      '"';
+  } else if (inp_type == "email") {
+    regex_pattern = ' pattern="([A-Za-z0-9.-_+]+)@[A-Za-z0-9-]+(.[A-Za-z-]{2,})"';
+  } else if (inp_type == "nid") {
+    regex_pattern = ' pattern="^([a-z]{2}[0-9]{6})$"';
+  }
+
+  const output = `<input class='kennelish_input'${kennelish_required(entry)}${regex_pattern} name='${kennelish_escape(kennelish_get(entry, "key", ""))}' type='${inp_type == "nid" ? "text" : inp_type}' value='${kennelish_escape(kennelish_str(prefill))}' placeholder='${kennelish_escape(kennelish_get(entry, "label", ""))}' />`;
+  return kennelish_label(entry, output);
+}
+
+function kennelish_radio(entry, user_data) {
+  let prefill = "";
+  if (kennelish_get(entry, "prefill", true)) {
+    prefill = kennelish_get(user_data, kennelish_get(entry, "key", ""), "");
+    if (kennelish_str(prefill) == "True") {
+      prefill = "Yes";
+    } else if (kennelish_str(prefill) == "False") {
+      prefill = "No";
     }
-});
+  }
+
+  const key = kennelish_escape(kennelish_get(entry, "key", ""));
+  const key_id = kennelish_key_id(entry);
+  const options = entry["options"];
+  if (options === undefined) throw new TypeError("radio without options");
+  let output = `<fieldset name='${key}'${kennelish_required(entry)} class='kennelish_input radio'>`;
+  for (const option of options) {
+    const selected = option !== prefill ? "" : "checked";
+    const option_id = kennelish_str(option).replaceAll(".", "_").replaceAll(" ", "_");
+    output += `<div><input type='radio' ${selected} name='${key}' id='radio_${key_id}_${option_id}' value='${kennelish_escape(kennelish_str(option))}'><label for='radio_${key_id}_${option_id}'>${kennelish_str(option)}</label></div>`;
+  }
+  output += "</fieldset>";
+  return kennelish_label(entry, output);
+}
+
+function kennelish_checkbox(entry) {
+  // Checkboxes do not support pre-filling!
+  const key = kennelish_escape(kennelish_get(entry, "key", ""));
+  const key_id = kennelish_key_id(entry);
+  let output = `<fieldset name='${key}'${kennelish_required(entry)} class='kennelish_input checkbox'>`;
+  for (const option of kennelish_get(entry, "options")) {
+    const option_id = kennelish_str(option).replaceAll(".", "_").replaceAll(" ", "_");
+    output += `<div><input type='checkbox' name='${key}' id='checkbox_${key_id}_${option_id}' value='${kennelish_escape(kennelish_str(option))}'><label for='checkbox_${key_id}_${option_id}'>${kennelish_str(option)}</label></div>`;
+  }
+
+  // Other
+  output += `<div><input type='checkbox' name='${key}' id='checkbox_${key_id}_OTHER' value='_other'><label for='checkbox_${key_id}_OTHER'>Other</label></div>`;
+  output += `<input id='${key_id}' class='other_checkbox' type='text' placeholder='${kennelish_escape(kennelish_get(entry, "label", "Other"))}...'>`;
+  output += "</fieldset>";
+  return kennelish_label(entry, output);
+}
+
+function kennelish_dropdown(entry, user_data) {
+  let prefill = "_default";
+  if (kennelish_get(entry, "prefill", true)) {
+    prefill = kennelish_get(user_data, kennelish_get(entry, "key", ""), "_default");
+    if (prefill === "") prefill = "_default";
+  }
+
+  const key = kennelish_escape(kennelish_get(entry, "key", ""));
+  const key_id = kennelish_key_id(entry);
+  let output = `<select class='kennelish_input'${kennelish_required(entry)} name='${key}'><option disabled ${prefill === "_default" ? "selected " : ""}value='_default'>Select...</option>`;
+  for (const option of kennelish_get(entry, "options")) {
+    output += `<option ${prefill === option ? "selected " : ""}value='${kennelish_escape(kennelish_str(option))}'>${kennelish_str(option)}</option>`;
+  }
+
+  if (kennelish_get(entry, "other")) {
+    output += `<option value='_other'>Other</option></select><input id='${key_id}' class='other_dropdown' type='text' placeholder='${kennelish_escape(kennelish_get(entry, "label", "Other"))}...'>`;
+  } else {
+    output += "</select>";
+  }
+  return kennelish_label(entry, output);
+}
+
+function kennelish_slider(entry, user_data) {
+  let prefill = "";
+  if (kennelish_get(entry, "prefill", true)) {
+    prefill = kennelish_get(user_data, kennelish_get(entry, "key", ""), "");
+  }
+
+  // Labels are admin config, but in content so don't escape
+  const novice_label = kennelish_get(entry, "novice_label", "Novice");
+  const expert_label = kennelish_get(entry, "expert_label", "Expert");
+
+  const key = kennelish_escape(kennelish_get(entry, "key", ""));
+  const key_id = kennelish_key_id(entry);
+  let output = `<span class='caption'>${novice_label}</span><span class='right caption'>${expert_label}</span><br>`;
+  output += `<fieldset name='${key}'${kennelish_required(entry)} class='kennelish_input radio gridded'>`;
+  for (let option = 1; option <= 5; option++) {
+    const selected = option !== prefill ? "" : "checked";
+    output += `<div><input type='radio' ${selected} name='${key}' id='radio_${key_id}_${option}' value='${option}'><label for='radio_${key_id}_${option}'>${option}</label></div>`;
+  }
+  output += "</fieldset>";
+  return kennelish_label(entry, output);
+}
+
+function kennelish_navigation(entry) {
+  let back = "";
+  if (kennelish_get(entry, "prev")) {
+    const prev_url = kennelish_escape(kennelish_get(entry, "prev", "#"));
+    const prev_label = kennelish_get(entry, "prev_label", "Back");
+    back = `<button type='button' class='btn wide grey' id='cancel-btn' data-nav-url='${prev_url}'>${prev_label}</button>`;
+  }
+  const next_url = kennelish_escape(kennelish_get(entry, "next", "#"));
+  const next_label = kennelish_get(entry, "next_label", "Next");
+  const forward = `<button type='button' class='btn wide' id='next-btn' data-nav-url='${next_url}'>${next_label}</button>`;
+  return `<div class='entry'><div>${back}</div><div>${forward}</div></div>`;
+}
+
+function kennelish_invalid(entry) {
+  return `<h3 class='invalid'>Invalid Input: ${kennelish_escape(kennelish_str(kennelish_get(entry, "input", "Unknown")))}</h3>`;
+}
+
+function kennelish_parse(obj, user_data) {
+  let output = "";
+  for (const entry of obj) {
+    try {
+      const input = entry["input"];
+      if (input === undefined) throw new TypeError("entry without input");
+      if (["h1", "h2", "h3", "p"].includes(input)) {
+        output += kennelish_header(entry, user_data, input);
+      } else if (["email", "nid", "text"].includes(input)) {
+        output += kennelish_text(entry, user_data, input);
+      } else if (input == "radio") {
+        output += kennelish_radio(entry, user_data);
+      } else if (input == "checkbox") {
+        output += kennelish_checkbox(entry);
+      } else if (input == "dropdown") {
+        output += kennelish_dropdown(entry, user_data);
+      } else if (input == "slider") {
+        output += kennelish_slider(entry, user_data);
+      } else if (input == "signature") {
+        output += kennelish_signature(entry, user_data);
+      } else if (input == "navigation") {
+        output += kennelish_navigation(entry);
+      } else {
+        output += kennelish_invalid(entry);
+      }
+    } catch (e) {
+      console.error(e);
+      output += kennelish_invalid({ input: "Malformed object" });
+    }
+  }
+  return output;
+}
+
+// Fills the shell's header and form from the form JSON and the member's prefill.
+function render_form(container) {
+  const form_id = container.getAttribute("data-form");
+  const get_json = (url) =>
+    fetch(url, { mode: "same-origin", credentials: "same-origin" }).then(
+      (response) => {
+        if (!response.ok) throw new Error(`${url}: ${response.status}`);
+        return response.json();
+      },
+    );
+
+  Promise.all([
+    get_json(`/api/form/${form_id}`),
+    get_json(`/api/form/${form_id}/prefill`),
+  ])
+    .then(([form, prefill]) => {
+      const discord = prefill.discord || {};
+      const header = document.querySelector(".app");
+      header.id = prefill.id;
+      if (discord.avatar) {
+        header.querySelector(".user .icon").style.backgroundImage =
+          `url(${discord.avatar})`;
+      }
+      header.querySelector(".user h2").innerText = kennelish_str(
+        discord.username,
+      );
+
+      container.innerHTML = kennelish_parse(form, prefill);
+      bind_form();
+    })
+    .catch((e) => {
+      console.error(e);
+      banner("Could not load this form. Please refresh the page.");
+    });
+}
+
+const form_shell = document.querySelector(".form[data-form]");
+if (form_shell) render_form(form_shell);
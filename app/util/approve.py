@@ -13,6 +13,7 @@ from app.models.user import UserModel
 from app.util.database import engine
 from app.util.discord import Discord
 from app.util.email import Email
+from app.util.events import AdminEvents
 from app.util.horsepass import HorsePass
 from app.util.messages import load_and_render_template
 from app.util.settings import Settings
@@ -161,6 +162,8 @@ class Approve:
                 )
                 was_renewal = bool(user_data.renewal)
                 claim = session.execute(claim_statement)
+                if claim.rowcount:  # type: ignore[missing-attribute]
+                    AdminEvents.record(session, "promotion", member_id, renewal=was_renewal)
                 session.commit()
                 if claim.rowcount == 0:  # type: ignore[missing-attribute]
                     logger.info("	Promoted concurrently by another call; skipping notifications.")
@@ -0,0 +1,212 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Bulk loader for the /admin/export format, for seeding staging from a
+production export or restoring after an incident.
+
+    python app/entry.py load onboard-export.ndjson.gz [--replace]
+
+Rows go in with executemany, LOAD_BATCH_SIZE at a time, all inside one
+transaction, so a failed load leaves the database as it was. The
+membersearch triggers and the plain indexes on the loaded tables are
+dropped for the duration. They are recreated once at the end, and the
+search index is rebuilt in a single pass, rather than being maintained
+row by row. Unique indexes stay in place, so duplicates still fail the load.
+
+The /admin/changes feed sees a load like any other write. Rows deleted by
+--replace get tombstones, and every loaded row is stamped with this
+database's change sequence rather than the exporter's, after those
+tombstones. A mirror polling from a cursor taken before the load therefore
+drops what was there and picks up everything loaded, then carries on with
+later writes.
+"""
+
+import argparse
+import gzip
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import IO, Callable, Iterator, Optional
+
+import orjson
+from sqlalchemy import DateTime, Uuid, delete, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.search import MEMBER_SEARCH_REBUILD, MEMBER_SEARCH_TRIGGERS
+from app.models.tombstone import TombstoneModel
+from app.models.user import utcnow
+from app.util.changes import KIND_OF
+from app.util.database import engine
+from app.util.dataversion import DataVersion
+from app.util.export import EXPORT_SECTIONS
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = 5000
+
+TABLES = {section: model.__table__ for section, model in EXPORT_SECTIONS}  # type: ignore[attr-defined]
+
+# Change feed kind of each loaded table that has one.
+FEED_KINDS = {model.__table__.name: KIND_OF[model] for _, model in EXPORT_SECTIONS if model in KIND_OF}  # type: ignore[attr-defined]
+
+
+def open_export(path: str) -> IO[bytes]:
+    """The export at path, decompressed on the fly if it is gzipped."""
+    with open(path, "rb") as probe:
+        is_gzip = probe.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rb") if is_gzip else open(path, "rb")
+
+
+def column_converters(table) -> dict[str, Callable]:
+    """Parsers for the columns JSON cannot carry natively, keyed by column name."""
+    converters: dict[str, Callable] = {}
+    for column in table.columns:
+        # SQLModel wraps DateTime in a TypeDecorator; look through it.
+        column_type = getattr(column.type, "impl", column.type)
+        if isinstance(column_type, DateTime):
+            converters[column.name] = datetime.fromisoformat
+        elif isinstance(column_type, Uuid):
+            converters[column.name] = uuid.UUID
+    return converters
+
+
+def read_batches(lines: Iterator[bytes], batch_size: int = LOAD_BATCH_SIZE) -> Iterator[tuple[str, list[dict]]]:
+    """
+    (section, rows) batches from export lines, each at most batch_size rows,
+    with values converted for the section's table. Columns the table does
+    not have are dropped with a warning. Raises ValueError on unknown sections
+    or rows before the first section header.
+    """
+    section: Optional[str] = None
+    keep: list[str] = []
+    converters: dict[str, Callable] = {}
+    batch: list[dict] = []
+    for line in lines:
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        if "section" in record:
+            if batch:
+                yield section, batch  # type: ignore[misc]
+                batch = []
+            section = record["section"]
+            if section not in TABLES:
+                raise ValueError(f"Unknown section {section!r}")
+            table = TABLES[section]
+            keep = [name for name in record["columns"] if name in table.c]
+            if dropped := set(record["columns"]) - set(keep):
+                logger.warning("Skipping columns %s of %s, which this schema does not have", sorted(dropped), section)
+            converters = column_converters(table)
+            continue
+        if section is None:
+            raise ValueError("Row before the first section header")
+        row = {}
+        for name in keep:
+            value = record.get(name)
+            if value is not None and name in converters:
+                value = converters[name](value)
+            row[name] = value
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield section, batch
+            batch = []
+    if batch:
+        yield section, batch  # type: ignore[misc]
+
+
+def deferred_indexes(connection: Connection) -> list:
+    """Non-unique indexes on the loaded tables that exist in this database."""
+    inspector = inspect(connection)
+    indexes = []
+    for table in TABLES.values():
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        indexes += [index for index in table.indexes if not index.unique and index.name in existing]
+    return indexes
+
+
+def load_export(target: Engine, lines: Iterator[bytes], replace: bool = False, batch_size: int = LOAD_BATCH_SIZE) -> dict[str, int]:
+    """
+    Load export lines into the database behind target and return the rows
+    loaded per section.
+
+    The tables must be empty unless replace is set, in which case their
+    current rows are deleted first, in the same transaction. Raises
+    ValueError when they are not empty, or when the export is malformed.
+    """
+    is_sqlite = target.dialect.name == "sqlite"
+    counts = {section: 0 for section in TABLES}
+
+    with target.begin() as connection:
+        # Everything a roster read or the reset summary returns is about to
+        # change. Bumping first also matters on SQLite: the driver only opens
+        # its transaction at the first DML statement, and the DDL below has
+        # to be inside it to roll back with the rest.
+        for scope in ("roster", "history", "changes"):
+            DataVersion.bump(connection, scope)
+
+        if is_sqlite:
+            for name in MEMBER_SEARCH_TRIGGERS:
+                connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+        # Children first, so no foreign key is left dangling at any point.
+        for table in reversed(TABLES.values()):
+            if replace:
+                if kind := FEED_KINDS.get(table.name):
+                    tombstones = [{"kind": kind, "row_id": str(row_id), "deleted_at": utcnow()} for row_id in connection.execute(select(table.c.id)).scalars()]
+                    if tombstones:
+                        connection.execute(insert(TombstoneModel.__table__), tombstones)  # type: ignore[attr-defined]
+                connection.execute(delete(table))
+            elif connection.execute(select(func.count()).select_from(table)).scalar():
+                raise ValueError(f"{table.name} is not empty; pass replace to overwrite it")
+
+        indexes = deferred_indexes(connection)
+        for index in indexes:
+            index.drop(connection)
+
+        # Loaded rows sort after the tombstones; their change_seq column
+        # default stamps them with this version in place of the exported one.
+        DataVersion.bump(connection, "changes")
+        for section, batch in read_batches(lines, batch_size):
+            if "change_seq" in TABLES[section].c:
+                for row in batch:
+                    row.pop("change_seq", None)
+            connection.execute(insert(TABLES[section]), batch)
+            counts[section] += len(batch)
+            logger.info("Loaded %d %s rows", counts[section], section)
+
+        for index in indexes:
+            index.create(connection)
+
+        if is_sqlite:
+            for statement in MEMBER_SEARCH_REBUILD:
+                connection.exec_driver_sql(statement)
+            for ddl in MEMBER_SEARCH_TRIGGERS.values():
+                connection.exec_driver_sql(ddl)
+        elif target.dialect.name == "postgresql":
+            # Explicit ids leave serial sequences behind the data.
+            for table in TABLES.values():
+                if isinstance(table.c.id.type, Uuid):
+                    continue
+                connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), coalesce(max(id), 0) + 1, false) FROM {table.name}"))
+
+    return counts
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load an /admin/export file into the configured database.")
+    parser.add_argument("path", help="export file, .ndjson or .ndjson.gz")
+    parser.add_argument("--replace", action="store_true", help="delete the existing rows first instead of refusing to load over them")
+    parser.add_argument("--batch-size", type=int, default=LOAD_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.monotonic()
+    with open_export(args.path) as lines:
+        counts = load_export(engine, lines, replace=args.replace, batch_size=args.batch_size)
+    summary = ", ".join(f"{count} {section}" for section, count in counts.items())
+    logger.info("Loaded %s in %.1fs", summary, time.monotonic() - started)
+
+
+if __name__ == "__main__":
+    main()
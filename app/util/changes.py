@@ -0,0 +1,123 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+The /admin/changes feed: every user, Discord, ethics form and payment row
+written since a cursor, plus tombstones for the ones deleted.
+
+Rows carry change_seq, the "changes" data version of the transaction that
+last wrote them (set by the INSERT or UPDATE itself), and deletions leave a
+TombstoneModel row, written by the after_flush hook below in the deleting
+transaction. Only raw SQL on a bare connection goes unseen; there is none
+today.
+"""
+
+import base64
+import json
+import uuid
+from typing import Optional
+
+from sqlalchemy import event, insert, inspect, tuple_
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import Session, select
+
+from app.models.tombstone import TombstoneModel
+from app.models.user import DiscordModel, EthicsFormModel, PaymentModel, UserModel, user_to_dict, utcnow
+from app.util.roster import encode_cursor
+
+# Feed kinds and the model behind each.
+CHANGE_MODELS = {"user": UserModel, "discord": DiscordModel, "ethics_form": EthicsFormModel, "payment": PaymentModel}
+KIND_OF = {model: kind for kind, model in CHANGE_MODELS.items()}
+
+tombstones = TombstoneModel.__table__  # type: ignore[attr-defined]
+
+
+def decode_cursor(cursor: str) -> tuple[int, str, str]:
+    """Change sequence, source and row id of the last change on the previous page. Raises ValueError if malformed."""
+    try:
+        seq, source, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if type(seq) is not int:
+            raise ValueError("Bad sequence")
+        if source not in CHANGE_MODELS and source != "tombstone":
+            raise ValueError("Unknown source")
+        return seq, source, str(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+class Changes:
+    """
+    Cursor-paginated change feed, oldest change first.
+
+    Changes are ordered by (change_seq, source, row id), where the source is
+    a kind from CHANGE_MODELS or "tombstone". change_seq follows commit order,
+    so a transaction that commits after a page was read always lands beyond
+    that page's cursor, however long it was open; timestamps taken at flush
+    time do not, and a cursor on them skips such writes. Each source is read
+    with its own keyset query on its change_seq index and the results are
+    merged, so a page costs a handful of index range scans however large the
+    tables are.
+
+    A changed row appears once, as of the time it is read, however many times
+    it was written since the cursor. A row written again after it was read
+    shows up again further along the feed.
+    """
+
+    @staticmethod
+    def _after(column, id_column, source: str, cursor: Optional[tuple[int, str, str]]) -> list:
+        if cursor is None:
+            return []
+        seq, cursor_source, row_id = cursor
+        if source < cursor_source:
+            return [column > seq]
+        if source > cursor_source:
+            return [column >= seq]
+        key = uuid.UUID(row_id) if source == "user" else int(row_id)
+        return [tuple_(column, id_column) > tuple_(seq, key)]
+
+    @staticmethod
+    def page(session: Session, cursor: Optional[str] = None, limit: int = 100) -> tuple[list[dict], Optional[str], bool]:
+        """
+        Changes after cursor (everything, from no cursor), the cursor to resume
+        from, and whether more changes are already waiting. An empty page hands
+        back the cursor it was given, so polling with it yields only what
+        changes afterwards. Raises ValueError on a malformed cursor.
+        """
+        position = decode_cursor(cursor) if cursor is not None else None
+
+        entries = []
+        for kind, model in CHANGE_MODELS.items():
+            statement = (
+                select(model)
+                .where(*Changes._after(model.change_seq, model.id, kind, position))
+                .order_by(model.change_seq, model.id)  # type: ignore[arg-type]
+                .limit(limit + 1)
+            )
+            for row in session.exec(statement):
+                entries.append(((row.change_seq, kind, row.id), {"kind": kind, "id": str(row.id), "deleted": False, "changed_at": row.updated_at, "data": user_to_dict(row)}))
+
+        statement = (
+            select(TombstoneModel)
+            .where(*Changes._after(TombstoneModel.change_seq, TombstoneModel.id, "tombstone", position))
+            .order_by(TombstoneModel.change_seq, TombstoneModel.id)  # type: ignore[arg-type]
+            .limit(limit + 1)
+        )
+        for tombstone in session.exec(statement):
+            entries.append(((tombstone.change_seq, "tombstone", tombstone.id), {"kind": tombstone.kind, "id": tombstone.row_id, "deleted": True, "changed_at": tombstone.deleted_at, "data": None}))
+
+        entries.sort(key=lambda entry: entry[0])
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        next_cursor = cursor
+        if entries:
+            seq, source, row_id = entries[-1][0]
+            next_cursor = encode_cursor([seq, source, str(row_id)])
+        return [change for _, change in entries], next_cursor, has_more
+
+
+@event.listens_for(ORMSession, "after_flush")
+def _record_tombstones(session, flush_context):
+    deleted_at = utcnow()
+    rows = [{"kind": KIND_OF[type(instance)], "row_id": str(inspect(instance).identity[0]), "deleted_at": deleted_at} for instance in session.deleted if type(instance) in KIND_OF]
+    if rows:
+        session.connection().execute(insert(tombstones), rows)
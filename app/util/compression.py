@@ -0,0 +1,274 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Response compression: brotli or gzip, whichever the client prefers.
+
+CompressionMiddleware compresses dynamic responses as they are sent, chunk by
+chunk for streaming ones. It leaves alone anything under MINIMUM_SIZE, anything
+already encoded, formats that are compressed already, and text/event-stream.
+
+Static files are compressed ahead of time instead: precompress_static writes
+a .br and .gz sibling next to each text asset (at image build, and again at
+startup for anything stale), and PrecompressedStaticFiles serves those
+siblings as they are.
+
+    python -m app.util.compression app/static
+"""
+
+import gzip
+import logging
+import os
+import re
+import sys
+import zlib
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional
+
+import anyio.to_thread
+import brotli
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Supported content codings, most preferred first, with the file extension of
+# their precompressed siblings.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+MINIMUM_SIZE = 500
+# Per-request levels trade a little ratio for much less CPU; precompressed
+# files are written once, so they get the maximum.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Chunks at least this large are compressed in a worker thread.
+THREAD_MINIMUM_SIZE = 128 * 1024
+# wbits 16 + 15: zlib's deflate with a gzip header and trailer.
+GZIP_WBITS = 31
+
+# Formats that are compressed already, and event streams, which must reach the
+# client unbuffered. A "type/*" entry covers the whole type.
+EXCLUDED_CONTENT_TYPES = frozenset(
+    {
+        "application/gzip",
+        "application/x-gzip",
+        "application/zip",
+        "audio/*",
+        "font/woff",
+        "font/woff2",
+        "image/avif",
+        "image/gif",
+        "image/jpeg",
+        "image/png",
+        "image/webp",
+        "text/event-stream",
+        "video/*",
+    }
+)
+
+PRECOMPRESS_SUFFIXES = {".css", ".html", ".ico", ".js", ".json", ".map", ".svg", ".txt"}
+
+# The -br / -gzip suffix the middleware appends to a strong ETag of a
+# representation it compressed.
+VARIANT_SUFFIX = re.compile(r'-(?:br|gzip)"')
+
+
+def negotiate(accept_encoding: str, available=ENCODINGS) -> Optional[str]:
+    """
+    The coding from available that Accept-Encoding rates highest, ties going
+    to the earlier one, or None when the client accepts none of them.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip()] = weight
+
+    chosen, chosen_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > chosen_weight:
+            chosen, chosen_weight = coding, weight
+    return chosen
+
+
+class Compressor:
+    """One response body's compression stream in a content coding from ENCODINGS."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+
+    async def compress(self, body: bytes, more_body: bool) -> bytes:
+        # Compressing large chunks inline would block the event loop.
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self._compress, body, more_body)
+        return self._compress(body, more_body)
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        # Flush after every chunk of a stream so the client can decode it as it arrives.
+        if self.encoding == "br":
+            return self._brotli.process(body) + (self._brotli.flush() if more_body else self._brotli.finish())
+        return self._zlib.compress(body) + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if more_body else self._zlib.flush())
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the coding the client prefers of ENCODINGS.
+
+    Works on the plain ASGI messages alone: the start message is held back
+    until the first body chunk shows whether the response is worth
+    compressing, then each chunk goes through one Compressor.
+
+    A compressed representation is a different representation, so a strong
+    ETag on one gets the coding appended ("abc" becomes "abc-br"). The suffix
+    is stripped from If-None-Match on the way in, so routes keep comparing
+    against the ETags they generate themselves, and put back on their 304s.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+
+        validators = request_headers.get("if-none-match", "")
+        if VARIANT_SUFFIX.search(validators):
+            scope = dict(scope)
+            scope["headers"] = [(name, VARIANT_SUFFIX.sub('"', value.decode("latin-1")).encode("latin-1") if name == b"if-none-match" else value) for name, value in scope["headers"]]
+
+        held: Optional[Message] = None
+        passthrough = False
+        compressor: Optional[Compressor] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal held, passthrough, compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+                passthrough = "content-encoding" in headers or message["status"] == 206 or media_type in EXCLUDED_CONTENT_TYPES or f"{media_type.partition('/')[0]}/*" in EXCLUDED_CONTENT_TYPES
+                etag = headers.get("etag", "")
+                if message["status"] == 304 and encoding is not None and etag.startswith('"') and f'{etag[:-1]}-{encoding}"' in validators:
+                    headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+                if passthrough:
+                    await send(message)
+                else:
+                    held = message
+                return
+
+            if held is not None and message["type"] == "http.response.body":
+                start, held = held, None
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                if more_body or len(body) >= self.minimum_size:
+                    headers = MutableHeaders(raw=start["headers"])
+                    headers.add_vary_header("Accept-Encoding")
+                    if encoding is not None:
+                        compressor = Compressor(encoding)
+                        body = await compressor.compress(body, more_body)
+                        message = {**message, "body": body}
+                        headers["Content-Encoding"] = encoding
+                        if more_body or start.get("trailers", False):
+                            del headers["Content-Length"]
+                        else:
+                            headers["Content-Length"] = str(len(body))
+                        etag = headers.get("etag", "")
+                        if etag.startswith('"'):
+                            headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+                await send(start)
+            elif held is not None:
+                # A pathsend, trailers or early hint before any body: nothing to compress.
+                start, held = held, None
+                await send(start)
+            elif compressor is not None and message["type"] == "http.response.body":
+                message = {**message, "body": await compressor.compress(message.get("body", b""), message.get("more_body", False))}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves a file's .br or .gz sibling to clients that accept it."""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+
+        siblings = {}
+        for encoding, extension in ENCODINGS.items():
+            try:
+                sibling_stat = os.stat(f"{full_path}{extension}")
+            except OSError:
+                continue
+            # A sibling older than its source is stale; serve the source instead.
+            if sibling_stat.st_mtime_ns >= stat_result.st_mtime_ns:
+                siblings[encoding] = sibling_stat
+        if not siblings:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        encoding = negotiate(request_headers.get("accept-encoding", ""), siblings)
+        if encoding is None:
+            # CompressionMiddleware adds Vary to this one, as it does to any response it could have compressed.
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        else:
+            media_type = guess_type(str(full_path))[0] or "text/plain"
+            headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+            response = FileResponse(f"{full_path}{ENCODINGS[encoding]}", status_code=status_code, stat_result=siblings[encoding], media_type=media_type, headers=headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress_static(directory, minimum_size: int = MINIMUM_SIZE) -> int:
+    """
+    Write a .br and .gz sibling for each file under directory with a suffix in
+    PRECOMPRESS_SUFFIXES, skipping files under minimum_size and siblings that
+    are already newer than their source. Returns the number of siblings written.
+
+    Each sibling is written to a temporary file and renamed into place, so
+    several workers starting at once never serve a half-written one.
+    """
+    written = 0
+    for path in sorted(Path(directory).rglob("*")):
+        if path.suffix not in PRECOMPRESS_SUFFIXES or not path.is_file():
+            continue
+        source_stat = path.stat()
+        if source_stat.st_size < minimum_size:
+            continue
+        source = None
+        for encoding, extension in ENCODINGS.items():
+            target = path.with_name(path.name + extension)
+            if target.exists() and target.stat().st_mtime_ns >= source_stat.st_mtime_ns:
+                continue
+            if source is None:
+                source = path.read_bytes()
+            data = brotli.compress(source, quality=11) if encoding == "br" else gzip.compress(source, compresslevel=9, mtime=0)
+            temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            temporary.write_bytes(data)
+            os.replace(temporary, target)
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for directory in sys.argv[1:]:
+        logger.info("Wrote %d precompressed files under %s", precompress_static(directory), directory)
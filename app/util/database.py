@@ -1,49 +1,311 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2024 Collegiate Cyber Defense Club
 import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import aiosqlite
 
 # Create the database
 from alembic import script
 from alembic.runtime import migration
 from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, SingletonThreadPool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
 
-from app.util.settings import Settings
+# Registers the FTS5 search index and the data version, tombstone and admin
+# event tables with create_all, and the session hooks that keep them current.
+from app.models import dataversion, events, search, tombstone  # noqa: F401
+from app.util import changes as change_events  # noqa: F401
+from app.util import dataversion as dataversion_events  # noqa: F401
+from app.util import events as admin_events  # noqa: F401
+from app.util.settings import DatabaseConfig, Settings
 
 DATABASE_URL = Settings().database.url
 logger = logging.getLogger(__name__)
 
-engine = create_engine(
-    DATABASE_URL,
-    # echo=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
 
-# Prod runs multiple uvicorn workers against one SQLite file, so both of these
-# are about surviving concurrent access. Set per connection, since busy_timeout
-# does not persist in the database file the way journal_mode does.
-IS_SQLITE = engine.dialect.name == "sqlite"
-IS_MEMORY_DB = ":memory:" in DATABASE_URL or DATABASE_URL in ("sqlite://", "sqlite:///")
+def is_memory_url(url: str) -> bool:
+    return ":memory:" in url or url in ("sqlite://", "sqlite:///")
+
+
+class PoolStats:
+    """
+    Running checkout counters for one connection pool, used to size it.
+
+    Wait time covers everything between asking the pool for a connection and
+    getting one, including opening a new one. Only the queue pool can actually
+    block, so that is the mode where the wait numbers mean something.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_total * 1000, 3),
+                "wait_ms_avg": round(self.wait_total * 1000 / attempts, 3) if attempts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+
+
+class InstrumentedPool:
+    """
+    Mixin that times every checkout into a PoolStats.
+
+    Stats live on the pool, so they start over when the engine is disposed and
+    the pool recreated.
+    """
+
+    mode = "static"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            logger.warning("Timed out waiting for a database connection: %s", self.status())  # type: ignore[attr-defined]
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+    def snapshot(self) -> dict:
+        data = {"mode": self.mode, **self.stats.snapshot()}
+        if isinstance(self, QueuePool):
+            data.update(
+                {
+                    "pool_size": self.size(),
+                    "checked_out": self.checkedout(),
+                    "overflow": self.overflow(),
+                    "timeout": self.timeout(),
+                }
+            )
+        elif isinstance(self, SingletonThreadPool):
+            data["pool_size"] = self.size
+        return data
+
+
+class InstrumentedStaticPool(InstrumentedPool, StaticPool):
+    mode = "static"
+
 
+class InstrumentedSingletonThreadPool(InstrumentedPool, SingletonThreadPool):
+    mode = "thread"
 
-@event.listens_for(engine, "connect")
-def set_sqlite_pragmas(dbapi_connection, connection_record):
-    if not IS_SQLITE:
-        return
+
+class InstrumentedQueuePool(InstrumentedPool, QueuePool):
+    mode = "queue"
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPool, AsyncAdaptedQueuePool):
+    mode = "queue"
+
+
+# Drivers for create_async_engine, by backend, when async_url is not set.
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+
+def set_sqlite_pragmas(dbapi_connection, use_wal: bool):
     cursor = dbapi_connection.cursor()
     try:
         # Wait for a held write lock instead of failing outright.
         cursor.execute("PRAGMA busy_timeout = 5000")
         # WAL lets readers carry on during a write. In-memory databases cannot
         # use it and have no other process to contend with anyway.
-        if not IS_MEMORY_DB:
+        if use_wal:
             cursor.execute("PRAGMA journal_mode = WAL")
     finally:
         cursor.close()
 
 
+def build_engine(config: DatabaseConfig, read_only: bool = False) -> Engine:
+    """
+    Create an engine with the pool mode from config.
+
+    An in-memory SQLite database only exists inside the connection that created
+    it, so it always gets the static pool: any other mode would hand each new
+    connection its own empty database.
+
+    read_only engines skip switching the journal mode, which is a write; the
+    primary engine has already put the file in WAL mode.
+    """
+    is_sqlite = make_url(config.url).get_backend_name() == "sqlite"
+    is_memory = is_memory_url(config.url)
+
+    mode = config.pool
+    if is_memory and mode != "static":
+        logger.warning("Pool mode %r cannot share an in-memory database between connections; using the static pool.", mode)
+        mode = "static"
+
+    if mode == "queue":
+        pool_args = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": config.pool_size,
+            "max_overflow": config.max_overflow,
+            "pool_timeout": config.pool_timeout,
+        }
+    elif mode == "thread":
+        pool_args = {"poolclass": InstrumentedSingletonThreadPool, "pool_size": config.pool_size}
+    else:
+        pool_args = {"poolclass": InstrumentedStaticPool}
+
+    new_engine = create_engine(
+        config.url,
+        # echo=True,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        **pool_args,
+    )
+
+    # Prod runs multiple uvicorn workers against one SQLite file, so both
+    # pragmas are about surviving concurrent access. Set on every new
+    # connection, since busy_timeout does not persist in the database file the
+    # way journal_mode does.
+    if is_sqlite:
+
+        @event.listens_for(new_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            set_sqlite_pragmas(dbapi_connection, use_wal=not (is_memory or read_only))
+
+    return new_engine
+
+
+def read_only_config(config: DatabaseConfig) -> Optional[DatabaseConfig]:
+    """
+    Config for the read-only engine, or None when reads have to use the primary.
+
+    replica_url wins when set. Otherwise a SQLite file is opened a second time
+    with mode=ro: in WAL mode those connections read from a snapshot and never
+    wait on the writer. An in-memory database cannot be reopened at all, and
+    other backends have nothing to reopen without a replica.
+    """
+    if config.replica_url:
+        return config.model_copy(update={"url": config.replica_url, "async_url": None})
+    url = make_url(config.url)
+    if url.get_backend_name() != "sqlite" or is_memory_url(config.url):
+        return None
+    read_url = url.set(database=f"file:{url.database}").update_query_dict({"mode": "ro", "uri": "true"})
+    return config.model_copy(update={"url": read_url.render_as_string(hide_password=False), "async_url": None})
+
+
+def async_url_for(config: DatabaseConfig) -> str:
+    """The asyncio driver URL for config: async_url if set, else url with its async driver swapped in."""
+    if config.async_url:
+        return config.async_url
+    url = make_url(config.url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for {backend!r}; set database.async_url")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+class SharedSQLiteConnection(aiosqlite.Connection):
+    """
+    aiosqlite proxy over a sqlite3 connection that the sync engine owns.
+
+    Closing it only stops the worker thread; the underlying connection stays
+    open for the sync engine. The thread is a daemon so a proxy that never gets
+    closed cannot hold the process open at exit.
+    """
+
+    def __init__(self, dbapi_connection: sqlite3.Connection):
+        super().__init__(lambda: dbapi_connection, iter_chunk_size=64)
+        self._thread.daemon = True
+
+    async def close(self) -> None:
+        self._connection = None
+        future = self.stop()
+        if future:
+            await future
+
+
+def build_async_engine(config: DatabaseConfig, sync_engine: Engine, read_only: bool = False) -> AsyncEngine:
+    """
+    Create the asyncio engine that sits alongside sync_engine.
+
+    An in-memory SQLite database has no name to open a second connection by, so
+    the async engine drives the sync engine's single connection through
+    aiosqlite instead. File databases get their own queue pool whatever the
+    pool mode: one connection shared between interleaved coroutines would mix
+    their transactions together, which the static mode only gets away with
+    because sync handlers finish a request before yielding the connection.
+    """
+    url = async_url_for(config)
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+
+    if is_sqlite and is_memory_url(config.url):
+
+        async def connect_shared():
+            # Read off the static pool rather than checking a connection out,
+            # which would roll back whatever the sync side has in flight when
+            # it is returned.
+            return await SharedSQLiteConnection(sync_engine.pool.connection.dbapi_connection)  # type: ignore[attr-defined]
+
+        return create_async_engine(url, async_creator=connect_shared, poolclass=InstrumentedStaticPool)
+
+    async_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+    )
+
+    if is_sqlite:
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            set_sqlite_pragmas(dbapi_connection, use_wal=not read_only)
+
+    return async_engine
+
+
+engine = build_engine(Settings().database)
+async_engine = build_async_engine(Settings().database, engine)
+
+# Admin reads and exports go through these so they never queue behind form
+# submissions and webhooks for a connection. They are the primary engines
+# whenever there is nothing separate to read from.
+_read_config = read_only_config(Settings().database)
+read_engine = build_engine(_read_config, read_only=True) if _read_config else engine
+async_read_engine = build_async_engine(_read_config, read_engine, read_only=True) if _read_config else async_engine
+
+IS_SQLITE = engine.dialect.name == "sqlite"
+IS_MEMORY_DB = is_memory_url(DATABASE_URL)
+
+
 if "sqlite:///:memory:" in DATABASE_URL:
     SQLModel.metadata.create_all(engine)
     logger.info("Tables created in SQLite in-memory database.")
@@ -58,6 +320,37 @@ def get_session():
         yield session
 
 
+def get_read_session():
+    """Session on the read-only engine, for handlers that never write."""
+    with Session(read_engine) as session:
+        yield session
+
+
+async def get_async_session():
+    """
+    Session for async handlers, so database round trips do not block the event loop.
+
+    Relationships must be loaded eagerly (selectinload); a lazy load on an
+    async session raises instead of quietly running a query.
+    """
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
+async def get_async_read_session():
+    """Async session on the read-only engine."""
+    async with AsyncSession(async_read_engine) as session:
+        yield session
+
+
+def get_pool_status(target: Engine | AsyncEngine = engine) -> dict:
+    """Checkout counters and current occupancy of an engine's pool."""
+    pool = target.pool
+    if isinstance(pool, InstrumentedPool):
+        return pool.snapshot()
+    return {"mode": type(pool).__name__}
+
+
 def check_current_head(alembic_cfg, connectable):
     # type: (config.Config, engine.Engine) -> bool
     # cfg = config.Config("../alembic.ini")
@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Keeps DataVersionModel counters current.
+
+Two Session-wide event hooks cover every ORM write path: before_flush for
+objects added, changed or deleted in a session, and do_orm_execute for bulk
+UPDATE/DELETE/INSERT statements such as the membership reset. Either way the
+bump runs on the writer's own connection ahead of the write, so it commits or
+rolls back with it, and the counter row stays locked until then: a version
+read later in the same transaction is ordered like the commits. Only raw SQL on a bare connection goes unseen; code doing that
+calls DataVersion.bump itself.
+"""
+
+import uuid
+from itertools import chain
+from typing import Optional
+
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.dataversion import DataVersionModel
+from app.models.user import DiscordModel, EthicsFormModel, MembershipHistoryModel, PaymentModel, UserModel
+
+# Tables whose writes bump each scope's version. roster: everything a user
+# read returns. history: the membership history the reset summary counts.
+# changes: the rows in the /admin/changes feed, which stamp themselves with it.
+SCOPE_MODELS = {
+    "roster": (UserModel, DiscordModel, EthicsFormModel),
+    "history": (MembershipHistoryModel,),
+    "changes": (UserModel, DiscordModel, EthicsFormModel, PaymentModel),
+}
+SCOPE_TABLES = {scope: frozenset(model.__tablename__ for model in models) for scope, models in SCOPE_MODELS.items()}
+
+data_version = DataVersionModel.__table__  # type: ignore[attr-defined]
+
+
+class DataVersion:
+    @staticmethod
+    def bump(connection, scope: str = "roster") -> None:
+        """Increment scope's version on connection, inside whatever transaction it is in."""
+        connection.execute(update(data_version).where(data_version.c.scope == scope).values(version=data_version.c.version + 1))
+
+    @staticmethod
+    def current(session: Session, scope: str = "roster") -> int:
+        return session.exec(select(data_version.c.version).where(data_version.c.scope == scope)).one_or_none() or 0  # type: ignore[call-overload]
+
+    @staticmethod
+    async def current_async(session: AsyncSession, scope: str = "roster") -> int:
+        return (await session.exec(select(data_version.c.version).where(data_version.c.scope == scope))).one_or_none() or 0  # type: ignore[call-overload]
+
+    @staticmethod
+    def _member_statement(user_id: uuid.UUID):
+        # The user row's updated_at and its Discord and ethics form rows', in one
+        # indexed lookup: together they change whenever a page about the member would.
+        return select(
+            UserModel.updated_at,
+            select(func.max(DiscordModel.updated_at)).where(DiscordModel.user_id == UserModel.id).scalar_subquery(),
+            select(func.max(EthicsFormModel.updated_at)).where(EthicsFormModel.user_id == UserModel.id).scalar_subquery(),
+        ).where(UserModel.id == user_id)
+
+    @staticmethod
+    def member(session: Session, user_id: uuid.UUID) -> Optional[tuple]:
+        """One member's version, for ETags over pages about them; None if there is no such user."""
+        row = session.exec(DataVersion._member_statement(user_id)).one_or_none()  # type: ignore[call-overload]
+        return tuple(row) if row is not None else None
+
+    @staticmethod
+    async def member_async(session: AsyncSession, user_id: uuid.UUID) -> Optional[tuple]:
+        row = (await session.exec(DataVersion._member_statement(user_id))).one_or_none()  # type: ignore[call-overload]
+        return tuple(row) if row is not None else None
+
+
+@event.listens_for(ORMSession, "before_flush")
+def _before_flush(session, flush_context, instances):
+    # What this flush is about to write.
+    written = list(chain(session.new, session.dirty, session.deleted))
+    for scope, models in SCOPE_MODELS.items():
+        if any(isinstance(instance, models) for instance in written):
+            DataVersion.bump(session.connection(), scope)
+
+
+@event.listens_for(ORMSession, "do_orm_execute")
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement.table, "name", None)
+        for scope, tables in SCOPE_TABLES.items():
+            if table in tables:
+                DataVersion.bump(orm_execute_state.session.connection(), scope)
@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request, Response
+
+TEMPLATES_DIR = "app/templates"
+
+# Pages about the signed-in member: the browser may keep them, but only for
+# that member, and checks back with the ETag every time it shows one.
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag over whatever identifies a representation: a data version plus
+    the request parameters that shape the body.
+    """
+    return '"' + hashlib.sha256("\0".join(map(str, parts)).encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match lists etag (or is *). Weak validators compare by their opaque part."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def not_modified(request: Request, etag: str, headers: Optional[dict] = None) -> Optional[Response]:
+    """
+    A 304 for etag if the client already has it, otherwise None.
+
+    headers (Cache-Control, say) go on the 304 as well, since RFC 9110 has a
+    304 carry the headers the 200 would have.
+    """
+    if not etag_matches(request, etag):
+        return None
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+def template_version(*names: str) -> tuple[int, ...]:
+    """The mtime of each named template, so ETags over rendered pages follow their markup."""
+    return tuple(os.stat(os.path.join(TEMPLATES_DIR, name)).st_mtime_ns for name in names)
@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Membership events for the admin dashboard, delivered as Server-Sent Events.
+
+Writers call AdminEvents.record before committing, so an event exists exactly
+when its change does. Each /admin/events stream reads AdminEventModel rows
+past the last id it sent. After a commit the after_commit hook below wakes the
+streams in this process straight away. Streams in other workers pick the event
+up on their next poll, at most POLL_SECONDS later.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import orjson
+from sqlalchemy import delete, event, func
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.events import AdminEventModel
+from app.models.user import utcnow
+from app.util.roster import Roster
+
+# Events read per poll. A stream that finds more than this waiting has fallen
+# too far behind to catch up one by one, and tells the page to reload instead.
+EVENT_BUFFER_SIZE = 100
+POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15.0
+EVENT_RETENTION = timedelta(days=1)
+
+# One asyncio.Event per open stream in this process, with the loop it waits on.
+_waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+_waiters_lock = threading.Lock()
+
+
+def format_event(event_id: int, event_type: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+class AdminEvents:
+    @staticmethod
+    def record(session: Session, event_type: str, user_id=None, **data) -> None:
+        """
+        Add an event to session, to go out once it commits. data should stay
+        small; streams attach the member's current roster row themselves.
+        Also prunes events older than EVENT_RETENTION.
+        """
+        session.exec(delete(AdminEventModel).where(AdminEventModel.created_at < utcnow() - EVENT_RETENTION))  # type: ignore[call-overload]
+        session.add(AdminEventModel(type=event_type, user_id=user_id, payload=orjson.dumps(data).decode()))
+        session.info["admin_events"] = True
+
+    @staticmethod
+    def notify() -> None:
+        """Wake this process's streams. Safe from any thread."""
+        with _waiters_lock:
+            waiters = list(_waiters)
+        for loop, wake in waiters:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                # That stream's loop has closed.
+                pass
+
+    @staticmethod
+    async def latest_id(session: AsyncSession) -> int:
+        return (await session.exec(select(func.max(AdminEventModel.id)))).one() or 0
+
+    @staticmethod
+    async def read(session: AsyncSession, after: int, limit: int) -> list[AdminEventModel]:
+        statement = select(AdminEventModel).where(AdminEventModel.id > after).order_by(AdminEventModel.id).limit(limit)  # type: ignore[arg-type]
+        return list((await session.exec(statement)).all())
+
+    @staticmethod
+    async def stream(
+        session: AsyncSession,
+        is_disconnected: Callable[[], Awaitable[bool]],
+        after: Optional[int] = None,
+        poll_seconds: float = POLL_SECONDS,
+        heartbeat_seconds: float = HEARTBEAT_SECONDS,
+        buffer_size: int = EVENT_BUFFER_SIZE,
+    ) -> AsyncIterator[str]:
+        """
+        SSE text for every event after the given id (from now on, without one).
+
+        Each event carries the affected member's roster row as it is when
+        sent, so the page can patch that row without another request. Events
+        are yielded one at a time and read at most buffer_size at a time, so
+        a slow client holds up only its own stream and never piles events up
+        in memory. Idle streams get a comment line every heartbeat_seconds
+        to keep proxies from closing them. The session is closed between polls
+        so an idle stream holds no connection.
+        """
+        wake = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), wake)
+        with _waiters_lock:
+            _waiters.add(waiter)
+        try:
+            yield "retry: 3000\n\n"
+            if after is None:
+                after = await AdminEvents.latest_id(session)
+            last_sent = time.monotonic()
+
+            while not await is_disconnected():
+                wake.clear()
+                events = await AdminEvents.read(session, after, buffer_size + 1)
+                if len(events) > buffer_size:
+                    after = await AdminEvents.latest_id(session)
+                    yield format_event(after, "resync", {})
+                    last_sent = time.monotonic()
+                elif events:
+                    rows = await Roster.rows(session, {admin_event.user_id for admin_event in events if admin_event.user_id})
+                    for admin_event in events:
+                        data = json.loads(admin_event.payload)
+                        if admin_event.user_id:
+                            data["user_id"] = str(admin_event.user_id)
+                            data["row"] = rows.get(admin_event.user_id)
+                        yield format_event(admin_event.id, admin_event.type, data)  # type: ignore[bad-argument-type]
+                    after = events[-1].id
+                    last_sent = time.monotonic()
+                await session.close()
+
+                idle = time.monotonic() - last_sent
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=max(0.0, min(poll_seconds, heartbeat_seconds - idle)))
+                except TimeoutError:
+                    pass
+                if time.monotonic() - last_sent >= heartbeat_seconds:
+                    yield ": ping\n\n"
+                    last_sent = time.monotonic()
+        finally:
+            with _waiters_lock:
+                _waiters.discard(waiter)
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _publish(session):
+    if session.info.pop("admin_events", False):
+        AdminEvents.notify()
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _discard(session):
+    session.info.pop("admin_events", None)
@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import asyncio
+import zlib
+from typing import AsyncIterator
+
+import orjson
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.user import DiscordModel, EthicsFormModel, MembershipHistoryModel, PaymentModel, UserModel
+
+EXPORT_BATCH_SIZE = 1000
+
+# Sections in export order: parents before the rows that point at them.
+EXPORT_SECTIONS = (
+    ("users", UserModel),
+    ("discord", DiscordModel),
+    ("ethics_forms", EthicsFormModel),
+    ("membership_history", MembershipHistoryModel),
+    ("payments", PaymentModel),
+)
+
+# wbits 16 + 15: zlib's deflate with a gzip header and trailer.
+GZIP_WBITS = 31
+
+
+async def export_ndjson_gz(session: AsyncSession, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    Every row of every table in EXPORT_SECTIONS as gzip-compressed NDJSON.
+
+    Each section starts with a {"section": ..., "columns": [...]} line,
+    followed by one JSON object per row with every column. Datetimes are
+    stored naive in UTC and written with +00:00.
+
+    Rows come off a server-side cursor batch_size at a time, and each batch
+    is compressed in a worker thread (zlib releases the GIL) before the
+    compressed bytes are yielded. Memory stays flat however large the
+    tables are, and the event loop stays free.
+
+    Every section is read in one transaction, so the export is a consistent
+    snapshot: a row committed mid-export is in all of it or none of it.
+    pysqlite only opens a transaction ahead of a write, leaving each SELECT
+    its own snapshot, so on SQLite the read transaction is begun explicitly.
+    Other backends read at REPEATABLE READ, since READ COMMITTED takes a new
+    snapshot per statement too.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        connection = await session.connection()
+        await connection.exec_driver_sql("BEGIN")
+    else:
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS)
+    for section, model in EXPORT_SECTIONS:
+        table = model.__table__  # type: ignore[attr-defined]
+        columns = [column.name for column in table.columns]
+        header = orjson.dumps({"section": section, "columns": columns}) + b"\n"
+        if chunk := compressor.compress(header):
+            yield chunk
+
+        statement = select(table).order_by(*table.primary_key.columns).execution_options(yield_per=batch_size)
+        result = await session.stream(statement)
+        async for batch in result.partitions():
+            lines = b"".join(orjson.dumps(dict(zip(columns, row)), option=orjson.OPT_NAIVE_UTC) + b"\n" for row in batch)
+            if chunk := await asyncio.to_thread(compressor.compress, lines):
+                yield chunk
+    yield compressor.flush()
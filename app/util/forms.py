@@ -3,11 +3,94 @@
 import json
 import logging
 import os
+import threading
+import time
 from pathlib import Path
-from typing import DefaultDict
+from types import MappingProxyType
+from typing import Any, Callable, DefaultDict
+
+import orjson
+from pydantic import BaseModel
+
+from app.util.kennelish import Kennelish, KennelishPlan, Transformer
 
 logger = logging.getLogger(__name__)
 
+FORMS_DIR = "app/forms"
+
+
+class FormCacheStats:
+    """Hit and build counters for one kind of compiled form artifact."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+        self.build_total = 0.0
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_build(self, took: float):
+        with self._lock:
+            self.builds += 1
+            self.build_total += took
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "builds": self.builds,
+                "build_ms_total": round(self.build_total * 1000, 3),
+                "build_ms_avg": round(self.build_total * 1000 / self.builds, 3) if self.builds else 0.0,
+            }
+
+
+def freeze(value):
+    """A read-only copy of parsed JSON: objects become mapping proxies and arrays tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class FormEntry:
+    """
+    One form file as loaded into the registry, with everything built from it.
+
+    body is frozen, since every request shares it. The plan and validator are
+    built from a private copy on first use, then kept.
+    """
+
+    __slots__ = ("path", "version", "body", "json", "_source", "_built")
+
+    def __init__(self, path: Path, version: tuple[int, int], source: bytes):
+        self.path = path
+        self.version = version
+        self._source = source
+        parsed = json.loads(source)
+        self.body = freeze(parsed)
+        # What GET /api/form/{num} has always sent: the body re-serialized compactly.
+        self.json = orjson.dumps(parsed)
+        self._built: dict[str, Any] = {}
+
+    def built(self, kind: str, build: Callable[[Any], Any]):
+        if kind in self._built:
+            _stats[kind].record_hit()
+            return self._built[kind]
+        start = time.perf_counter()
+        self._built[kind] = build(json.loads(self._source))
+        _stats[kind].record_build(time.perf_counter() - start)
+        return self._built[kind]
+
+
+# The registry: loaded forms by name. Only names that passed the
+# resolve_within check in Forms.get_form_path are ever added.
+_forms: dict[str, FormEntry] = {}
+_stats = {"form": FormCacheStats(), "plan": FormCacheStats(), "validator": FormCacheStats(), "prefill": FormCacheStats()}
+
 
 def resolve_within(user_path: str, allowed_dir: str) -> Path | None:
     """Resolve user_path once and return it only if it's inside allowed_dir."""
@@ -21,18 +104,104 @@ def resolve_within(user_path: str, allowed_dir: str) -> Path | None:
 
 
 class Forms:
+    """
+    Form files, served from an in-memory registry.
+
+    Each form is read and parsed once. After that a lookup costs one stat() of
+    its file, and the file is read again only when its mtime or size changes,
+    so edits to app/forms apply without a restart. Unknown names and changed
+    files always go back through get_form_path.
+    """
+
     @staticmethod
-    def get_form_body(file="1"):
-        candidate = os.path.join(os.getcwd(), "app/forms", f"{Path(file).name}.json")
-        safe_path = resolve_within(candidate, "app/forms")
+    def get_form_path(file="1") -> Path:
+        candidate = os.path.join(os.getcwd(), FORMS_DIR, f"{Path(file).name}.json")
+        safe_path = resolve_within(candidate, FORMS_DIR)
         if safe_path is None:
             logger.error("attempted to access unauthorized paths")
             raise PermissionError("Access to the specified file is not allowed")
-        try:
-            with open(safe_path, "r") as form_file:
-                return json.load(form_file)
-        except FileNotFoundError:
-            raise FileNotFoundError
+        return safe_path
+
+    @staticmethod
+    def get_form(file="1") -> FormEntry:
+        """The registry entry for a form, loading or reloading it as needed. Raises FileNotFoundError if there is no such form."""
+        name = Path(file).name
+        entry = _forms.get(name)
+        if entry is not None:
+            try:
+                stat = os.stat(entry.path)
+            except FileNotFoundError:
+                _forms.pop(name, None)
+                raise
+            if (stat.st_mtime_ns, stat.st_size) == entry.version:
+                _stats["form"].record_hit()
+                return entry
+
+        start = time.perf_counter()
+        safe_path = Forms.get_form_path(name)
+        with open(safe_path, "rb") as form_file:
+            stat = os.fstat(form_file.fileno())
+            entry = FormEntry(safe_path, (stat.st_mtime_ns, stat.st_size), form_file.read())
+        _forms[name] = entry
+        _stats["form"].record_build(time.perf_counter() - start)
+        return entry
+
+    @staticmethod
+    def get_form_version(file="1") -> tuple[int, int]:
+        """(mtime_ns, size) of a form file: changes whenever the file does."""
+        return Forms.get_form(file).version
+
+    @staticmethod
+    def get_form_body(file="1"):
+        """The parsed form, frozen (see freeze)."""
+        return Forms.get_form(file).body
+
+    @staticmethod
+    def get_form_plan(file="1") -> KennelishPlan:
+        """The form compiled by Kennelish.compile."""
+        return Forms.get_form(file).built("plan", Kennelish.compile)
+
+    @staticmethod
+    def get_form_validator(file="1") -> type[BaseModel]:
+        """The form's Transformer.kennelish_to_pydantic model."""
+        return Forms.get_form(file).built("validator", Transformer.kennelish_to_pydantic)
+
+    @staticmethod
+    def get_form_prefill_keys(file="1") -> frozenset[str]:
+        """The user fields the form prefills from (see Kennelish.prefill_keys)."""
+        return Forms.get_form(file).built("prefill", Kennelish.prefill_keys)
+
+    @staticmethod
+    def preload() -> int:
+        """
+        Load every form and build everything get_form_* serves up front, so no
+        request pays for it. A form that fails is logged and skipped; requests
+        for it fail as they would have anyway. Returns the number of forms loaded.
+        """
+        loaded = 0
+        for path in sorted(Path(FORMS_DIR).glob("*.json")):
+            try:
+                Forms.get_form_plan(path.stem)
+                Forms.get_form_validator(path.stem)
+                Forms.get_form_prefill_keys(path.stem)
+                loaded += 1
+            except Exception:
+                logger.exception(f"Could not preload form {path.stem}")
+        return loaded
+
+    @staticmethod
+    def cache_stats() -> dict:
+        """
+        Hit and build counters for this worker: "form" counts registry lookups
+        and file loads, "plan", "validator" and "prefill" what was built from them.
+        "cached" is how many of each are held right now.
+        """
+        entries = list(_forms.values())
+        cached = {"form": len(entries), "plan": 0, "validator": 0, "prefill": 0}
+        for entry in entries:
+            for kind in entry._built:
+                cached[kind] += 1
+        return {kind: {**stats.snapshot(), "cached": cached[kind]} for kind, stats in _stats.items()}
 
 
 def fuzzy_parse_value(value):
@@ -61,6 +61,72 @@ class Kennelish:
 
         return output
 
+    def compile(obj):
+        """
+        Compile a form into a KennelishPlan, whose render(user_data) returns
+        exactly what parse(obj, user_data) does.
+
+        Everything that depends only on the form is rendered here, once.
+        What is left for render is one slot per prefilled element: the
+        escaped value dropped into a pre-rendered template (text, signature),
+        or a lookup among the element's pre-rendered variants, one per
+        option (radio, dropdown, slider).
+        """
+        return KennelishPlan(Kennelish._compile(obj))
+
+    def _compile(obj):
+        parts = []
+        for entry in obj:
+            try:
+                parts += Kennelish._compile_entry(entry)
+            except Exception as e:
+                logger.exception(e)
+                parts.append(Kennelish.invalid({"input": "Malformed object"}))
+        return parts
+
+    def _compile_entry(entry):
+        kind = entry["input"]
+        if kind in ("h1", "h2", "h3", "p"):
+            return [f"<{kind}>{entry.get('label', '')}</{kind}>", *Kennelish._compile(entry.get("elements", []))]
+        if kind in ("email", "nid", "text", "radio", "dropdown", "slider") and not entry.get("prefill", True):
+            # Nothing to prefill: the same output for everyone.
+            return [Kennelish.parse([entry])]
+        if kind in ("email", "nid", "text"):
+            return [_Template(entry, lambda prefill: Kennelish.text_input(entry, prefill, kind), lambda user_data: escape(str(Kennelish.text_prefill(entry, user_data))))]
+        if kind == "signature":
+            return [_Template(entry, lambda name: Kennelish.signature_input(entry, name), Kennelish.signature_name)]
+        if kind == "radio":
+            return [_Choice(lambda prefill: Kennelish.radio_input(entry, prefill), lambda user_data: Kennelish.radio_prefill(entry, user_data), entry["options"])]
+        if kind == "dropdown":
+            return [_Choice(lambda prefill: Kennelish.dropdown_input(entry, prefill), lambda user_data: Kennelish.dropdown_prefill(entry, user_data), [*entry.get("options"), "_default"])]
+        if kind == "slider":
+            return [_Choice(lambda prefill: Kennelish.slider_input(entry, prefill), lambda user_data: Kennelish.slider_prefill(entry, user_data), range(1, 6))]
+        # Checkboxes, navigation and unknown inputs never look at user data.
+        return [Kennelish.parse([entry])]
+
+    def prefill_keys(obj):
+        """
+        The user_data keys parse(obj, user_data) reads, for sending a client
+        just enough to render the form itself. Entries parse would reject are
+        skipped; they render the same without user data.
+        """
+        keys = set()
+        for entry in obj:
+            if not isinstance(entry, dict):
+                continue
+            kind = entry.get("input")
+            if kind in ("h1", "h2", "h3", "p") and isinstance(entry.get("elements"), list):
+                keys |= Kennelish.prefill_keys(entry["elements"])
+            elif kind == "signature":
+                keys |= {"first_name", "surname", "id"}
+            elif kind in ("email", "nid", "text", "radio", "dropdown", "slider") and entry.get("prefill", True):
+                key = entry.get("key", "")
+                if isinstance(key, str):
+                    keys.add(key)
+                if key == "email":
+                    keys.add("discord")
+        return frozenset(keys)
+
     def label(entry, innerHtml):
         # Labels and captions are admin-controlled, don't escape (may contain HTML links)
         text = f"<h3>{entry.get('label', '')}</h3>"
@@ -74,13 +140,22 @@ class Kennelish:
         return output
 
     def signature(entry, user_data=None):
+        return Kennelish.signature_input(entry, Kennelish.signature_name(user_data))
+
+    def signature_name(user_data=None):
         first = escape(user_data.get("first_name", "HackUCF Member #" + str(user_data.get("id"))))
         last = escape(user_data.get("surname", ""))
+        return f"{first} {last}"
+
+    def signature_input(entry, name):
         key = escape(entry.get("key", ""))
-        output = f"<div name='{key}' class='signature'>By submitting this form, you, {first} {last}, agree to the above terms. This form will be time-stamped. By submitting this form, you acknowledge that your submission constitutes a digital signature, which is legally binding and has the same effect as your handwritten signature. This digital signature confirms your consent to the terms and conditions outlined in this document and your agreement to conduct this transaction electronically.</div>"
+        output = f"<div name='{key}' class='signature'>By submitting this form, you, {name}, agree to the above terms. This form will be time-stamped. By submitting this form, you acknowledge that your submission constitutes a digital signature, which is legally binding and has the same effect as your handwritten signature. This digital signature confirms your consent to the terms and conditions outlined in this document and your agreement to conduct this transaction electronically.</div>"
         return output
 
     def text(entry, user_data=None, inp_type="text"):
+        return Kennelish.text_input(entry, Kennelish.text_prefill(entry, user_data), inp_type)
+
+    def text_prefill(entry, user_data=None):
         # Pre-filling of data from database (+ special rule for email discovery)
         if entry.get("prefill", True):
             key = entry.get("key", "")
@@ -96,7 +171,9 @@ class Kennelish:
                 prefill = ""
         else:
             prefill = ""
+        return prefill
 
+    def text_input(entry, prefill, inp_type="text"):
         regex_pattern = " "
         if inp_type == "email" and entry.get("domain", False):
             regex_pattern = ' pattern="([A-Za-z0-9.-_+]+)@' + escape(entry.get("domain")) + '"'
@@ -111,6 +188,9 @@ class Kennelish:
         return Kennelish.label(entry, output)
 
     def radio(entry, user_data=None):
+        return Kennelish.radio_input(entry, Kennelish.radio_prefill(entry, user_data))
+
+    def radio_prefill(entry, user_data=None):
         # Pre-filling of data from database
         if entry.get("prefill", True):
             prefill = user_data.get(entry.get("key", ""), "")
@@ -120,7 +200,9 @@ class Kennelish:
                 prefill = "No"
         else:
             prefill = ""
+        return prefill
 
+    def radio_input(entry, prefill):
         # Escape keys in attributes, but options are admin config (don't escape in label text)
         key = escape(entry.get("key", ""))
         key_id = entry.get("key", "").replace(".", "_").replace(" ", "_")
@@ -154,6 +236,9 @@ class Kennelish:
         return Kennelish.label(entry, output)
 
     def dropdown(entry, user_data=None):
+        return Kennelish.dropdown_input(entry, Kennelish.dropdown_prefill(entry, user_data))
+
+    def dropdown_prefill(entry, user_data=None):
         # Pre-filling of data from database
         if entry.get("prefill", True):
             prefill = user_data.get(entry.get("key", ""), "_default")
@@ -161,7 +246,9 @@ class Kennelish:
                 prefill = "_default"
         else:
             prefill = "_default"
+        return prefill
 
+    def dropdown_input(entry, prefill):
         # Escape keys in attributes, but options are admin config (don't escape in option text)
         key = escape(entry.get("key", ""))
         key_id = entry.get("key", "").replace(".", "_").replace(" ", "_")
@@ -179,13 +266,17 @@ class Kennelish:
 
     def slider(entry, user_data=None):
         # This is pretty much radio, but modified.
+        return Kennelish.slider_input(entry, Kennelish.slider_prefill(entry, user_data))
 
+    def slider_prefill(entry, user_data=None):
         # Pre-filling of data from database
         if entry.get("prefill", True):
             prefill = user_data.get(entry.get("key", ""), "")
         else:
             prefill = ""
+        return prefill
 
+    def slider_input(entry, prefill):
         # Labels are admin config, but in content so don't escape
         novice_label = entry.get("novice_label", "Novice")
         expert_label = entry.get("expert_label", "Expert")
@@ -219,6 +310,93 @@ class Kennelish:
         return f"<h3 class='invalid'>Invalid Input: {escape(str(entry.get('input', 'Unknown')))}</h3>"
 
 
+# Stands in for the prefill value while a template is rendered; cannot come
+# out of escape() changed, and no form has a reason to contain it.
+SLOT = "\x00kennelish-slot\x00"
+
+
+class _NoMatch:
+    """A prefill value equal to no option."""
+
+    def __eq__(self, other):
+        return False
+
+    __hash__ = object.__hash__
+
+
+class _Template:
+    """An element whose output is fixed but for one escaped value."""
+
+    __slots__ = ("entry", "prefix", "suffix", "value")
+
+    def __init__(self, entry, render, value):
+        self.entry = entry
+        self.value = value
+        pieces = render(SLOT).split(SLOT)
+        # Only a form that contains SLOT itself splits any other way.
+        self.prefix, self.suffix = pieces if len(pieces) == 2 else (None, None)
+
+    def __call__(self, user_data):
+        if self.prefix is None:
+            return Kennelish.parse([self.entry], user_data)
+        return self.prefix + self.value(user_data) + self.suffix
+
+
+class _Choice:
+    """An element whose output depends on which of its choices the prefill value equals."""
+
+    __slots__ = ("render", "value", "variants", "fallback")
+
+    def __init__(self, render, value, choices):
+        self.render = render
+        self.value = value
+        self.fallback = render(_NoMatch())
+        try:
+            self.variants = {choice: render(choice) for choice in choices}
+        except TypeError:
+            # An unhashable option: every render goes the long way.
+            self.variants = None
+
+    def __call__(self, user_data):
+        prefill = self.value(user_data)
+        if self.variants is not None:
+            try:
+                return self.variants.get(prefill, self.fallback)
+            except TypeError:
+                # An unhashable prefill value, which no option can equal.
+                pass
+        return self.render(prefill)
+
+
+class KennelishPlan:
+    """A compiled form; see Kennelish.compile."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts):
+        # Adjacent static fragments are joined, leaving strings and slots alternating.
+        merged = []
+        for part in parts:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            else:
+                merged.append(part)
+        self.parts = tuple(merged)
+
+    def render(self, user_data=None):
+        output = []
+        for part in self.parts:
+            if part.__class__ is str:
+                output.append(part)
+                continue
+            try:
+                output.append(part(user_data))
+            except Exception as e:
+                logger.exception(e)
+                output.append(Kennelish.invalid({"input": "Malformed object"}))
+        return "".join(output)
+
+
 class Transformer:
     """
     Transforms a Kennelish file into a Pydantic model for validation.
@@ -3,16 +3,23 @@
 import logging
 import uuid
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Callable, List, Optional, Sequence
 
-from sqlalchemy import func
+from sqlalchemy import DateTime, func, insert, literal, or_, update
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
-from app.models.user import MembershipHistoryModel, UserModel
+from app.models.user import DiscordModel, MembershipHistoryModel, UserModel
+from app.util.dataversion import DataVersion
 
 logger = logging.getLogger(__name__)
 
+# Users archived and reset per transaction by reset_all_memberships.
+RESET_CHUNK_SIZE = 500
+
+# get_reset_summary's last result, as (history data version, summary).
+_summary_cache: Optional[tuple[int, dict]] = None
+
 
 class MembershipReset:
     """
@@ -48,77 +55,83 @@ class MembershipReset:
         session: Session,
         reset_reason: str = "Annual membership reset",
         admin_user_id: Optional[uuid.UUID] = None,
+        chunk_size: int = RESET_CHUNK_SIZE,
+        progress: Optional[Callable[[int, int], None]] = None,
     ) -> dict:
         """
         Reset all user memberships and archive their current membership data to history.
 
+        Works through users in chunks of chunk_size, ordered by id. Each chunk is
+        one INSERT ... SELECT into the history table and two UPDATEs, committed
+        on its own, so the write lock is held per chunk rather than for the
+        whole roster and no user is loaded into the ORM.
+
+        A chunk that fails is rolled back and the reset stops there, returning
+        success False with the failed chunk's id range in failed_chunk and
+        partial True if earlier chunks had already committed. Running the
+        reset again resumes it: users already reset are no longer members, so
+        they are not archived twice.
+
         Args:
             session: SQLModel database session
             reset_reason: Reason for the reset (stored in history)
             admin_user_id: UUID of admin performing the reset (for logging)
+            chunk_size: Users handled per transaction
+            progress: Called as progress(users_done, users_total) after each chunk
 
         Returns:
             dict: Summary of the reset operation
         """
         try:
-            # Get all users with their Discord data for snapshots
-            statement = select(UserModel).options(selectinload(UserModel.discord))  # type: ignore[bad-argument-type]
-            users = session.exec(statement).all()
+            reset_date = datetime.now(timezone.utc)
+            total = session.exec(select(func.count()).select_from(UserModel)).one()
 
             reset_count = 0
             archived_count = 0
-            errors = []
+            last_id = None
 
-            for user in users:
-                try:
-                    # Only archive and reset if user was a member
-                    if user.is_full_member or user.did_pay_dues:
-                        # Create historical record
-                        history_record = MembershipHistoryModel(
-                            user_id=user.id,
-                            reset_date=datetime.now(timezone.utc),
-                            was_full_member=user.is_full_member,
-                            had_paid_dues=user.did_pay_dues,
-                            original_join_date=user.join_date,
-                            could_vote=user.can_vote,
-                            reset_reason=reset_reason,
-                            first_name_snapshot=user.first_name or "",
-                            surname_snapshot=user.surname or "",
-                            email_snapshot=user.email or "",
-                            discord_username_snapshot=user.discord.username if user.discord else "",
-                        )
-                        user.is_returning = True
-                        user.renewal = True
-                        user.did_get_shirt = False
-                        session.add(history_record)
-                        archived_count += 1
-
-                    # Reset membership fields (for all users, not just members)
-                    user.is_full_member = False
-                    user.did_pay_dues = False
-                    user.can_vote = False
-                    user.join_date = None
-
-                    # Note: We don't reset personal info, Discord connections, etc.
-
-                    reset_count += 1
+            while True:
+                statement = select(UserModel.id).order_by(UserModel.id).limit(chunk_size)  # type: ignore[bad-argument-type]
+                if last_id is not None:
+                    statement = statement.where(UserModel.id > last_id)
+                ids = session.exec(statement).all()
+                if not ids:
+                    break
+                last_id = ids[-1]
 
+                try:
+                    archived_count += MembershipReset._reset_chunk(session, ids, reset_date, reset_reason)
+                    session.commit()
+                    reset_count += len(ids)
                 except Exception as e:
-                    logger.error(f"Error resetting membership for user {user.id}: {str(e)}")
-                    errors.append(f"User {user.id}: {str(e)}")
-                    continue
+                    session.rollback()
+                    logger.error(f"Membership reset stopped at users {ids[0]}..{ids[-1]} after {reset_count}/{total} users: {str(e)}")
+                    return {
+                        "success": False,
+                        "partial": reset_count > 0,
+                        "error": f"Reset stopped after {reset_count} of {total} users; run it again to resume. Users {ids[0]}..{ids[-1]}: {str(e)}",
+                        "failed_chunk": {"first_id": str(ids[0]), "last_id": str(ids[-1])},
+                        "reset_count": reset_count,
+                        "archived_count": archived_count,
+                        "errors": [f"Users {ids[0]}..{ids[-1]}: {str(e)}"],
+                        "reset_date": reset_date.isoformat(),
+                        "admin_user_id": str(admin_user_id) if admin_user_id else None,
+                        "reset_reason": reset_reason,
+                    }
 
-            # Commit all changes
-            session.commit()
+                logger.info(f"Membership reset progress: {reset_count}/{total} users reset, {archived_count} archived")
+                if progress is not None:
+                    progress(reset_count, total)
 
-            logger.info(f"Membership reset completed. Reset: {reset_count}, Archived: {archived_count}, Errors: {len(errors)}")
+            logger.info(f"Membership reset completed. Reset: {reset_count}, Archived: {archived_count}")
 
             return {
                 "success": True,
+                "partial": False,
                 "reset_count": reset_count,
                 "archived_count": archived_count,
-                "errors": errors,
-                "reset_date": datetime.now(timezone.utc).isoformat(),
+                "errors": [],
+                "reset_date": reset_date.isoformat(),
                 "admin_user_id": str(admin_user_id) if admin_user_id else None,
                 "reset_reason": reset_reason,
             }
@@ -133,6 +146,57 @@ class MembershipReset:
                 "archived_count": 0,
             }
 
+    @staticmethod
+    def _reset_chunk(session: Session, ids: Sequence[uuid.UUID], reset_date: datetime, reset_reason: str) -> int:
+        """
+        Archive and reset one chunk of users without committing. Returns how many were archived.
+        """
+        in_chunk = UserModel.id.in_(ids)  # type: ignore[union-attr]
+        # Only members (or those who paid) get a history row and the returning flags.
+        was_member = or_(UserModel.is_full_member.is_(True), UserModel.did_pay_dues.is_(True))  # type: ignore[union-attr]
+
+        snapshot = (
+            select(
+                UserModel.id,
+                literal(reset_date, DateTime),
+                UserModel.is_full_member,
+                UserModel.did_pay_dues,
+                UserModel.join_date,
+                UserModel.can_vote,
+                literal(reset_reason),
+                func.coalesce(UserModel.first_name, ""),
+                func.coalesce(UserModel.surname, ""),
+                func.coalesce(UserModel.email, ""),
+                func.coalesce(DiscordModel.username, ""),
+            )
+            .outerjoin(DiscordModel, DiscordModel.user_id == UserModel.id)  # type: ignore[bad-argument-type]
+            .where(in_chunk, was_member)
+        )
+        archived = session.exec(
+            insert(MembershipHistoryModel).from_select(
+                [
+                    "user_id",
+                    "reset_date",
+                    "was_full_member",
+                    "had_paid_dues",
+                    "original_join_date",
+                    "could_vote",
+                    "reset_reason",
+                    "first_name_snapshot",
+                    "surname_snapshot",
+                    "email_snapshot",
+                    "discord_username_snapshot",
+                ],
+                snapshot,
+            )
+        ).rowcount
+
+        session.exec(update(UserModel).where(in_chunk, was_member).values(is_returning=True, renewal=True, did_get_shirt=False).execution_options(synchronize_session=False))
+        # Reset membership fields (for all users, not just members). Personal
+        # info and Discord connections are left alone.
+        session.exec(update(UserModel).where(in_chunk).values(is_full_member=False, did_pay_dues=False, can_vote=False, join_date=None).execution_options(synchronize_session=False))
+        return archived
+
     @staticmethod
     def get_membership_history(
         session: Session,
@@ -190,36 +254,41 @@ class MembershipReset:
         """
         Get summary statistics about membership resets.
 
+        Aggregated in SQL and cached in-process, keyed by the "history" data
+        version. Every insert, update or delete of a history row bumps it in
+        the same transaction, whichever worker made it, so a cached summary is
+        never served after the rows change.
+
         Args:
             session: SQLModel database session
 
         Returns:
             dict: Summary statistics
         """
+        global _summary_cache
         try:
-            # Count total resets
-            total_resets = session.exec(select(MembershipHistoryModel)).all()
-
-            # Count unique users affected
-            unique_users = set()
-            reset_dates = set()
-
-            for record in total_resets:
-                unique_users.add(record.user_id)
-                reset_dates.add(record.reset_date.date())
-
-            # Get most recent reset
-            most_recent_reset = None
-            if total_resets:
-                most_recent = max(total_resets, key=lambda x: x.reset_date)
-                most_recent_reset = most_recent.reset_date.isoformat()
-
-            return {
-                "total_reset_records": len(total_resets),
-                "unique_users_affected": len(unique_users),
-                "number_of_reset_events": len(reset_dates),
-                "most_recent_reset": most_recent_reset,
+            version = DataVersion.current(session, "history")
+            cached = _summary_cache
+            if cached is not None and cached[0] == version:
+                return dict(cached[1])
+
+            total, unique_users, reset_events, most_recent = session.exec(
+                select(
+                    func.count(),
+                    func.count(func.distinct(MembershipHistoryModel.user_id)),
+                    func.count(func.distinct(func.date(MembershipHistoryModel.reset_date))),
+                    func.max(MembershipHistoryModel.reset_date),
+                ).select_from(MembershipHistoryModel)
+            ).one()
+
+            summary = {
+                "total_reset_records": total,
+                "unique_users_affected": unique_users,
+                "number_of_reset_events": reset_events,
+                "most_recent_reset": most_recent.isoformat() if most_recent else None,
             }
+            _summary_cache = (version, summary)
+            return dict(summary)
 
         except Exception as e:
             logger.error(f"Error getting reset summary: {str(e)}")
@@ -230,6 +299,12 @@ class MembershipReset:
                 "most_recent_reset": None,
             }
 
+    @staticmethod
+    def invalidate_reset_summary() -> None:
+        """Drop the cached get_reset_summary result, for when the database itself is replaced."""
+        global _summary_cache
+        _summary_cache = None
+
     @staticmethod
     def restore_membership_from_history(
         session: Session,
@@ -0,0 +1,111 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func, tuple_
+from sqlmodel import Session, select
+
+from app.models.user import PaymentModel, UserModel
+from app.util.roster import encode_cursor
+
+
+def as_utc(value: datetime) -> datetime:
+    """value in UTC, the way created_at is stored. Naive values are taken to be UTC already."""
+    if value.utcoffset() is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """created_at and id of the last payment on the previous page. Raises ValueError if malformed."""
+    try:
+        created_at, payment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return as_utc(datetime.fromisoformat(created_at)), int(payment_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+def payment_to_dict(payment: PaymentModel, first_name: Optional[str], surname: Optional[str]) -> dict:
+    return {
+        "id": payment.id,
+        "user_id": str(payment.user_id),
+        "member_name": f"{first_name or ''} {surname or ''}".strip(),
+        "source": payment.source,
+        "checkout_session_id": payment.checkout_session_id,
+        "amount_cents": payment.amount_cents,
+        "currency": payment.currency,
+        "customer_email": payment.customer_email,
+        "recorded_by_admin_id": str(payment.recorded_by_admin_id) if payment.recorded_by_admin_id else None,
+        "note": payment.note,
+        "created_at": payment.created_at.isoformat(),
+    }
+
+
+class Payments:
+    """
+    Keyset-paginated dues payment history for the admin settings page.
+
+    Newest first, with the payment id breaking ties between rows recorded in
+    the same instant, so paging back through years of history stays as cheap
+    as the first page.
+    """
+
+    @staticmethod
+    def filters(
+        source: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        user_id: Optional[uuid.UUID] = None,
+        currency: Optional[str] = None,
+    ) -> list:
+        """
+        since is inclusive and until exclusive, so consecutive ranges never
+        double count. Either may carry any UTC offset, or none for UTC; they
+        are compared in UTC.
+        """
+        clauses = []
+        if source is not None:
+            clauses.append(PaymentModel.source == source)
+        if since is not None:
+            clauses.append(PaymentModel.created_at >= as_utc(since))
+        if until is not None:
+            clauses.append(PaymentModel.created_at < as_utc(until))
+        if user_id is not None:
+            clauses.append(PaymentModel.user_id == user_id)
+        if currency is not None:
+            clauses.append(func.lower(PaymentModel.currency) == currency.lower())
+        return clauses
+
+    @staticmethod
+    def page(session: Session, clauses: list, cursor: Optional[str] = None, limit: int = 50) -> tuple[list[dict], Optional[str]]:
+        """
+        One page of payments with member names joined in, and the cursor for the next page (None on the last page).
+        """
+        statement = (
+            select(PaymentModel, UserModel.first_name, UserModel.surname)
+            .outerjoin(UserModel, UserModel.id == PaymentModel.user_id)  # type: ignore[bad-argument-type]
+            .where(*clauses)
+        )
+        if cursor is not None:
+            statement = statement.where(tuple_(PaymentModel.created_at, PaymentModel.id) < tuple_(*decode_cursor(cursor)))
+        statement = statement.order_by(PaymentModel.created_at.desc(), PaymentModel.id.desc()).limit(limit + 1)  # type: ignore[union-attr]
+
+        rows = session.exec(statement).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][0]
+            next_cursor = encode_cursor([last.created_at.isoformat(), last.id])
+
+        return [payment_to_dict(payment, first_name, surname) for payment, first_name, surname in rows], next_cursor
+
+    @staticmethod
+    def summary(session: Session, clauses: list) -> dict:
+        """Matching payments and their total amount in cents, in one aggregate query."""
+        statement = select(func.count(), func.coalesce(func.sum(PaymentModel.amount_cents), 0)).select_from(PaymentModel).where(*clauses)
+        count, total_cents = session.exec(statement).one()
+        return {"count": count, "total_cents": total_cents}
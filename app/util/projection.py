@@ -0,0 +1,51 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+from typing import Optional
+
+from sqlalchemy.orm import load_only, selectinload
+
+from app.models.user import DiscordModel, EthicsFormModel, UserModel
+
+# Relationships a projection can reach into, and the model behind each.
+RELATIONSHIPS = {"discord": DiscordModel, "ethics_form": EthicsFormModel}
+
+
+def user_load_options(fields: Optional[str]) -> list:
+    """
+    Loader options for the users a fields= projection asks for.
+
+    fields is comma separated: user columns by name, relationship columns as
+    discord.username or ethics_form.signtime, or a whole relationship as
+    discord.*. Relationships are only loaded when something in them is
+    requested, and then only the requested columns. The primary keys are
+    always loaded. With no projection, every column and both relationships
+    load, as before.
+
+    Raises ValueError naming the first field that does not exist.
+    """
+    if not fields:
+        return [selectinload(UserModel.discord), selectinload(UserModel.ethics_form)]  # type: ignore[bad-argument-type]
+
+    columns: list[str] = []
+    related: dict[str, Optional[list[str]]] = {}
+    for field in filter(None, (part.strip() for part in fields.split(","))):
+        name, _, column = field.partition(".")
+        if not column:
+            if name not in UserModel.model_fields:
+                raise ValueError(f"Unknown field {field!r}")
+            columns.append(name)
+        elif name in RELATIONSHIPS and (column == "*" or column in RELATIONSHIPS[name].model_fields):
+            if column == "*":
+                related[name] = None
+            elif related.get(name, []) is not None:
+                related.setdefault(name, []).append(column)  # type: ignore[union-attr]
+        else:
+            raise ValueError(f"Unknown field {field!r}")
+
+    options = [load_only(*(getattr(UserModel, name) for name in columns or ["id"]))]
+    for name, related_columns in related.items():
+        loader = selectinload(getattr(UserModel, name))
+        if related_columns is not None:
+            loader = loader.load_only(*(getattr(RELATIONSHIPS[name], column) for column in related_columns))
+        options.append(loader)
+    return options
@@ -0,0 +1,19 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson, the application's default response class.
+
+    FastAPI's own ORJSONResponse is deprecated in favour of response models;
+    routes that declare one still bypass this class (see app.main), and every
+    route that returns a plain dict gets orjson instead of stdlib json.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,231 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import base64
+import json
+import re
+import uuid
+from typing import Literal, Optional, Sequence
+
+from sqlalchemy import case, column, func, literal_column, table, text, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.user import DiscordModel, EthicsFormModel, UserModel
+
+# Roster statuses in display order. A user's status is the first one that
+# applies, the same precedence the admin page has always used.
+STATUSES = ("admin", "ops", "member", "needs_dues", "needs_ethics", "attendee")
+
+RosterStatus = Literal["admin", "ops", "member", "needs_dues", "needs_ethics", "attendee"]
+RosterSort = Literal["name", "nid", "email", "discord", "major", "class_standing", "experience", "status"]
+
+# One signtime per user; nothing keeps a user to a single ethics form row.
+ethics_signtime = select(EthicsFormModel.signtime).where(EthicsFormModel.user_id == UserModel.id).limit(1).scalar_subquery()
+
+# Index into STATUSES. Unset booleans count as false, as they do in the browser.
+status_rank = case(
+    (UserModel.sudo.is_(True), 0),  # type: ignore[union-attr]
+    (func.coalesce(UserModel.ops_email, "") != "", 1),
+    (UserModel.is_full_member.is_(True), 2),  # type: ignore[union-attr]
+    (UserModel.did_pay_dues.is_not(True), 3),  # type: ignore[union-attr]
+    (func.coalesce(ethics_signtime, 0) == 0, 4),
+    else_=5,
+)
+
+# Columns each sort key orders by. NULLs are folded into a concrete value,
+# since a NULL in a row-value comparison would drop rows from the next page.
+SORT_KEYS = {
+    "name": (func.lower(func.coalesce(UserModel.first_name, "")), func.lower(func.coalesce(UserModel.surname, ""))),
+    "nid": (func.coalesce(UserModel.nid, ""),),
+    "email": (func.lower(func.coalesce(UserModel.email, "")),),
+    "discord": (func.lower(func.coalesce(DiscordModel.username, "")),),
+    "major": (func.coalesce(UserModel.major, ""),),
+    "class_standing": (func.coalesce(UserModel.class_standing, ""),),
+    "experience": (func.coalesce(UserModel.experience, 0),),
+    "status": (status_rank,),
+}
+
+
+# What a roster row carries: enough for the table, not the whole user.
+ROW_COLUMNS = (
+    UserModel.id,
+    UserModel.first_name,
+    UserModel.surname,
+    UserModel.nid,
+    UserModel.email,
+    UserModel.experience,
+    UserModel.major,
+    UserModel.class_standing,
+    UserModel.is_full_member,
+    UserModel.did_pay_dues,
+    DiscordModel.username.label("discord_username"),  # type: ignore[attr-defined]
+    status_rank.label("status_rank"),
+)
+
+# The FTS5 index from app.models.search, which has no model of its own.
+membersearch = table("membersearch", column("user_id"))
+
+# bm25 weights per membersearch column: user_id, name, nid, discord, email, major.
+SEARCH_WEIGHTS = (0.0, 10.0, 10.0, 8.0, 5.0, 1.0)
+SEARCH_MAX_TERMS = 8
+
+
+def row_to_dict(row) -> dict:
+    fields = row._mapping
+    return {
+        "id": str(fields["id"]),
+        "first_name": fields["first_name"],
+        "surname": fields["surname"],
+        "nid": fields["nid"],
+        "email": fields["email"],
+        "experience": fields["experience"],
+        "major": fields["major"],
+        "class_standing": fields["class_standing"],
+        "is_full_member": bool(fields["is_full_member"]),
+        "did_pay_dues": bool(fields["did_pay_dues"]),
+        "discord_username": fields["discord_username"],
+        "status": STATUSES[fields["status_rank"]],
+    }
+
+
+def match_query(q: str) -> Optional[str]:
+    """
+    FTS5 MATCH expression for free text: every word as a quoted prefix term.
+
+    Quoting keeps FTS5 operators and column filters typed into the search box
+    from being interpreted. None when there is nothing to search for.
+    """
+    terms = re.findall(r"\w+", q)[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> list:
+    """Sort values and user id of the last row on the previous page. Raises ValueError if malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(SORT_KEYS[sort]) + 1:
+            raise ValueError("Cursor does not match sort")
+        values[-1] = uuid.UUID(str(values[-1]))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+    return values
+
+
+class Roster:
+    """
+    Keyset-paginated member roster for the admin page.
+
+    Pages are ordered by the sort key with the user id as a tiebreaker, and the
+    cursor carries the last row's key, so fetching page n costs the same as
+    page one and rows do not shift between pages when members sign up.
+    """
+
+    @staticmethod
+    def filters(
+        status: Optional[str] = None,
+        is_full_member: Optional[bool] = None,
+        did_pay_dues: Optional[bool] = None,
+        major: Optional[str] = None,
+        class_standing: Optional[str] = None,
+    ) -> list:
+        clauses = []
+        if status is not None:
+            clauses.append(status_rank == STATUSES.index(status))
+        if is_full_member is not None:
+            clauses.append(UserModel.is_full_member.is_(True) if is_full_member else UserModel.is_full_member.is_not(True))  # type: ignore[union-attr]
+        if did_pay_dues is not None:
+            clauses.append(UserModel.did_pay_dues.is_(True) if did_pay_dues else UserModel.did_pay_dues.is_not(True))  # type: ignore[union-attr]
+        if major is not None:
+            clauses.append(UserModel.major == major)
+        if class_standing is not None:
+            clauses.append(UserModel.class_standing == class_standing)
+        return clauses
+
+    @staticmethod
+    async def page(
+        session: AsyncSession,
+        clauses: list,
+        sort: str = "name",
+        descending: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        One page of lean roster rows and the cursor for the next page (None on the last page).
+        """
+        keys = SORT_KEYS[sort]
+        statement = (
+            select(*ROW_COLUMNS, *(key.label(f"sort_{i}") for i, key in enumerate(keys)))
+            .outerjoin(DiscordModel, DiscordModel.user_id == UserModel.id)  # type: ignore[bad-argument-type]
+            .where(*clauses)
+        )
+        if cursor is not None:
+            after = tuple_(*keys, UserModel.id)
+            last = tuple_(*decode_cursor(cursor, sort))
+            statement = statement.where(after < last if descending else after > last)
+        order = [*keys, UserModel.id]
+        statement = statement.order_by(*(column.desc() if descending else column for column in order)).limit(limit + 1)
+
+        rows = (await session.exec(statement)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_row = rows[-1]._mapping
+            next_cursor = encode_cursor([last_row[f"sort_{i}"] for i in range(len(keys))] + [str(last_row["id"])])
+
+        return [row_to_dict(row) for row in rows], next_cursor
+
+    @staticmethod
+    async def rows(session: AsyncSession, user_ids: set[uuid.UUID]) -> dict[uuid.UUID, dict]:
+        """Current roster rows for user_ids, keyed by id. Users that no longer exist are left out."""
+        if not user_ids:
+            return {}
+        statement = (
+            select(*ROW_COLUMNS)
+            .outerjoin(DiscordModel, DiscordModel.user_id == UserModel.id)  # type: ignore[bad-argument-type]
+            .where(UserModel.id.in_(user_ids))  # type: ignore[attr-defined]
+        )
+        return {row.id: row_to_dict(row) for row in (await session.exec(statement)).all()}
+
+    @staticmethod
+    async def search(session: AsyncSession, q: str, limit: int = 20, clauses: Sequence = ()) -> list[dict]:
+        """
+        Best matches for q from the membersearch FTS5 index, as roster rows,
+        among the users clauses (from filters) select.
+
+        Every word must prefix-match some field; name and NID hits rank above
+        email and major. SQLite only.
+        """
+        match = match_query(q)
+        if match is None:
+            return []
+        statement = (
+            select(*ROW_COLUMNS)
+            .select_from(membersearch)
+            .join(UserModel, UserModel.id == membersearch.c.user_id)
+            .outerjoin(DiscordModel, DiscordModel.user_id == UserModel.id)  # type: ignore[bad-argument-type]
+            .where(text("membersearch MATCH :match").bindparams(match=match), *clauses)
+            .order_by(func.bm25(literal_column("membersearch"), *SEARCH_WEIGHTS))
+            .limit(limit)
+        )
+        return [row_to_dict(row) for row in (await session.exec(statement)).all()]
+
+    @staticmethod
+    async def counts(session: AsyncSession, clauses: list) -> dict:
+        """Matching users and how many of them are full members, in one aggregate query."""
+        statement = (
+            select(
+                func.count(),
+                func.coalesce(func.sum(case((UserModel.is_full_member.is_(True), 1), else_=0)), 0),  # type: ignore[union-attr]
+            )
+            .select_from(UserModel)
+            .where(*clauses)
+        )
+        total, full_members = (await session.exec(statement)).one()
+        return {"total": total, "full_members": full_members}
@@ -6,7 +6,7 @@ import os
 import pathlib
 import re
 import subprocess
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 import yaml
 from joserfc.jwk import OctKey
@@ -368,8 +368,48 @@ class AppleWalletConfig(BaseModel):
 apple_wallet_config = AppleWalletConfig(**settings.get("apple_wallet", {}))
 
 
+class FormsConfig(BaseModel):
+    """
+    How /join/{num}/ renders Kennelish forms.
+
+    Attributes:
+        render (str): "server" renders the whole form with the user's data on
+            every request. "client" serves a cacheable page shell instead;
+            form.js fetches the form JSON and the user's prefill values and
+            renders it in the browser.
+    """
+
+    render: Literal["server", "client"] = Field("server")
+
+
+forms_config = FormsConfig(**settings.get("forms", {}))
+
+
 class DatabaseConfig(BaseModel):
+    """
+    Database connection settings.
+
+    Attributes:
+        url (str): SQLAlchemy database URL.
+        pool (str): Connection pool mode. "static" shares one connection per worker,
+            "thread" keeps one connection per thread, "queue" keeps a bounded pool
+            that requests check connections out of.
+        pool_size (int): Connections kept open by the "thread" and "queue" pools.
+        max_overflow (int): Extra connections the "queue" pool may open under load.
+        pool_timeout (float): Seconds to wait for a "queue" connection before failing.
+        async_url (Optional[str]): URL for the asyncio engine. Derived from url when unset,
+            e.g. sqlite:// becomes sqlite+aiosqlite://.
+        replica_url (Optional[str]): Read replica for admin reads and exports. SQLite
+            files need none; they are reopened read-only.
+    """
+
     url: str
+    pool: Literal["static", "thread", "queue"] = Field("static")
+    pool_size: int = Field(5, ge=1)
+    max_overflow: int = Field(10, ge=0)
+    pool_timeout: float = Field(30.0, gt=0)
+    async_url: Optional[str] = Field(None)
+    replica_url: Optional[str] = Field(None)
 
 
 if settings.get("database"):
@@ -459,6 +499,7 @@ class Settings(BaseSettings, metaclass=SingletonBaseSettingsMeta):
     google_wallet: GoogleWalletConfig = google_wallet_config
     telemetry: TelemetryConfig = telemetry_config
     apple_wallet: AppleWalletConfig = apple_wallet_config
+    forms: FormsConfig = forms_config
     security: SecurityConfig = security_config
     api_keys: List[ApiKeyConfig] = api_keys_config
     env: Optional[str] = onboard_env
@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Event loop latency while serving concurrent database-backed requests.
+
+Runs the /admin/list query two ways inside an `async def` handler: on a sync
+Session (what every handler did before get_async_session) and on an
+AsyncSession. A ticker coroutine asks to wake up every millisecond and records
+how late it actually ran; that lateness is how long any other request on the
+worker would have been stuck behind the database.
+
+    uv run python benchmarks/bench_event_loop.py --users 500 --requests 100 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("ONBOARD_ENV", "dev")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app.models.user import DiscordModel, EthicsFormModel, UserModel, user_to_dict  # noqa: E402
+from app.util.database import build_async_engine, build_engine  # noqa: E402
+from app.util.settings import DatabaseConfig  # noqa: E402
+
+TICK = 0.001
+
+
+def populate(engine, count: int):
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(count):
+            user = UserModel(id=uuid.uuid4(), discord_id=str(10**17 + i), first_name=f"First{i}", surname=f"Last{i}", email=f"user{i}@example.com")
+            user.discord = DiscordModel(email=f"user{i}@example.com", username=f"user{i}")
+            user.ethics_form = EthicsFormModel()
+            session.add(user)
+        session.commit()
+
+
+def build_app(engine, async_engine) -> FastAPI:
+    app = FastAPI()
+    statement = select(UserModel).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
+
+    @app.get("/sync")
+    async def list_sync():
+        with Session(engine) as session:
+            return {"data": [user_to_dict(user) for user in session.exec(statement)]}
+
+    @app.get("/async")
+    async def list_async():
+        async with AsyncSession(async_engine) as session:
+            return {"data": [user_to_dict(user) for user in await session.exec(statement)]}
+
+    return app
+
+
+async def ticker(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int) -> dict:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        tick = asyncio.create_task(ticker(lags, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await tick
+
+    lags.sort()
+    return {
+        "req_per_s": requests / elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if len(lags) > 1 else lags[0] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+        "ticks": len(lags),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = DatabaseConfig(url=f"sqlite:///{tmp}/bench.db", pool="queue", pool_size=args.concurrency)
+        engine = build_engine(config)
+        async_engine = build_async_engine(config, engine)
+        populate(engine, args.users)
+        app = build_app(engine, async_engine)
+
+        print(f"{args.users} users, {args.requests} requests, concurrency {args.concurrency}")
+        print(f"{'session':<8} {'req/s':>8} {'lag p50':>9} {'lag p99':>9} {'lag max':>9} {'ticks':>6}")
+        for name in ("sync", "async"):
+            result = asyncio.run(run(app, f"/{name}", args.requests, args.concurrency))
+            print(f"{name:<8} {result['req_per_s']:>8.1f} {result['lag_p50_ms']:>7.2f}ms {result['lag_p99_ms']:>7.2f}ms {result['lag_max_ms']:>7.2f}ms {result['ticks']:>6}")
+
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+The form pipeline, stage by stage, for every form in app/forms.
+
+Rendering (GET /join/{num}/):
+    parse       Kennelish.parse, the reference renderer
+    plan        KennelishPlan.render, what the route uses
+
+Submission (POST /api/form/{num}):
+    model       Transformer.kennelish_to_pydantic (cached per form in the app)
+    validate    model(**submission).model_dump()
+    fuzzy       apply_fuzzy_parsing
+    transform   transform_dict
+    update      user_update_instance on an unsaved UserModel
+
+Each stage runs on the previous stage's output for a set of synthetic users.
+It reports operations per second (best of --repeat passes) and, from a
+separate pass under tracemalloc, the peak memory one operation allocates and
+what it leaves allocated. Results are written as JSON; pass an earlier
+file as --baseline to see the change per stage, and --max-regression to
+fail when any stage slowed down by more than that many percent.
+
+    uv run python benchmarks/bench_forms.py --users 500 --repeat 5 --output bench_forms.json
+    uv run python benchmarks/bench_forms.py --baseline bench_forms.json --max-regression 15
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault("ONBOARD_ENV", "dev")
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.models.user import DiscordModel, EthicsFormModel, UserModel, user_to_dict, user_update_instance  # noqa: E402
+from app.util.forms import apply_fuzzy_parsing, transform_dict  # noqa: E402
+from app.util.kennelish import Kennelish, Transformer  # noqa: E402
+
+MAJORS = ["Computer Science", "Information Technology", "Computer Engineering", "Mathematics"]
+SHIRT_SIZES = ["S", "M", "L", "XL"]
+
+
+def make_users(count: int) -> tuple[list[UserModel], list[dict]]:
+    """Unsaved users with their Discord profile and ethics form, and the dict each renders from."""
+    users, user_data = [], []
+    for i in range(count):
+        user = UserModel(
+            id=uuid.uuid4(),
+            discord_id=str(10**17 + i),
+            first_name=f"First{i}",
+            surname=f"Last{i}",
+            email=f"user{i}@ucf.edu" if i % 2 else None,
+            nid=f"ab{i:06}",
+            major=MAJORS[i % len(MAJORS)],
+            shirt_size=SHIRT_SIZES[i % len(SHIRT_SIZES)],
+            experience=i % 5 + 1,
+            is_returning=bool(i % 3),
+        )
+        discord = DiscordModel(email=f"user{i}@example.com", username=f"user{i}")
+        ethics_form = EthicsFormModel()
+        # The shape a selectinload query gives the routes; dumped before the
+        # back references exist, which user_to_dict would follow forever.
+        user_data.append({**user_to_dict(user), "discord": user_to_dict(discord), "ethics_form": user_to_dict(ethics_form)})
+        user.discord = discord
+        user.ethics_form = ethics_form
+        users.append(user)
+    return users, user_data
+
+
+def elements(body):
+    for entry in body:
+        yield entry
+        yield from elements(entry.get("elements", []))
+
+
+def make_submission(body, i: int) -> dict:
+    """Answers to every keyed element of a form, as the form page would send them."""
+    submission = {}
+    for entry in elements(body):
+        key = entry.get("key")
+        if key is None:
+            continue
+        kind = entry.get("input")
+        options = entry.get("options") or []
+        if kind == "radio" and options:
+            submission[key] = options[i % len(options)]
+        elif kind == "dropdown" and options:
+            submission[key] = options[i % len(options)]
+        elif kind == "checkbox" and options:
+            submission[key] = str(options[i % len(options)])
+        elif kind == "email":
+            submission[key] = f"user{i}@{entry.get('domain', 'example.com')}"
+        elif kind == "nid":
+            submission[key] = f"ab{i:06}"
+        elif kind == "slider":
+            submission[key] = i % 5 + 1
+        elif kind == "signature":
+            submission[key] = 1700000000 + i
+        else:
+            submission[key] = f"Answer {i}"
+    return submission
+
+
+def timed(fn, inputs: list, repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    peaks = 0
+    before = tracemalloc.get_traced_memory()[0]
+    for item in inputs:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(item)
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(len(inputs) / best, 1),
+        "us_per_op": round(best / len(inputs) * 1e6, 3),
+        "peak_bytes_per_op": round(peaks / len(inputs)),
+        "retained_bytes_per_op": round(retained / len(inputs)),
+    }
+
+
+def bench_form(body, users: list[UserModel], user_data: list[dict], repeat: int) -> dict:
+    plan = Kennelish.compile(body)
+    model = Transformer.kennelish_to_pydantic(body)
+    submissions = [make_submission(body, i) for i in range(len(users))]
+    validated = [model(**submission).model_dump() for submission in submissions]
+    fuzzed = [apply_fuzzy_parsing(data) for data in validated]
+    transformed = [transform_dict(data) for data in fuzzed]
+
+    return {
+        "parse": timed(lambda data: Kennelish.parse(body, data), user_data, repeat),
+        "plan": timed(plan.render, user_data, repeat),
+        # Far slower than the rest; a tenth as many runs is plenty.
+        "model": timed(lambda _: Transformer.kennelish_to_pydantic(body), range(max(1, len(users) // 10)), repeat),
+        "validate": timed(lambda submission: model(**submission).model_dump(), submissions, repeat),
+        "fuzzy": timed(apply_fuzzy_parsing, validated, repeat),
+        "transform": timed(transform_dict, fuzzed, repeat),
+        "update": timed(lambda pair: user_update_instance(*pair), list(zip(users, transformed)), repeat),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> float:
+    """Print the ops/sec change per stage against baseline; return the worst slowdown in percent."""
+    worst = 0.0
+    print(f"\nagainst {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta']['date']})")
+    for form, stages in results.items():
+        for stage, result in stages.items():
+            before = baseline["results"].get(form, {}).get(stage)
+            if not before:
+                continue
+            change = (result["ops_per_sec"] / before["ops_per_sec"] - 1) * 100
+            worst = max(worst, -change)
+            print(f"{form:<20} {stage:<10} {change:>+7.1f}%")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_forms.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, help="exit 1 if any stage is this many percent slower than the baseline")
+    args = parser.parse_args()
+
+    # Read first: --output may name the same file.
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    users, user_data = make_users(args.users)
+    results = {}
+    print(f"{args.users} users, best of {args.repeat}")
+    print(f"{'form':<20} {'stage':<10} {'ops/sec':>10} {'us/op':>9} {'peak B/op':>10} {'kept B/op':>10}")
+    for path in sorted((ROOT / "app/forms").glob("*.json")):
+        results[path.stem] = bench_form(json.loads(path.read_text()), users, user_data, args.repeat)
+        for stage, result in results[path.stem].items():
+            print(f"{path.stem:<20} {stage:<10} {result['ops_per_sec']:>10.0f} {result['us_per_op']:>9.1f} {result['peak_bytes_per_op']:>10} {result['retained_bytes_per_op']:>10}")
+
+    meta = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "users": args.users,
+        "repeat": args.repeat,
+    }
+    Path(args.output).write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+    print(f"\nwrote {args.output}")
+
+    if baseline:
+        worst = compare(results, baseline)
+        if args.max_regression is not None and worst > args.max_regression:
+            sys.exit(f"slowest stage regressed {worst:.1f}%, over the {args.max_regression}% limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Kennelish.parse against a compiled KennelishPlan, per form in app/forms.
+
+Renders every form for a set of synthetic users both ways, after checking
+the outputs are byte-identical, and reports the time per render.
+
+    uv run python benchmarks/bench_kennelish.py --users 1000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("ONBOARD_ENV", "dev")
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.util.kennelish import Kennelish  # noqa: E402
+
+MAJORS = ["Computer Science", "Information Technology", "Computer Engineering", "Mathematics"]
+SHIRT_SIZES = ["S", "M", "L", "XL"]
+
+
+def make_users(count: int) -> list[dict]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "first_name": f"First{i}",
+            "surname": f"Last{i}",
+            "email": f"user{i}@ucf.edu" if i % 2 else "",
+            "discord": {"email": f"user{i}@example.com"},
+            "nid": f"ab{i:06}",
+            "major": MAJORS[i % len(MAJORS)],
+            "shirt_size": SHIRT_SIZES[i % len(SHIRT_SIZES)],
+            "experience": i % 5 + 1,
+            "is_returning": bool(i % 3),
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(fn, users: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for user_data in users:
+            fn(user_data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    users = make_users(args.users)
+    print(f"{args.users} users, best of {args.repeat}")
+    print(f"{'form':<22} {'parse':>9} {'plan':>9} {'speedup':>8}")
+    for path in sorted((ROOT / "app/forms").glob("*.json")):
+        body = json.loads(path.read_text())
+        plan = Kennelish.compile(body)
+        if any(plan.render(user_data) != Kennelish.parse(body, user_data) for user_data in users):
+            sys.exit(f"{path.name} renders differently")
+
+        parse = best_of(lambda user_data: Kennelish.parse(body, user_data), users, args.repeat)
+        render = best_of(plan.render, users, args.repeat)
+        print(f"{path.stem:<22} {parse / args.users * 1e6:>7.1f}us {render / args.users * 1e6:>7.1f}us {parse / render:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+user_to_dict against the model_dump-based version it replaced.
+
+Loads synthetic users with their Discord profile and ethics form (the shape
+/admin/list serializes) and times both serializers over the whole roster,
+after checking they agree on every user.
+
+    uv run python benchmarks/bench_user_to_dict.py --users 10000 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("ONBOARD_ENV", "dev")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import BaseModel  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, select  # noqa: E402
+
+from app.models.user import DiscordModel, EthicsFormModel, UserModel, user_to_dict  # noqa: E402
+
+
+def legacy_user_to_dict(model):
+    if model is None:
+        return None
+    if isinstance(model, list):
+        return [legacy_user_to_dict(item) for item in model]
+    if isinstance(model, (SQLModel, BaseModel)):
+        data = model.model_dump()
+        for key, value in model.__dict__.items():
+            if isinstance(value, (SQLModel, BaseModel)):
+                data[key] = legacy_user_to_dict(value)
+            elif isinstance(value, list) and value and isinstance(value[0], (SQLModel, BaseModel)):
+                data[key] = legacy_user_to_dict(value)
+        return data
+
+
+def load_users(count: int) -> list[UserModel]:
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(count):
+            user = UserModel(
+                id=uuid.uuid4(),
+                discord_id=str(10**17 + i),
+                first_name=f"First{i}",
+                surname=f"Last{i}",
+                email=f"user{i}@example.com",
+                major="Computer Science",
+                class_standing="Junior",
+                experience=i % 5,
+            )
+            user.discord = DiscordModel(email=f"user{i}@example.com", username=f"user{i}", mfa=True)
+            user.ethics_form = EthicsFormModel(signtime=1700000000 + i)
+            session.add(user)
+        session.commit()
+
+    session = Session(engine)
+    statement = select(UserModel).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form))  # type: ignore[bad-argument-type]
+    return list(session.exec(statement))
+
+
+def best_of(fn, users: list[UserModel], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for user in users:
+            fn(user)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    users = load_users(args.users)
+    mismatched = sum(1 for user in users if user_to_dict(user) != legacy_user_to_dict(user))
+    if mismatched:
+        sys.exit(f"{mismatched} users serialize differently")
+
+    print(f"{args.users} users, best of {args.repeat}")
+    print(f"{'serializer':<12} {'total':>9} {'per user':>10}")
+    results = {}
+    for name, fn in (("model_dump", legacy_user_to_dict), ("user_to_dict", user_to_dict)):
+        results[name] = best_of(fn, users, args.repeat)
+        print(f"{name:<12} {results[name] * 1000:>7.1f}ms {results[name] / args.users * 1e6:>8.2f}us")
+    print(f"speedup {results['model_dump'] / results['user_to_dict']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2024 Collegiate Cyber Defense Club
+import asyncio
 import uuid
 
 import pytest
 import stripe
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
 
-from app.main import app, get_session
+from app.main import app, get_async_session, get_form_page_session, get_session
 from app.models.user import DiscordModel, UserModel
 from app.util.auth_dependencies import Authentication
+from app.util.database import build_async_engine, get_async_read_session, get_read_session
+from app.util.membership_reset import MembershipReset
+from app.util.settings import DatabaseConfig
 
 
 @pytest.fixture(name="engine")
@@ -18,9 +23,19 @@ def engine_fixture():
     url = "sqlite://"
     engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
     SQLModel.metadata.create_all(engine)
+    # Every test gets a fresh database, so nothing cached from the last one applies.
+    MembershipReset.invalidate_reset_summary()
     return engine
 
 
+@pytest.fixture(name="async_engine")
+def async_engine_fixture(engine):
+    """Async engine over the same in-memory database as the engine fixture."""
+    async_engine = build_async_engine(DatabaseConfig(url="sqlite://"), engine)
+    yield async_engine
+    asyncio.run(async_engine.dispose())
+
+
 @pytest.fixture(name="session")
 def session_fixture(engine):
     with Session(engine) as session:
@@ -28,11 +43,20 @@ def session_fixture(engine):
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(session: Session, async_engine):
     def get_session_override():
         return session
 
+    async def get_async_session_override():
+        async with AsyncSession(async_engine) as async_session:
+            yield async_session
+
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    # No read-only engine over an in-memory database; reads share the writer.
+    app.dependency_overrides[get_read_session] = get_session_override
+    app.dependency_overrides[get_async_read_session] = get_async_session_override
+    app.dependency_overrides[get_form_page_session] = get_async_session_override
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -0,0 +1,398 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import asyncio
+import csv
+import gzip
+import json
+import uuid
+from datetime import datetime, timezone
+from io import StringIO
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.user import DiscordModel, EthicsFormModel, MembershipHistoryModel, PaymentModel, UserModel
+from app.routes import admin
+from app.util.database import build_async_engine, build_engine
+from app.util.export import export_ndjson_gz
+from app.util.responses import ORJSONResponse
+from app.util.settings import DatabaseConfig
+
+
+def test_csv_streams_every_user(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel, monkeypatch):
+    # Small batches so the export spans several round trips.
+    monkeypatch.setattr(admin, "CSV_BATCH_SIZE", 2)
+    test_user.ethics_form = EthicsFormModel(signtime=1700000000)
+    session.add(test_user)
+    for i in range(5):
+        session.add(UserModel(id=uuid.uuid4(), discord_id=str(i), first_name=f"Bulk{i}", discord=DiscordModel(email=f"bulk{i}@example.com", username=f"bulk{i}")))
+    session.commit()
+
+    response = client.get("/admin/csv", cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.reader(StringIO(response.text)))
+    assert rows[0] == [header for header, _ in admin.CSV_COLUMNS]
+    assert len(rows) == 1 + 7
+
+    by_id = {row[0]: dict(zip(rows[0], row)) for row in rows[1:]}
+    row = by_id[str(test_user.id)]
+    assert row["NID"] == "ko123456"
+    assert row["Is Member"] == "True"
+    assert row["Discord Username"] == "test_user"
+    assert row["Ethics Form Timestamp"] == "1700000000"
+    assert row["Experience"] == "1"
+    # Users without an ethics form still get a row.
+    assert {r["First Name"] for r in by_id.values() if r["Ethics Form Timestamp"] == ""} >= {f"Bulk{i}" for i in range(5)}
+
+
+def test_csv_requires_admin(client: TestClient, jwt: str):
+    assert client.get("/admin/csv", cookies={"token": jwt}).status_code == 403
+
+
+def make_roster(session: Session, count: int):
+    for i in range(count):
+        session.add(
+            UserModel(
+                id=uuid.uuid4(),
+                discord_id=str(1000 + i),
+                first_name=f"Member{i % 3}",
+                surname=f"Roster{i:02}",
+                major="Computer Science" if i % 2 else "Math",
+                is_full_member=i % 4 == 0,
+                did_pay_dues=i % 4 in (0, 1),
+                discord=DiscordModel(email=f"roster{i}@example.com", username=f"roster{i:02}"),
+            )
+        )
+    session.commit()
+
+
+def walk_roster(client: TestClient, admin_jwt: str, **params) -> tuple[list[dict], dict]:
+    rows, first = [], None
+    cursor = None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/admin/roster/", params=query, cookies={"token": admin_jwt})
+        assert response.status_code == 200
+        page = response.json()
+        first = first or page
+        rows += page["data"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows, first
+
+
+def test_roster_pages_cover_everyone_once(client: TestClient, session: Session, admin_jwt: str):
+    make_roster(session, 11)
+
+    for sort in ("name", "discord", "status", "experience"):
+        for order in ("asc", "desc"):
+            rows, first = walk_roster(client, admin_jwt, sort=sort, order=order, limit=3)
+            assert len(rows) == 12
+            assert len({row["id"] for row in rows}) == 12
+            assert first["total"] == 12
+
+    rows, _ = walk_roster(client, admin_jwt, sort="name", limit=4)
+    names = [(row["first_name"].lower(), row["surname"].lower()) for row in rows]
+    assert names == sorted(names)
+
+
+def test_roster_filters_and_counts(client: TestClient, session: Session, admin_jwt: str):
+    make_roster(session, 11)
+
+    rows, first = walk_roster(client, admin_jwt, major="Math", limit=2)
+    assert {row["major"] for row in rows} == {"Math"}
+    assert first["total"] == len(rows) == 6
+
+    rows, first = walk_roster(client, admin_jwt, is_full_member="true")
+    assert all(row["is_full_member"] for row in rows)
+    assert first["total"] == first["full_members"] == 4
+
+    rows, _ = walk_roster(client, admin_jwt, status="needs_dues")
+    assert rows and all(not row["did_pay_dues"] for row in rows)
+
+    # Paid but not yet a member, without an ethics form on file.
+    rows, _ = walk_roster(client, admin_jwt, status="needs_ethics")
+    assert rows and all(row["did_pay_dues"] and not row["is_full_member"] for row in rows)
+
+    rows, _ = walk_roster(client, admin_jwt, status="admin")
+    assert [row["discord_username"] for row in rows] == ["admin_user"]
+
+
+def test_roster_rejects_bad_cursor(client: TestClient, admin_jwt: str):
+    response = client.get("/admin/roster/", params={"cursor": "not-a-cursor"}, cookies={"token": admin_jwt})
+    assert response.status_code == 400
+
+
+def search(client: TestClient, admin_jwt: str, q: str) -> list[dict]:
+    response = client.get("/admin/search", params={"q": q}, cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_search_prefix_matches_every_field(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel):
+    assert [row["id"] for row in search(client, admin_jwt, "Tes")] == [str(test_user.id)]
+    assert [row["id"] for row in search(client, admin_jwt, "ko1234")] == [str(test_user.id)]
+    assert [row["id"] for row in search(client, admin_jwt, "test_us")] == [str(test_user.id)]
+    assert [row["id"] for row in search(client, admin_jwt, "comp sci")] == [str(test_user.id)]
+    assert {row["discord_username"] for row in search(client, admin_jwt, "user")} == {"test_user", "admin_user"}
+    assert search(client, admin_jwt, "nobody") == []
+    # FTS5 syntax is searched for literally, not interpreted.
+    assert search(client, admin_jwt, 'nid:ko* OR "') == []
+    assert search(client, admin_jwt, "") == []
+
+
+def test_search_honours_the_member_filter(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel):
+    test_user.is_full_member = False
+    session.add(test_user)
+    session.commit()
+
+    def usernames(is_full_member):
+        response = client.get("/admin/search", params={"q": "user", "is_full_member": is_full_member}, cookies={"token": admin_jwt})
+        return [row["discord_username"] for row in response.json()["data"]]
+
+    assert usernames(True) == ["admin_user"]
+    assert usernames(False) == ["test_user"]
+
+
+def test_search_follows_edits_and_deletes(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel):
+    test_user.surname = "Renamed"
+    test_user.discord.username = "new_handle"
+    session.add(test_user)
+    session.commit()
+
+    assert search(client, admin_jwt, "Rename")[0]["id"] == str(test_user.id)
+    assert search(client, admin_jwt, "new_hand")[0]["discord_username"] == "new_handle"
+
+    session.delete(test_user.discord)
+    session.delete(test_user)
+    session.commit()
+    assert search(client, admin_jwt, "Rename") == []
+
+
+def test_search_ranks_name_above_major(client: TestClient, session: Session, admin_jwt: str, admin_user: UserModel):
+    session.add(UserModel(id=uuid.uuid4(), discord_id="42", first_name="Someone", major="Admin Studies"))
+    session.commit()
+
+    rows = search(client, admin_jwt, "admin")
+    assert rows[0]["id"] == str(admin_user.id)
+    assert len(rows) == 2
+
+
+def test_list_response_matches_serialized_users(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel, admin_user: UserModel):
+    bare = UserModel(id=uuid.uuid4(), discord_id="42", first_name="Bare")
+    session.add(bare)
+    session.commit()
+
+    response = client.get("/admin/list", cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    users = {user["discord_id"]: user for user in response.json()["data"]}
+
+    assert users[test_user.discord_id]["id"] == str(test_user.id)
+    assert users[test_user.discord_id]["discord"]["username"] == "test_user"
+    assert set(users[test_user.discord_id]) == set(UserModel.model_fields) | {"discord"}
+    # Relationships that are not there stay out instead of turning into nulls.
+    assert set(users["42"]) == set(UserModel.model_fields)
+
+
+def test_membership_history_response(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel):
+    session.add(MembershipHistoryModel(user_id=test_user.id, first_name_snapshot="Test"))
+    session.commit()
+
+    response = client.get("/admin/membership_history/", params={"user_id": str(test_user.id)}, cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    [record] = response.json()["data"]
+    assert record["user_id"] == str(test_user.id)
+    assert record["first_name_snapshot"] == "Test"
+    assert record["reset_date"].startswith(str(datetime.now(timezone.utc).year))
+
+
+def test_orjson_response_renders_non_string_keys():
+    assert ORJSONResponse({1: uuid.UUID(int=1)}).body == b'{"1":"00000000-0000-0000-0000-000000000001"}'
+
+
+def test_list_fields_projection(client: TestClient, async_engine, admin_jwt: str, test_user: UserModel):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/admin/list", params={"fields": "first_name,surname"}, cookies={"token": admin_jwt})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert response.json()["data"][0].keys() == {"id", "first_name", "surname"}
+    # One query for users, for just those columns; no relationship loaders.
+    [statement] = [statement for statement in statements if "dataversionmodel" not in statement]
+    assert "usermodel.email" not in statement
+    assert "discordmodel" not in statement and "ethicsformmodel" not in statement
+
+
+def test_get_fields_projection_into_relationships(client: TestClient, admin_jwt: str, test_user: UserModel):
+    def get(fields):
+        return client.get("/admin/get/", params={"member_id": str(test_user.id), "fields": fields}, cookies={"token": admin_jwt})
+
+    data = get("nid,discord.username").json()["data"]
+    assert data["nid"] == "ko123456"
+    assert data["discord"]["username"] == "test_user"
+    assert "email" not in data["discord"]
+    assert "ethics_form" not in data
+
+    assert get("discord.*").json()["data"]["discord"]["email"] == "test_user@example.com"
+    assert get("password").status_code == 400
+    assert get("discord.password").status_code == 400
+    assert get("membership_history.*").status_code == 400
+
+
+def test_list_etag_answers_304_without_loading_users(client: TestClient, async_engine, admin_jwt: str, test_user: UserModel):
+    first = client.get("/admin/list", cookies={"token": admin_jwt})
+    etag = first.headers["ETag"]
+    assert etag.startswith('"')
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/admin/list", headers={"If-None-Match": etag}, cookies={"token": admin_jwt})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    assert not any("FROM usermodel" in statement for statement in statements if "dataversionmodel" not in statement)
+    # Another projection is another representation.
+    assert client.get("/admin/list", params={"fields": "nid"}, headers={"If-None-Match": etag}, cookies={"token": admin_jwt}).status_code == 200
+
+
+def test_etags_follow_roster_writes(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel):
+    def etags():
+        return (
+            client.get("/admin/list", cookies={"token": admin_jwt}).headers["ETag"],
+            client.get("/admin/get/", params={"member_id": str(test_user.id)}, cookies={"token": admin_jwt}).headers["ETag"],
+            client.get("/admin/get_by_snowflake/", params={"discord_id": test_user.discord_id}, cookies={"token": admin_jwt}).headers["ETag"],
+        )
+
+    before = etags()
+    assert etags() == before
+
+    # An edit through the ORM.
+    test_user.discord.username = "renamed"
+    session.add(test_user.discord)
+    session.commit()
+    edited = etags()
+    assert not set(edited) & set(before)
+
+    # A bulk UPDATE that never loads the rows.
+    assert client.post("/admin/reset_memberships/", json={"reset_reason": "ETag"}, cookies={"token": admin_jwt}).status_code == 200
+    assert not set(etags()) & set(edited)
+
+    # Writes elsewhere leave the roster version alone.
+    reset = etags()
+    session.add(MembershipHistoryModel(user_id=test_user.id))
+    session.commit()
+    assert etags() == reset
+
+
+def test_rolled_back_write_keeps_etag(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel):
+    before = client.get("/admin/list", cookies={"token": admin_jwt}).headers["ETag"]
+    test_user.first_name = "Discarded"
+    session.add(test_user)
+    session.flush()
+    session.rollback()
+    assert client.get("/admin/list", cookies={"token": admin_jwt}).headers["ETag"] == before
+
+
+def read_export(body: bytes) -> dict[str, list[dict]]:
+    sections: dict[str, list[dict]] = {}
+    for line in gzip.decompress(body).splitlines():
+        record = json.loads(line)
+        if "section" in record:
+            current = sections.setdefault(record["section"], [])
+            columns = record["columns"]
+        else:
+            assert list(record) == columns
+            current.append(record)
+    return sections
+
+
+def test_export_writes_every_table_as_gzip_ndjson(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel, admin_user: UserModel):
+    test_user.ethics_form = EthicsFormModel(signtime=1700000000)
+    session.add(test_user)
+    session.add(MembershipHistoryModel(user_id=test_user.id, reset_reason="Export"))
+    session.add(PaymentModel(user_id=test_user.id, source="manual", amount_cents=1000))
+    session.commit()
+
+    response = client.get("/admin/export", cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.ndjson.gz"')
+
+    sections = read_export(response.content)
+    assert list(sections) == ["users", "discord", "ethics_forms", "membership_history", "payments"]
+    assert {user["id"] for user in sections["users"]} == {str(test_user.id), str(admin_user.id)}
+    assert {discord["username"] for discord in sections["discord"]} == {"test_user", "admin_user"}
+    assert sections["ethics_forms"][0]["signtime"] == 1700000000
+    assert sections["membership_history"][0]["reset_reason"] == "Export"
+    assert sections["payments"][0]["amount_cents"] == 1000
+    assert sections["payments"][0]["created_at"].endswith("+00:00")
+
+
+def test_export_compresses_batch_by_batch(session: Session, async_engine):
+    for i in range(9):
+        session.add(UserModel(id=uuid.uuid4(), discord_id=str(i), first_name=f"Bulk{i}"))
+    session.commit()
+
+    async def run():
+        async with AsyncSession(async_engine) as async_session:
+            return [chunk async for chunk in export_ndjson_gz(async_session, batch_size=2)]
+
+    chunks = asyncio.run(run())
+    # Nine users in batches of two, streamed as they compress rather than in one piece at the end.
+    assert len(chunks) > 1
+    assert len(read_export(b"".join(chunks))["users"]) == 9
+
+
+def test_export_is_one_snapshot(tmp_path):
+    config = DatabaseConfig(url=f"sqlite:///{tmp_path}/onboard.db")
+    engine = build_engine(config)
+    async_engine = build_async_engine(config, engine)
+    SQLModel.metadata.create_all(engine)
+
+    # Another worker signs a member up while the users section is already read.
+    signed_up = []
+
+    def sign_up(conn, cursor, statement, *args):
+        if "FROM discordmodel" in statement and not signed_up:
+            signed_up.append(True)
+            with Session(engine) as writer:
+                writer.add(UserModel(id=uuid.uuid4(), discord_id="1", first_name="Late", discord=DiscordModel(email="late@example.com", username="late")))
+                writer.commit()
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", sign_up)
+
+    async def run():
+        async with AsyncSession(async_engine) as async_session:
+            return b"".join([chunk async for chunk in export_ndjson_gz(async_session)])
+
+    try:
+        sections = read_export(asyncio.run(run()))
+    finally:
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+    assert sections["users"] == [] and sections["discord"] == []
+    with Session(engine) as reader:
+        assert reader.exec(select(DiscordModel.username)).all() == ["late"]
+
+
+def test_export_requires_admin(client: TestClient, jwt: str):
+    assert client.get("/admin/export", cookies={"token": jwt}).status_code == 403
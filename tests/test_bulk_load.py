@@ -0,0 +1,128 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import asyncio
+import gzip
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.pool import StaticPool
+
+from app.models.user import DiscordModel, EthicsFormModel, MembershipHistoryModel, PaymentModel, UserModel
+from app.util.bulk_load import load_export, open_export
+from app.util.dataversion import DataVersion
+from app.util.export import export_ndjson_gz
+
+
+def export_of(session: Session, async_engine) -> bytes:
+    for i in range(7):
+        user = UserModel(id=uuid.uuid4(), discord_id=str(i), first_name=f"Loaded{i}", email=f"loaded{i}@example.com")
+        user.discord = DiscordModel(email=f"loaded{i}@example.com", username=f"loaded{i}")
+        user.ethics_form = EthicsFormModel(signtime=i + 1)
+        session.add(user)
+        session.add(MembershipHistoryModel(user_id=user.id))
+        session.add(PaymentModel(user_id=user.id, source="manual", amount_cents=1000))
+    session.commit()
+
+    async def run():
+        async with AsyncSession(async_engine) as async_session:
+            return b"".join([chunk async for chunk in export_ndjson_gz(async_session)])
+
+    return asyncio.run(run())
+
+
+def feed(client: TestClient, admin_jwt: str, since=None) -> tuple[list[dict], str]:
+    """Every change after since, and the cursor to poll with afterwards."""
+    seen = []
+    while True:
+        params = {"since": since, "limit": 1000} if since else {"limit": 1000}
+        page = client.get("/admin/changes", params=params, cookies={"token": admin_jwt}).json()
+        seen += page["data"]
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            return seen, since
+
+
+@pytest.fixture(name="target")
+def target_fixture():
+    """A second, empty database to load into."""
+    target = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(target)
+    return target
+
+
+def test_round_trips_an_export(session: Session, async_engine, target, tmp_path):
+    path = tmp_path / "export.ndjson.gz"
+    path.write_bytes(export_of(session, async_engine))
+    indexes_before = {index["name"] for index in inspect(target).get_indexes("usermodel")}
+
+    with open_export(str(path)) as lines:
+        counts = load_export(target, lines, batch_size=3)
+
+    assert counts == {"users": 7, "discord": 7, "ethics_forms": 7, "membership_history": 7, "payments": 7}
+    with Session(target) as loaded:
+        user = loaded.exec(select(UserModel).where(UserModel.first_name == "Loaded3")).one()
+        original = session.exec(select(UserModel).where(UserModel.first_name == "Loaded3")).one()
+        # change_seq is this database's own feed position, not the exporter's.
+        assert user.model_dump(exclude={"change_seq"}) == original.model_dump(exclude={"change_seq"})
+        assert user.discord.username == "loaded3"
+        assert DataVersion.current(loaded) == 1
+
+        # Indexes and search triggers are back, and the search index covers the loaded rows.
+        assert {index["name"] for index in inspect(target).get_indexes("usermodel")} == indexes_before
+        assert loaded.exec(text("SELECT count(*) FROM membersearch WHERE membersearch MATCH 'loaded3*'")).one() == (1,)
+        user.surname = "Searchable"
+        loaded.add(user)
+        loaded.commit()
+        assert loaded.exec(text("SELECT count(*) FROM membersearch WHERE membersearch MATCH 'searchable'")).one() == (1,)
+
+
+def test_refuses_to_load_over_data_unless_replacing(session: Session, async_engine, target):
+    export = export_of(session, async_engine)
+    load_export(target, iter(gzip.decompress(export).splitlines()))
+
+    with pytest.raises(ValueError, match="not empty"):
+        load_export(target, iter(gzip.decompress(export).splitlines()))
+    # The failed load changed nothing, the dropped triggers included.
+    with Session(target) as loaded:
+        assert len(loaded.exec(select(UserModel)).all()) == 7
+        assert loaded.exec(text("SELECT count(*) FROM sqlite_master WHERE type = 'trigger'")).one() == (6,)
+
+    assert load_export(target, iter(gzip.decompress(export).splitlines()), replace=True)["users"] == 7
+    with Session(target) as loaded:
+        assert len(loaded.exec(select(UserModel)).all()) == 7
+
+
+def test_rejects_unknown_sections(target):
+    with pytest.raises(ValueError, match="Unknown section"):
+        load_export(target, iter([b'{"section": "secrets", "columns": []}']))
+
+
+def test_change_feed_follows_a_replacing_load(client: TestClient, session: Session, engine, async_engine, admin_jwt: str, test_user: UserModel):
+    export = gzip.decompress(export_of(session, async_engine))
+    stale = UserModel(id=uuid.uuid4(), discord_id="stale", first_name="Stale")
+    session.add(stale)
+    session.commit()
+    stale_id, user_id = stale.id, test_user.id
+    cursor = feed(client, admin_jwt)[1]
+    history = DataVersion.current(session, "history")
+    session.commit()
+
+    load_export(engine, iter(export.splitlines()), replace=True)
+
+    test_user.first_name = "AfterLoad"
+    session.add(test_user)
+    session.commit()
+
+    changes, _ = feed(client, admin_jwt, cursor)
+    seen = [(change["kind"], change["id"], change["deleted"]) for change in changes]
+    # Every replaced row is tombstoned ahead of its reloaded copy, the row the export lacked stays deleted...
+    assert ("user", str(stale_id), True) in seen and ("user", str(stale_id), False) not in seen
+    assert seen.index(("user", str(user_id), True)) < seen.index(("user", str(user_id), False))
+    assert sum(1 for kind, _, deleted in seen if kind == "user" and not deleted) == 9
+    # ...and the write after the load comes last.
+    assert changes[-1]["data"]["first_name"] == "AfterLoad"
+    assert DataVersion.current(session, "history") > history
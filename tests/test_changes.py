@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models.user import DiscordModel, EthicsFormModel, PaymentModel, UserModel
+
+
+def make_members(session: Session, count: int) -> list[UserModel]:
+    users = []
+    for i in range(count):
+        user = UserModel(id=uuid.uuid4(), discord_id=str(10**17 + i), first_name=f"Member{i}")
+        user.discord = DiscordModel(email=f"member{i}@example.com", username=f"member{i}")
+        user.ethics_form = EthicsFormModel(signtime=i)
+        session.add(user)
+        session.add(PaymentModel(user_id=user.id, source="manual", amount_cents=1000))
+        users.append(user)
+    session.commit()
+    return users
+
+
+def changes(client: TestClient, admin_jwt: str, since=None, limit=100) -> dict:
+    response = client.get("/admin/changes", params={"since": since, "limit": limit} if since else {"limit": limit}, cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    return response.json()
+
+
+def follow(client: TestClient, admin_jwt: str, since=None, limit=100) -> tuple[list[dict], str]:
+    """Every change after since, a page at a time, and the cursor to poll with afterwards."""
+    seen = []
+    while True:
+        page = changes(client, admin_jwt, since, limit)
+        seen += page["data"]
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            return seen, since
+
+
+def test_pages_cover_every_row_once(client: TestClient, session: Session, admin_jwt: str):
+    make_members(session, 5)
+
+    everything, _ = follow(client, admin_jwt)
+    paged, _ = follow(client, admin_jwt, limit=2)
+
+    assert paged == everything
+    keys = [(change["kind"], change["id"]) for change in everything]
+    assert len(keys) == len(set(keys))
+    # The admin account plus five members, each with a Discord row, and five ethics forms and payments.
+    counts = {kind: sum(1 for k, _ in keys if k == kind) for kind in ("user", "discord", "ethics_form", "payment")}
+    assert counts == {"user": 6, "discord": 6, "ethics_form": 5, "payment": 5}
+    # In commit order: the admin account, committed by its fixture, comes first.
+    user, discord = sorted(everything[:2], key=lambda change: change["kind"], reverse=True)
+    assert (user["kind"], discord["kind"]) == ("user", "discord")
+    assert discord["data"]["user_id"] == user["id"]
+    user = next(change for change in everything if change["kind"] == "user" and change["data"]["first_name"] == "Member0")
+    assert user["deleted"] is False
+    assert "discord" not in user["data"]
+
+
+def test_polling_returns_only_new_changes(client: TestClient, session: Session, admin_jwt: str):
+    [member] = make_members(session, 1)
+    _, cursor = follow(client, admin_jwt)
+
+    empty = changes(client, admin_jwt, cursor)
+    assert empty == {"data": [], "next_cursor": cursor, "has_more": False}
+
+    member.discord.username = "renamed"
+    session.add(member.discord)
+    session.commit()
+    [change] = changes(client, admin_jwt, cursor)["data"]
+    assert (change["kind"], change["id"], change["data"]["username"]) == ("discord", str(member.discord.id), "renamed")
+
+    # Bulk UPDATEs, which never load the rows, stamp them as well.
+    _, cursor = follow(client, admin_jwt, cursor)
+    assert client.post("/admin/reset_memberships/", json={"reset_reason": "Feed"}, cookies={"token": admin_jwt}).status_code == 200
+    touched = {change["id"] for change in follow(client, admin_jwt, cursor)[0] if change["kind"] == "user"}
+    assert str(member.id) in touched
+
+
+def test_feed_follows_commit_order_not_clocks(client: TestClient, session: Session, admin_jwt: str):
+    first, second = make_members(session, 2)
+    _, cursor = follow(client, admin_jwt)
+
+    # Writer A stamps its row, then stalls before committing; writer B
+    # commits in the meantime and a mirror pages past it.
+    stalled_at = datetime.now(timezone.utc)
+    second.discord.username = "writer-b"
+    session.add(second.discord)
+    session.commit()
+    [b_change], cursor = follow(client, admin_jwt, cursor)
+    assert b_change["data"]["username"] == "writer-b"
+
+    # A's commit lands after that cursor, clock stamp notwithstanding.
+    first.discord.username = "writer-a"
+    first.discord.updated_at = stalled_at
+    session.add(first.discord)
+    session.commit()
+    [change], _ = follow(client, admin_jwt, cursor)
+    assert (change["id"], change["data"]["username"]) == (str(first.discord.id), "writer-a")
+    assert change["changed_at"] < b_change["changed_at"]
+
+
+def test_discord_migration_leaves_tombstones(client: TestClient, session: Session, admin_jwt: str, test_user: UserModel):
+    [temp] = make_members(session, 1)
+    temp_id, temp_discord_id, temp_form_id = temp.id, temp.discord.id, temp.ethics_form.id
+    body = {"old_user_id": str(test_user.id), "new_discord_id": temp.discord_id, "identity_verified": True}
+    _, cursor = follow(client, admin_jwt)
+    # The migration opens its own transaction on the session the reads above shared.
+    session.commit()
+
+    response = client.post(
+        "/admin/migrate_discord_account/",
+        json=body,
+        cookies={"token": admin_jwt},
+    )
+    assert response.status_code == 200
+
+    feed, _ = follow(client, admin_jwt, cursor)
+    deleted = {(change["kind"], change["id"]) for change in feed if change["deleted"]}
+    assert deleted == {("user", str(temp_id)), ("discord", str(temp_discord_id)), ("ethics_form", str(temp_form_id))}
+    assert all(change["data"] is None for change in feed if change["deleted"])
+    # The surviving account took over the Discord ID and the merged profile.
+    assert {(change["kind"], change["id"]) for change in feed if not change["deleted"]} >= {("user", str(test_user.id)), ("discord", str(test_user.discord.id))}
+
+
+def test_rejects_bad_cursor(client: TestClient, admin_jwt: str):
+    assert client.get("/admin/changes", params={"since": "garbage"}, cookies={"token": admin_jwt}).status_code == 400
@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import csv
+import gzip
+import os
+from io import StringIO
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.routes import admin
+from app.util.compression import CompressionMiddleware, PrecompressedStaticFiles, negotiate, precompress_static
+from tests.test_admin import make_roster
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0.1, gzip", "gzip"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_list_is_compressed_with_a_variant_etag(client: TestClient, session: Session, admin_jwt: str):
+    make_roster(session, 20)
+    plain = client.get("/admin/list", headers={"Accept-Encoding": "identity"}, cookies={"token": admin_jwt})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+    for encoding in ("br", "gzip"):
+        response = client.get("/admin/list", headers={"Accept-Encoding": encoding}, cookies={"token": admin_jwt})
+        assert response.headers["Content-Encoding"] == encoding
+        assert response.json() == plain.json()
+        etag = response.headers["ETag"]
+        assert etag == f'{plain.headers["ETag"][:-1]}-{encoding}"'
+
+        cached = client.get("/admin/list", headers={"Accept-Encoding": encoding, "If-None-Match": etag}, cookies={"token": admin_jwt})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+
+
+def test_export_is_not_compressed_twice(client: TestClient, admin_jwt: str):
+    export = client.get("/admin/export", headers={"Accept-Encoding": "br"}, cookies={"token": admin_jwt})
+    assert "content-encoding" not in export.headers
+    assert gzip.decompress(export.content)
+
+
+def test_csv_streams_compressed(client: TestClient, session: Session, admin_jwt: str, monkeypatch):
+    monkeypatch.setattr(admin, "CSV_BATCH_SIZE", 2)
+    make_roster(session, 20)
+
+    response = client.get("/admin/csv", headers={"Accept-Encoding": "br"}, cookies={"token": admin_jwt})
+    assert response.headers["Content-Encoding"] == "br"
+    assert "content-length" not in response.headers
+    # The header, the admin and the roster.
+    assert len(list(csv.reader(StringIO(response.text)))) == 1 + 1 + 20
+
+
+def test_precompressed_static(tmp_path):
+    script = tmp_path / "app.js"
+    script.write_text("console.log('precompressed');\n" * 100)
+    (tmp_path / "tiny.js").write_text("1;")
+    (tmp_path / "logo.png").write_bytes(os.urandom(1000))
+
+    assert precompress_static(tmp_path) == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["app.js", "app.js.br", "app.js.gz", "logo.png", "tiny.js"]
+    assert brotli.decompress((tmp_path / "app.js.br").read_bytes()) == script.read_bytes()
+    assert precompress_static(tmp_path) == 0
+
+    static = FastAPI()
+    static.add_middleware(CompressionMiddleware)
+    static.mount("/static", PrecompressedStaticFiles(directory=tmp_path))
+    client = TestClient(static)
+
+    response = client.get("/static/app.js", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["Content-Type"].startswith("text/javascript")
+    assert response.headers["Content-Length"] == str((tmp_path / "app.js.br").stat().st_size)
+    assert response.text == script.read_text()
+    assert client.get("/static/app.js", headers={"Accept-Encoding": "gzip"}).headers["Content-Encoding"] == "gzip"
+    assert client.get("/static/app.js", headers={"Accept-Encoding": "br", "If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    assert "content-encoding" not in client.get("/static/tiny.js", headers={"Accept-Encoding": "br"}).headers
+    plain = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+    # An edited source outranks its now stale siblings until they are rebuilt.
+    script.write_text("console.log('edited');\n" * 100)
+    newest = max((tmp_path / name).stat().st_mtime_ns for name in ("app.js.br", "app.js.gz"))
+    os.utime(script, ns=(newest + 1, newest + 1))
+    stale = client.get("/static/app.js", headers={"Accept-Encoding": "br"})
+    assert stale.headers["Content-Encoding"] == "br"
+    assert stale.text == script.read_text()
+    assert precompress_static(tmp_path) == 2
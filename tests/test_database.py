@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlmodel import Session, SQLModel, select
+
+from app.models.user import UserModel
+from app.util.database import build_async_engine, build_engine, get_pool_status, read_only_config
+from app.util.settings import DatabaseConfig
+
+
+@pytest.mark.parametrize("mode", ["static", "thread", "queue"])
+def test_pragmas_applied_in_every_pool_mode(tmp_path, mode):
+    engine = build_engine(DatabaseConfig(url=f"sqlite:///{tmp_path}/onboard.db", pool=mode))
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+    assert get_pool_status(engine)["mode"] == mode
+
+
+def test_queue_pool_applies_pragmas_to_each_new_connection(tmp_path):
+    engine = build_engine(DatabaseConfig(url=f"sqlite:///{tmp_path}/onboard.db", pool="queue", pool_size=2))
+
+    with engine.connect() as first, engine.connect() as second:
+        assert first.connection.dbapi_connection is not second.connection.dbapi_connection
+        assert first.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+        assert second.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_memory_database_keeps_static_pool():
+    """Any other mode would give each connection its own empty database."""
+    engine = build_engine(DatabaseConfig(url="sqlite:///:memory:", pool="queue"))
+
+    assert get_pool_status(engine)["mode"] == "static"
+
+
+def test_queue_pool_counts_checkouts_and_timeouts(tmp_path):
+    engine = build_engine(DatabaseConfig(url=f"sqlite:///{tmp_path}/onboard.db", pool="queue", pool_size=1, max_overflow=0, pool_timeout=0.05))
+
+    with engine.connect():
+        status = get_pool_status(engine)
+        assert status["checked_out"] == 1
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    status = get_pool_status(engine)
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 1
+    assert status["checked_out"] == 0
+    assert status["wait_ms_max"] >= 50
+
+
+def test_db_pool_endpoint_requires_admin(client: TestClient, jwt: str, admin_jwt: str):
+    assert client.get("/admin/db_pool/", cookies={"token": jwt}).status_code == 403
+
+    response = client.get("/admin/db_pool/", cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    assert response.json()["data"]["sync"]["mode"] == "static"
+    assert response.json()["data"]["async"]["mode"] == "static"
+
+
+def test_read_only_engine_sees_writes_but_cannot_write(tmp_path):
+    config = DatabaseConfig(url=f"sqlite:///{tmp_path}/onboard.db", pool="queue")
+    engine = build_engine(config)
+    SQLModel.metadata.create_all(engine)
+    read_config = read_only_config(config)
+    read_engine = build_engine(read_config, read_only=True)
+
+    with Session(engine) as session:
+        session.add(UserModel(discord_id="1"))
+        session.commit()
+
+    with Session(read_engine) as session:
+        assert len(session.exec(select(UserModel)).all()) == 1
+        session.add(UserModel(discord_id="2"))
+        with pytest.raises(OperationalError, match="readonly"):
+            session.commit()
+
+    async def read_async():
+        async_read_engine = build_async_engine(read_config, read_engine, read_only=True)
+        try:
+            async with async_read_engine.connect() as connection:
+                return (await connection.exec_driver_sql("SELECT count(*) FROM usermodel")).scalar()
+        finally:
+            await async_read_engine.dispose()
+
+    assert asyncio.run(read_async()) == 1
+
+
+def test_read_only_config_falls_back_to_primary():
+    assert read_only_config(DatabaseConfig(url="sqlite://")) is None
+    assert read_only_config(DatabaseConfig(url="postgresql://db/onboard")) is None
+    replica = read_only_config(DatabaseConfig(url="postgresql://db/onboard", replica_url="postgresql://replica/onboard"))
+    assert replica.url == "postgresql://replica/onboard"
@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import asyncio
+import json
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.events import AdminEventModel
+from app.models.user import UserModel
+from app.util.events import AdminEvents
+
+
+async def connected():
+    return False
+
+
+def parse(chunk: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return {"id": int(fields["id"]), "event": fields["event"], "data": json.loads(fields["data"])}
+
+
+def read_stream(async_engine, count: int, after=None, during=None, **options) -> list[str]:
+    """
+    The first count chunks a stream sends after its retry line. during, if
+    given, runs in a thread once the stream has started waiting.
+    """
+
+    async def run():
+        async with AsyncSession(async_engine) as session:
+            stream = AdminEvents.stream(session, connected, after, **options)
+            assert await anext(stream) == "retry: 3000\n\n"
+            chunks = []
+            pending = asyncio.ensure_future(anext(stream))
+            if during is not None:
+                await asyncio.sleep(0.05)
+                await asyncio.to_thread(during)
+            while len(chunks) < count:
+                chunks.append(await asyncio.wait_for(pending, timeout=5))
+                pending = asyncio.ensure_future(anext(stream))
+            pending.cancel()
+            await stream.aclose()
+            return chunks
+
+    return asyncio.run(run())
+
+
+@patch("app.util.approve.Approve.approve_member", return_value=None)
+def test_payment_and_edit_events_carry_roster_rows(mock_approve, client: TestClient, async_engine, admin_jwt: str, test_user: UserModel):
+    assert client.post("/admin/mark_paid/", json={"user_id": str(test_user.id), "amount_cents": 1000}, cookies={"token": admin_jwt}).status_code == 200
+    assert client.post("/admin/get/", json={"id": str(test_user.id), "major": "Physics"}, cookies={"token": admin_jwt}).status_code == 200
+
+    payment, edit = map(parse, read_stream(async_engine, 2, after=0))
+
+    assert payment["event"] == "payment"
+    assert payment["data"]["source"] == "manual"
+    assert payment["data"]["amount_cents"] == 1000
+    assert payment["data"]["user_id"] == str(test_user.id)
+    # Rows are as of sending, so both already show the edit.
+    assert payment["data"]["row"]["did_pay_dues"] is True
+    assert edit["event"] == "edit"
+    assert edit["data"]["fields"] == ["major"]
+    assert edit["data"]["row"]["major"] == "Physics"
+    assert edit["id"] > payment["id"]
+
+
+def test_commit_wakes_a_waiting_stream(engine, async_engine, test_user: UserModel):
+    def mark_paid():
+        with Session(engine) as session:
+            user = session.get(UserModel, test_user.id)
+            user.did_pay_dues = True
+            session.add(user)
+            AdminEvents.record(session, "payment", user.id, source="stripe")
+            session.commit()
+
+    # Polling is off for practical purposes, so only the commit hook can deliver it in time.
+    [chunk] = read_stream(async_engine, 1, during=mark_paid, poll_seconds=60)
+    assert parse(chunk)["data"]["row"]["did_pay_dues"] is True
+
+
+def test_rolled_back_event_is_never_sent(session: Session, test_user: UserModel):
+    AdminEvents.record(session, "edit", test_user.id, fields=["major"])
+    session.flush()
+    session.rollback()
+
+    assert session.exec(select(AdminEventModel)).all() == []
+    assert "admin_events" not in session.info
+
+
+def test_stream_resyncs_when_too_far_behind(session: Session, async_engine, test_user: UserModel):
+    for _ in range(3):
+        AdminEvents.record(session, "edit", test_user.id, fields=[])
+    session.commit()
+    latest = max(session.exec(select(AdminEventModel.id)).all())
+
+    [chunk] = read_stream(async_engine, 1, after=0, buffer_size=2)
+    assert parse(chunk) == {"id": latest, "event": "resync", "data": {}}
+
+
+def test_idle_stream_sends_heartbeats(async_engine):
+    assert read_stream(async_engine, 2, heartbeat_seconds=0.01, poll_seconds=0.01) == [": ping\n\n", ": ping\n\n"]
+
+
+def test_events_require_admin(client: TestClient, jwt: str):
+    assert client.get("/admin/events", cookies={"token": jwt}).status_code == 403
@@ -0,0 +1,120 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import asyncio
+import json
+import os
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import get_form_page_session
+from app.util.forms import Forms
+from app.util.settings import Settings
+
+
+@pytest.fixture
+def forms_dir(tmp_path, monkeypatch):
+    (tmp_path / "app/forms").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "app/forms"
+
+
+def touch(path):
+    """Move path's mtime forward, so the change shows even on coarse clocks."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_registry_loads_once_and_reloads_on_change(forms_dir):
+    form = forms_dir / "registry.json"
+    form.write_text(json.dumps([{"input": "h1", "label": "First", "elements": [{"input": "text", "key": "nid"}]}]))
+
+    entry = Forms.get_form("registry")
+    assert Forms.get_form("registry") is entry
+    assert Forms.get_form("../registry") is entry
+    assert entry.body[0]["label"] == "First"
+
+    form.write_text(json.dumps([{"input": "h1", "label": "Second"}]))
+    touch(form)
+    assert Forms.get_form_body("registry")[0]["label"] == "Second"
+    assert Forms.get_form_plan("registry").render({}) == "<h1>Second</h1>"
+
+    form.unlink()
+    with pytest.raises(FileNotFoundError):
+        Forms.get_form("registry")
+    with pytest.raises(FileNotFoundError):
+        Forms.get_form("registry")
+
+
+def test_form_body_is_immutable(forms_dir):
+    (forms_dir / "frozen.json").write_text(json.dumps([{"input": "radio", "key": "choice", "options": ["a", "b"]}]))
+    body = Forms.get_form_body("frozen")
+
+    with pytest.raises(TypeError):
+        body[0]["key"] = "other"
+    with pytest.raises(AttributeError):
+        body[0]["options"].append("c")
+    assert Forms.get_form_validator("frozen")(choice="b").choice == "b"
+
+
+def test_registry_keeps_forms_inside_the_directory(forms_dir, tmp_path):
+    secret = tmp_path / "secret.json"
+    secret.write_text("[]")
+    (forms_dir / "escape.json").symlink_to(secret)
+
+    with pytest.raises(FileNotFoundError):
+        Forms.get_form("../secret")
+    with pytest.raises(PermissionError):
+        Forms.get_form("escape")
+
+
+def test_get_form_serves_preserialized_json(client: TestClient):
+    response = client.get("/api/form/2")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    with open("app/forms/2.json", "rb") as form_file:
+        assert response.content == orjson.dumps(json.load(form_file))
+
+
+@pytest.fixture
+def client_render(monkeypatch):
+    monkeypatch.setattr(Settings().forms, "render", "client")
+
+
+def test_client_render_serves_a_cacheable_shell(client: TestClient, jwt: str, client_render):
+    response = client.get("/join/2/", cookies={"token": jwt})
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, max-age=86400"
+    assert 'data-form="2"' in response.text
+    # Nothing about the member, and no form: form.js fetches both.
+    assert "test_user" not in response.text
+    assert "kennelish_input" not in response.text
+
+    cached = client.get("/join/2/", headers={"If-None-Match": response.headers["ETag"]}, cookies={"token": jwt})
+    assert cached.status_code == 304
+    assert cached.headers["Cache-Control"] == "private, max-age=86400"
+
+    assert client.get("/join/missing/", cookies={"token": jwt}).status_code == 404
+
+
+def test_client_render_opens_no_session(client_render):
+    async def first():
+        return await anext(get_form_page_session())
+
+    assert asyncio.run(first()) is None
+
+
+def test_prefill_sends_only_what_the_form_reads(client: TestClient, jwt: str, test_user):
+    response = client.get("/api/form/2/prefill", cookies={"token": jwt})
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    prefill = response.json()
+    assert set(prefill) <= Forms.get_form_prefill_keys("2") | {"id", "discord"}
+    assert prefill["id"] == str(test_user.id)
+    assert prefill["first_name"] == "Test"
+    assert prefill["discord"] == {"avatar": test_user.discord.avatar, "username": "test_user", "email": "test_user@example.com"}
+    assert "ops_email" not in prefill
+
+    assert client.get("/api/form/missing/prefill", cookies={"token": jwt}).status_code == 404
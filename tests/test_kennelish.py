@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.util.forms import Forms
+from app.util.kennelish import SLOT, Kennelish
+
+FORMS = sorted(Path("app/forms").glob("*.json"))
+
+USERS = [
+    None,
+    {},
+    {
+        "id": uuid.uuid4(),
+        "first_name": "Ada",
+        "surname": "O'Neil <b>",
+        "email": "ada@ucf.edu",
+        "discord": {"email": "ada@discord.example"},
+        "nid": "ab123456",
+        "major": "Computer Science",
+        "class_standing": "Junior",
+        "shirt_size": "M",
+        "experience": 3,
+        "is_returning": True,
+    },
+    {"id": 1, "first_name": None, "email": "", "discord": {"email": None}, "experience": 3.0, "is_returning": False, "major": ["unhashable"], "shirt_size": ""},
+    {"email": None, "discord": None, "experience": "3", "is_returning": "True"},
+]
+
+# Every input type, plus the shapes parse renders as invalid or malformed.
+EDGE_CASES = [
+    {"input": "h1", "label": "<i>Header</i>", "elements": [{"input": "text", "key": f"key{SLOT}"}, {"input": "radio", "key": "major", "options": [["a"], "b"]}]},
+    {"input": "radio", "key": "major", "options": ["Computer Science", 1, True, "Yes"]},
+    {"input": "radio", "key": "is_returning", "options": ["Yes", "No"]},
+    {"input": "radio", "key": "experience", "options": [1, 2, 3, "3"], "prefill": False},
+    {"input": "dropdown", "key": "shirt_size", "options": ["S", "M", "_default"], "other": True, "label": "Size's"},
+    {"input": "dropdown", "key": "shirt_size", "options": None},
+    {"input": "slider", "key": "experience"},
+    {"input": "signature", "key": "signature"},
+    {"input": "email", "key": "email", "domain": "ucf.edu"},
+    {"input": "nid", "key": "nid", "required": True},
+    {"input": "checkbox", "key": "c.b", "options": ["a b", "c"]},
+    {"input": "navigation", "prev": '/join/"2"', "next": "/join/4"},
+    {"input": "h2", "elements": 5},
+    {"input": "unknown"},
+    {"label": "no input"},
+    "not an object",
+]
+
+
+@pytest.mark.parametrize("form", FORMS, ids=[path.stem for path in FORMS])
+def test_compiled_forms_match_parse(form: Path):
+    body = json.loads(form.read_text())
+    plan = Kennelish.compile(body)
+    for user_data in USERS:
+        assert plan.render(user_data) == Kennelish.parse(body, user_data)
+
+
+def test_compiled_edge_cases_match_parse():
+    plan = Kennelish.compile(EDGE_CASES)
+    for user_data in USERS:
+        assert plan.render(user_data) == Kennelish.parse(EDGE_CASES, user_data)
+
+
+def test_plan_is_mostly_static():
+    plan = Kennelish.compile(json.loads(Path("app/forms/2.json").read_text()))
+    slots = [part for part in plan.parts if not isinstance(part, str)]
+    # Static fragments only ever sit between slots.
+    assert len(plan.parts) <= 2 * len(slots) + 1
+
+
+def test_form_plan_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    (tmp_path / "app/forms").mkdir(parents=True)
+    form = tmp_path / "app/forms/cached.json"
+    form.write_text(json.dumps([{"input": "h1", "label": "First"}]))
+    monkeypatch.chdir(tmp_path)
+
+    plan = Forms.get_form_plan("cached")
+    assert plan.render({}) == "<h1>First</h1>"
+    assert Forms.get_form_plan("cached") is plan
+
+    form.write_text(json.dumps([{"input": "h1", "label": "Second"}]))
+    os.utime(form, ns=(form.stat().st_atime_ns, form.stat().st_mtime_ns + 1))
+    assert Forms.get_form_plan("cached").render({}) == "<h1>Second</h1>"
+
+    with pytest.raises(FileNotFoundError):
+        Forms.get_form_plan("missing")
+
+
+def test_form_validator_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    (tmp_path / "app/forms").mkdir(parents=True)
+    form = tmp_path / "app/forms/validated.json"
+    form.write_text(json.dumps([{"input": "radio", "key": "choice", "options": ["a", "b"]}]))
+    monkeypatch.chdir(tmp_path)
+    before = Forms.cache_stats()["validator"]
+
+    model = Forms.get_form_validator("validated")
+    assert Forms.get_form_validator("validated") is model
+    assert model(choice="a").choice == "a"
+    with pytest.raises(ValidationError):
+        model(choice="c")
+
+    form.write_text(json.dumps([{"input": "radio", "key": "choice", "options": ["a", "b", "c"]}]))
+    os.utime(form, ns=(form.stat().st_atime_ns, form.stat().st_mtime_ns + 1))
+    assert Forms.get_form_validator("validated")(choice="c").choice == "c"
+
+    stats = Forms.cache_stats()["validator"]
+    assert stats["builds"] - before["builds"] == 2
+    assert stats["hits"] - before["hits"] == 1
+
+
+def test_preload_builds_every_form(client: TestClient, admin_jwt: str, jwt: str):
+    assert Forms.preload() == len(FORMS)
+    before = Forms.cache_stats()
+
+    # Served from the preloaded cache: hits, and no further builds.
+    assert client.get("/join/2/", cookies={"token": jwt}).status_code == 200
+    assert client.post("/api/form/2", json={"first_name": "Cached"}, cookies={"token": jwt}).status_code == 200
+
+    response = client.get("/admin/form_cache/", cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    stats = response.json()["data"]
+    for kind in ("plan", "validator"):
+        assert stats[kind]["builds"] == before[kind]["builds"]
+        assert stats[kind]["hits"] == before[kind]["hits"] + 1
+        assert stats[kind]["cached"] >= len(FORMS)
+    assert client.get("/admin/form_cache/", cookies={"token": jwt}).status_code == 403
+
+
+def test_prefill_keys():
+    assert Kennelish.prefill_keys(EDGE_CASES) == {"key\x00kennelish-slot\x00", "major", "is_returning", "shirt_size", "experience", "first_name", "surname", "id", "email", "discord", "nid"}
+    assert Kennelish.prefill_keys([{"input": "checkbox", "key": "c"}, {"input": "text", "key": "t", "prefill": False}]) == set()
@@ -0,0 +1,192 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+from sqlmodel import Session, select
+
+from app.models.user import DiscordModel, MembershipHistoryModel, UserModel
+from app.util.membership_reset import MembershipReset
+
+
+def make_member(session: Session, n: int, *, is_full_member=False, did_pay_dues=False, discord_username=None) -> UserModel:
+    user = UserModel(
+        id=uuid.uuid4(),
+        discord_id=str(100000 + n),
+        first_name=f"First{n}",
+        surname=f"Last{n}",
+        email=f"member{n}@example.com",
+        is_full_member=is_full_member,
+        did_pay_dues=did_pay_dues,
+        can_vote=is_full_member,
+        join_date=1700000000 + n if is_full_member else None,
+        did_get_shirt=True,
+    )
+    if discord_username is not None:
+        user.discord = DiscordModel(username=discord_username, email=f"member{n}@example.com", mfa=False)
+    session.add(user)
+    session.commit()
+    return user
+
+
+def test_reset_archives_members_and_resets_everyone(session: Session):
+    full = make_member(session, 1, is_full_member=True, did_pay_dues=True, discord_username="full_member")
+    paid = make_member(session, 2, did_pay_dues=True)
+    attendee = make_member(session, 3)
+
+    result = MembershipReset.reset_all_memberships(session, reset_reason="Test reset")
+
+    assert result["success"] is True
+    assert result["reset_count"] == 3
+    assert result["archived_count"] == 2
+    assert result["errors"] == []
+    assert result["reset_reason"] == "Test reset"
+
+    history = {record.user_id: record for record in session.exec(select(MembershipHistoryModel)).all()}
+    assert set(history) == {full.id, paid.id}
+    assert history[full.id].was_full_member is True
+    assert history[full.id].could_vote is True
+    assert history[full.id].original_join_date == 1700000001
+    assert history[full.id].discord_username_snapshot == "full_member"
+    assert history[full.id].email_snapshot == "member1@example.com"
+    assert history[paid.id].was_full_member is False
+    assert history[paid.id].had_paid_dues is True
+    assert history[paid.id].discord_username_snapshot == ""
+    assert history[full.id].reset_date == history[paid.id].reset_date
+
+    session.expire_all()
+    for user in (full, paid, attendee):
+        assert user.is_full_member is False
+        assert user.did_pay_dues is False
+        assert user.can_vote is False
+        assert user.join_date is None
+    assert full.is_returning is True and full.renewal is True and full.did_get_shirt is False
+    assert attendee.is_returning is False and attendee.did_get_shirt is True
+
+
+def test_reset_reports_progress_per_chunk(session: Session):
+    for n in range(7):
+        make_member(session, n, is_full_member=n % 2 == 0)
+    calls = []
+
+    result = MembershipReset.reset_all_memberships(session, chunk_size=3, progress=lambda done, total: calls.append((done, total)))
+
+    assert calls == [(3, 7), (6, 7), (7, 7)]
+    assert result["reset_count"] == 7
+    assert result["archived_count"] == 4
+    assert len(session.exec(select(MembershipHistoryModel)).all()) == 4
+
+
+def test_reset_stops_at_a_failed_chunk_and_resumes(session: Session, monkeypatch):
+    members = [make_member(session, n, is_full_member=True) for n in range(7)]
+    first_ids = sorted(member.id for member in members)
+    reset_chunk = MembershipReset._reset_chunk
+    calls = 0
+
+    def fail_second_chunk(*args):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("disk I/O error")
+        return reset_chunk(*args)
+
+    monkeypatch.setattr(MembershipReset, "_reset_chunk", staticmethod(fail_second_chunk))
+    result = MembershipReset.reset_all_memberships(session, chunk_size=3)
+
+    assert result["success"] is False
+    assert result["partial"] is True
+    assert result["reset_count"] == 3
+    assert result["archived_count"] == 3
+    assert result["failed_chunk"] == {"first_id": str(first_ids[3]), "last_id": str(first_ids[5])}
+    assert "disk I/O error" in result["error"]
+    # The reset stopped: the third chunk was never attempted.
+    assert calls == 2
+    assert session.exec(select(UserModel).where(UserModel.is_full_member.is_(True))).all() != []  # type: ignore[union-attr]
+
+    monkeypatch.setattr(MembershipReset, "_reset_chunk", staticmethod(reset_chunk))
+    result = MembershipReset.reset_all_memberships(session, chunk_size=3)
+
+    assert result["success"] is True
+    assert result["partial"] is False
+    assert result["archived_count"] == 4
+    history = session.exec(select(MembershipHistoryModel.user_id)).all()
+    assert sorted(history) == first_ids
+
+
+def test_reset_endpoint(session: Session, client: TestClient, admin_jwt: str):
+    member = make_member(session, 1, is_full_member=True)
+
+    response = client.post("/admin/reset_memberships/", json={"reset_reason": "Endpoint reset"}, cookies={"token": admin_jwt})
+
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+    assert response.json()["admin_user_id"] is not None
+    history = session.exec(select(MembershipHistoryModel).where(MembershipHistoryModel.user_id == member.id)).one()
+    assert history.reset_reason == "Endpoint reset"
+
+
+def test_reset_summary_aggregates_history(session: Session):
+    first = make_member(session, 1)
+    second = make_member(session, 2)
+    session.add(MembershipHistoryModel(user_id=first.id, reset_date=datetime(2025, 8, 1, 9, tzinfo=timezone.utc)))
+    session.add(MembershipHistoryModel(user_id=second.id, reset_date=datetime(2025, 8, 1, 10, tzinfo=timezone.utc)))
+    session.add(MembershipHistoryModel(user_id=first.id, reset_date=datetime(2026, 8, 1, 9, tzinfo=timezone.utc)))
+    session.commit()
+
+    summary = MembershipReset.get_reset_summary(session)
+
+    assert summary == {
+        "total_reset_records": 3,
+        "unique_users_affected": 2,
+        "number_of_reset_events": 2,
+        "most_recent_reset": "2026-08-01T09:00:00+00:00",
+    }
+
+
+def test_reset_summary_is_cached_until_history_changes(session: Session):
+    assert MembershipReset.get_reset_summary(session)["total_reset_records"] == 0
+    make_member(session, 1, is_full_member=True)
+    make_member(session, 2, did_pay_dues=True)
+
+    MembershipReset.reset_all_memberships(session)
+    assert MembershipReset.get_reset_summary(session)["total_reset_records"] == 2
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(session.get_bind(), "before_cursor_execute", record)
+    try:
+        assert MembershipReset.get_reset_summary(session)["unique_users_affected"] == 2
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", record)
+    assert not any("DISTINCT" in statement for statement in statements)
+
+    # A history row written elsewhere (another worker, say) moves the cache key.
+    session.add(MembershipHistoryModel(user_id=make_member(session, 3).id))
+    session.commit()
+    assert MembershipReset.get_reset_summary(session)["total_reset_records"] == 3
+
+
+def test_reset_summary_sees_history_deletes_and_reassignments(session: Session):
+    first, second = make_member(session, 1), make_member(session, 2)
+    session.add(MembershipHistoryModel(user_id=first.id))
+    session.add(MembershipHistoryModel(user_id=second.id))
+    newest = MembershipHistoryModel(user_id=second.id)
+    session.add(newest)
+    session.commit()
+    assert MembershipReset.get_reset_summary(session)["unique_users_affected"] == 2
+
+    # Neither of these moves MAX(id), and the second leaves COUNT(*) alone too.
+    oldest = session.exec(select(MembershipHistoryModel).order_by(MembershipHistoryModel.id)).first()
+    session.delete(oldest)
+    session.commit()
+    assert MembershipReset.get_reset_summary(session)["total_reset_records"] == 2
+    assert MembershipReset.get_reset_summary(session)["unique_users_affected"] == 1
+
+    session.exec(update(MembershipHistoryModel).where(MembershipHistoryModel.id != newest.id).values(user_id=first.id))
+    session.commit()
+    assert MembershipReset.get_reset_summary(session)["unique_users_affected"] == 2
@@ -11,6 +11,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy import update
 from sqlmodel import Session, select
 
+from app.models.events import AdminEventModel
 from app.models.user import EthicsFormModel, MembershipHistoryModel, PaymentModel, UserModel
 from app.routes.stripe import build_success_url, pay_dues
 from app.util.approve import Approve
@@ -139,6 +140,8 @@ def test_approve_member_sends_welcome_exactly_once(session: Session, patched_app
     assert email.send_email.call_count == 1
     session.refresh(user)
     assert user.is_full_member is True
+    # Only the call that claimed the promotion announces it on the admin stream.
+    assert session.exec(select(AdminEventModel.type).where(AdminEventModel.user_id == user.id)).all() == ["promotion"]
 
 
 def test_approve_member_survives_overlapping_calls(session: Session, engine):
@@ -330,6 +333,65 @@ def test_payments_endpoint_lists_manual_and_stripe(session: Session, client: Tes
     assert rows[0]["member_name"] == "Pay Er"
 
 
+def make_payments(session: Session, user: UserModel, count: int, *, source="manual", currency="usd", amount_cents=1000):
+    for day in range(count):
+        session.add(PaymentModel(user_id=user.id, source=source, currency=currency, amount_cents=amount_cents, created_at=datetime(2025, 1, 1 + day, tzinfo=timezone.utc)))
+    session.commit()
+
+
+def test_payments_endpoint_pages_newest_first(session: Session, client: TestClient, admin_jwt: str):
+    payer = make_user(session)
+    make_payments(session, payer, 5)
+    # Same instant as the newest one; the id keeps the order stable.
+    session.add(PaymentModel(user_id=payer.id, source="manual", currency="usd", amount_cents=1000, created_at=datetime(2025, 1, 5, tzinfo=timezone.utc)))
+    session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = client.get("/admin/payments/", params=params, cookies={"token": admin_jwt}).json()
+        assert ("summary" in page) == (cursor is None)
+        seen += page["data"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 6
+    assert len({row["id"] for row in seen}) == 6
+    assert [row["created_at"][:10] for row in seen] == ["2025-01-05", "2025-01-05", "2025-01-04", "2025-01-03", "2025-01-02", "2025-01-01"]
+    assert seen[0]["id"] > seen[1]["id"]
+    assert all(row["member_name"] == "Pay Er" for row in seen)
+
+
+def test_payments_endpoint_filters_and_summarizes(session: Session, client: TestClient, admin_jwt: str):
+    payer = make_user(session)
+    other = make_user(session, email="other@example.com", first_name="Oth")
+    make_payments(session, payer, 3, source="stripe", amount_cents=1500)
+    make_payments(session, other, 2, currency="EUR")
+
+    def fetch(**params):
+        response = client.get("/admin/payments/", params=params, cookies={"token": admin_jwt})
+        assert response.status_code == 200
+        return response.json()
+
+    assert fetch()["summary"] == {"count": 5, "total_cents": 6500}
+    assert fetch(source="stripe")["summary"] == {"count": 3, "total_cents": 4500}
+    assert fetch(currency="eur")["summary"] == {"count": 2, "total_cents": 2000}
+    assert fetch(user_id=str(other.id))["summary"]["count"] == 2
+    ranged = fetch(since="2025-01-02T00:00:00+00:00", until="2025-01-03T00:00:00+00:00")
+    assert ranged["summary"]["count"] == 2
+    assert {row["member_name"] for row in ranged["data"]} == {"Pay Er", "Oth Er"}
+    # The same window from a client at +05:00.
+    assert fetch(since="2025-01-02T05:00:00+05:00", until="2025-01-03T05:00:00+05:00")["summary"]["count"] == 2
+    # And with no offset at all, which is UTC.
+    assert fetch(since="2025-01-02T00:00:00", until="2025-01-03T00:00:00")["summary"]["count"] == 2
+
+
+def test_payments_endpoint_rejects_bad_cursor(client: TestClient, admin_jwt: str):
+    assert client.get("/admin/payments/", params={"cursor": "nope"}, cookies={"token": admin_jwt}).status_code == 400
+
+
 def test_last_reset_date_derives_from_history(session: Session):
     user = make_user(session)
     assert MembershipReset.get_last_reset_date(session) is None
@@ -0,0 +1,174 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024 Collegiate Cyber Defense Club
+"""
+Query plan regression tests for the hot paths.
+
+Each test drives a real route or helper while recording every statement it
+sends, then runs EXPLAIN QUERY PLAN over each one and fails if SQLite would
+scan a whole table. A scan through an index (including a partial one) or of
+the FTS5 virtual table is fine; "SCAN usermodel" on its own is not. Paths that
+read a whole table by design (the CSV dump, the reset summary aggregate) pin
+that one scan and nothing else.
+"""
+
+import re
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models.search import MEMBER_SEARCH_TRIGGERS
+from app.models.user import MembershipHistoryModel, PaymentModel
+from app.routes.stripe import pay_dues
+from app.util.membership_reset import MembershipReset
+from app.util.roster import encode_cursor
+
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+@pytest.fixture(name="full_scans")
+def full_scans_fixture(engine, async_engine):
+    """
+    Context manager yielding a list that, once the block exits, holds
+    (statement, plan line) for every full table scan among the statements run.
+    """
+
+    @contextmanager
+    def record():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH"):
+                statements.append((statement, parameters[0] if executemany else parameters))
+
+        targets = (engine, async_engine.sync_engine)
+        for target in targets:
+            event.listen(target, "before_cursor_execute", before_cursor_execute)
+        scans = []
+        try:
+            yield scans
+        finally:
+            for target in targets:
+                event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+        assert statements, "nothing was recorded"
+        with engine.connect() as connection:
+            for statement, parameters in statements:
+                for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+                    if FULL_SCAN.match(row[3]):
+                        scans.append((" ".join(statement.split()), row[3]))
+
+    return record
+
+
+@patch("app.util.approve.Approve.approve_member", return_value=None)
+def test_profile_load(mock_approve, client: TestClient, jwt: str, full_scans):
+    with full_scans() as scans:
+        assert client.get("/profile/", cookies={"token": jwt}).status_code == 200
+    assert scans == []
+
+
+def test_admin_member_lookups(client: TestClient, test_user, admin_jwt: str, full_scans):
+    with full_scans() as scans:
+        assert client.get("/admin/get/", params={"member_id": str(test_user.id)}, cookies={"token": admin_jwt}).status_code == 200
+        assert client.get("/admin/get_by_snowflake/", params={"discord_id": test_user.discord_id}, cookies={"token": admin_jwt}).status_code == 200
+    assert scans == []
+
+
+def test_roster_membership_filters(client: TestClient, admin_jwt: str, full_scans):
+    with full_scans() as scans:
+        for flag in ("is_full_member", "did_pay_dues"):
+            assert client.get("/admin/roster/", params={flag: "true"}, cookies={"token": admin_jwt}).status_code == 200
+            assert client.get("/admin/roster/", params={flag: "true", "cursor": encode_cursor(["", "", str(uuid.UUID(int=0))])}, cookies={"token": admin_jwt}).status_code == 200
+    assert scans == []
+
+
+def test_membership_history_lookups(session: Session, test_user, full_scans):
+    session.add(MembershipHistoryModel(user_id=test_user.id))
+    session.commit()
+
+    with full_scans() as scans:
+        assert MembershipReset.get_last_reset_date(session) is not None
+        assert MembershipReset.dues_restart_soon(session) in (True, False)
+        assert len(MembershipReset.get_membership_history(session, user_id=test_user.id)) == 1
+    assert scans == []
+
+
+def test_stripe_webhook_lookups(session: Session, test_user, checkout_session_factory, full_scans):
+    with full_scans() as scans:
+        pay_dues(checkout_session_factory(customer_email=test_user.email), session, BackgroundTasks())
+    assert scans == []
+
+
+def test_payments_pages(session: Session, client: TestClient, test_user, admin_jwt: str, full_scans):
+    session.add(PaymentModel(user_id=test_user.id, source="manual"))
+    session.commit()
+
+    with full_scans() as scans:
+        assert client.get("/admin/payments/", params={"user_id": str(test_user.id)}, cookies={"token": admin_jwt}).status_code == 200
+        assert client.get("/admin/payments/", params={"cursor": encode_cursor([datetime.now(timezone.utc).isoformat(), 0])}, cookies={"token": admin_jwt}).status_code == 200
+    assert scans == []
+
+
+def test_change_feed_pages(client: TestClient, test_user, admin_jwt: str, full_scans):
+    with full_scans() as scans:
+        first = client.get("/admin/changes", params={"limit": 2}, cookies={"token": admin_jwt}).json()
+        assert client.get("/admin/changes", params={"since": first["next_cursor"]}, cookies={"token": admin_jwt}).status_code == 200
+    assert scans == []
+
+
+def test_membership_reset(session: Session, test_user, admin_user, full_scans):
+    # One user per chunk: the keyset walk, INSERT ... SELECT into history and
+    # both bulk UPDATEs all run once per user, each through an index.
+    with full_scans() as scans:
+        result = MembershipReset.reset_all_memberships(session, chunk_size=1)
+    assert result["success"] and result["archived_count"] == 2
+    assert scans == []
+
+
+def test_reset_summary(session: Session, test_user, full_scans):
+    session.add(MembershipHistoryModel(user_id=test_user.id))
+    session.commit()
+
+    # The aggregate reads every history row by design; its cache key must not.
+    with full_scans() as scans:
+        assert MembershipReset.get_reset_summary(session)["total_reset_records"] == 1
+    assert [plan for _, plan in scans] == ["SCAN membershiphistorymodel"]
+    with full_scans() as scans:
+        assert MembershipReset.get_reset_summary(session)["total_reset_records"] == 1
+    assert scans == []
+
+
+def test_admin_search(client: TestClient, test_user, admin_jwt: str, full_scans):
+    with full_scans() as scans:
+        for params in ({"q": "user"}, {"q": "user", "is_full_member": "true"}):
+            response = client.get("/admin/search", params=params, cookies={"token": admin_jwt})
+            assert response.status_code == 200
+            assert response.json()["data"]
+    assert scans == []
+
+
+def test_admin_csv(client: TestClient, test_user, admin_jwt: str, full_scans):
+    # The dump reads every user once; the Discord join and ethics form lookup per row must not scan.
+    with full_scans() as scans:
+        assert client.get("/admin/csv", cookies={"token": admin_jwt}).status_code == 200
+    assert [plan for _, plan in scans] == ["SCAN usermodel"]
+
+
+def test_member_search_triggers(engine):
+    # EXPLAIN on a write does not show its triggers, so plan each trigger
+    # statement on its own, with new./old. columns as parameters. FTS5 plans
+    # a rowid lookup as "INDEX 0:=" and a pass over the whole index as "INDEX 0:".
+    with engine.connect() as connection:
+        for name, ddl in MEMBER_SEARCH_TRIGGERS.items():
+            body = ddl.split(" BEGIN", 1)[1].rsplit("END", 1)[0]
+            for statement in filter(None, (part.strip() for part in body.split(";"))):
+                statement = re.sub(r"\b(?:new|old)\.\w+", "?", statement)
+                plan = [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", (None,) * statement.count("?"))]
+                assert not [line for line in plan if FULL_SCAN.match(line) or line.endswith("VIRTUAL TABLE INDEX 0:")], (name, plan)
@@ -3,9 +3,11 @@
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only, selectinload
+from sqlmodel import Session, SQLModel, select
 
-from app.models.user import UserModel
+from app.models.user import DiscordModel, MembershipHistoryModel, UserModel, UserModelMutable, user_to_dict
 from app.routes.infra import ERR_VPN_CONFIG_NOT_FOUND
 
 
@@ -28,3 +30,122 @@ def test_db(client: TestClient, session: Session, jwt: str):
     user_in_db = session.query(UserModel).filter(UserModel.ucf_id == 123456).first()
     assert user_in_db is not None
     assert user_in_db.email == "test_user@example.com"
+
+
+def test_join_form_renders_user_data(client: TestClient, jwt: str):
+    response = client.get("/join/2/", cookies={"token": jwt})
+    assert response.status_code == 200
+    assert "ko123456" in response.text
+
+
+def test_post_form_persists(client: TestClient, session: Session, jwt: str, test_user: UserModel):
+    response = client.post("/api/form/2", json={"first_name": "Async"}, cookies={"token": jwt})
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Async"
+
+    session.expire_all()
+    assert session.get(UserModel, test_user.id).first_name == "Async"
+
+
+def test_member_dues(client: TestClient, jwt: str, test_user: UserModel, admin_user: UserModel):
+    assert client.get(f"/api/member/{test_user.id}/dues", cookies={"token": jwt}).json() == {"dues": False}
+    assert client.get(f"/api/member/{admin_user.id}/dues", cookies={"token": jwt}).json() == {"dues": True}
+    assert client.get("/api/member/not-a-uuid/dues", cookies={"token": jwt}).json() == {"dues": False}
+
+
+def test_admin_get_and_list(client: TestClient, admin_jwt: str, test_user: UserModel):
+    response = client.get(f"/admin/get/?member_id={test_user.id}", cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    assert response.json()["data"]["discord"]["username"] == "test_user"
+
+    response = client.get("/admin/list", cookies={"token": admin_jwt})
+    assert response.status_code == 200
+    assert {user["discord_id"] for user in response.json()["data"]} == {"123456123456123456", "999999999999999999"}
+
+
+def model_dump_reference(model):
+    """user_to_dict as it was written before it was compiled per class."""
+    if model is None:
+        return None
+    if isinstance(model, list):
+        return [model_dump_reference(item) for item in model]
+    if isinstance(model, (SQLModel, BaseModel)):
+        data = model.model_dump()
+        for key, value in model.__dict__.items():
+            if isinstance(value, (SQLModel, BaseModel)):
+                data[key] = model_dump_reference(value)
+            elif isinstance(value, list) and value and isinstance(value[0], (SQLModel, BaseModel)):
+                data[key] = model_dump_reference(value)
+        return data
+
+
+def test_user_to_dict_matches_model_dump(session: Session, test_user: UserModel):
+    session.add(MembershipHistoryModel(user_id=test_user.id))
+    session.commit()
+    session.expire_all()
+
+    loaded = session.exec(
+        select(UserModel).options(selectinload(UserModel.discord), selectinload(UserModel.ethics_form), selectinload(UserModel.membership_history))  # type: ignore[bad-argument-type]
+    ).one()
+    data = user_to_dict(loaded)
+    assert data == model_dump_reference(loaded)
+    assert data["discord"]["username"] == "test_user"
+    assert len(data["membership_history"]) == 1
+    assert "ethics_form" not in data  # loaded, but the fixture user has none
+
+    session.expire_all()
+    bare = session.exec(select(UserModel).options(load_only(UserModel.first_name))).one()  # type: ignore[bad-argument-type]
+    assert user_to_dict(bare) == model_dump_reference(bare) == {"id": test_user.id, "first_name": "Test"}
+
+    edit = UserModelMutable(id=test_user.id, first_name="Edit", discord=DiscordModel(email="e@example.com", username="edit"))
+    assert user_to_dict(edit) == model_dump_reference(edit)
+    assert user_to_dict([edit, None]) == [model_dump_reference(edit), None]
+
+
+def test_form_etag(client: TestClient):
+    response = client.get("/api/form/2")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    cached = client.get("/api/form/2", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert client.get("/api/form/3", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/api/form/missing", headers={"If-None-Match": etag}).status_code == 404
+
+
+@patch("app.util.approve.Approve.approve_member", return_value=None)
+def test_member_pages_revalidate(mock_approve, client: TestClient, session: Session, jwt: str, admin_jwt: str, test_user: UserModel):
+    for path in ("/profile/", "/join/2/", "/pay/"):
+        response = client.get(path, cookies={"token": jwt})
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        etag = response.headers["ETag"]
+
+        cached = client.get(path, headers={"If-None-Match": etag}, cookies={"token": jwt})
+        assert cached.status_code == 304
+        assert cached.headers["Cache-Control"] == "private, no-cache"
+        # Another member's copy is never theirs.
+        assert client.get(path, headers={"If-None-Match": etag}, cookies={"token": admin_jwt}).status_code == 200
+
+    # The approval workflow still runs when the profile is not re-sent.
+    mock_approve.reset_mock()
+    profile = client.get("/profile/", cookies={"token": jwt}).headers["ETag"]
+    assert client.get("/profile/", headers={"If-None-Match": profile}, cookies={"token": jwt}).status_code == 304
+    assert mock_approve.call_count == 2
+
+    # Editing the user row, or the Discord row shown in the header, changes every page.
+    join = client.get("/join/2/", cookies={"token": jwt}).headers["ETag"]
+    assert client.post("/api/form/2", json={"first_name": "Changed"}, cookies={"token": jwt}).status_code == 200
+    response = client.get("/join/2/", headers={"If-None-Match": join}, cookies={"token": jwt})
+    assert response.status_code == 200
+    assert "Changed" in response.text
+
+    pay = client.get("/pay/", cookies={"token": jwt}).headers["ETag"]
+    test_user.discord.username = "renamed"
+    session.add(test_user.discord)
+    session.commit()
+    for path, etag in (("/pay/", pay), ("/profile/", profile)):
+        response = client.get(path, headers={"If-None-Match": etag}, cookies={"token": jwt})
+        assert response.status_code == 200
+        assert "renamed" in response.text